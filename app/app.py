@@ -1,6 +1,6 @@
-import base64
 import datetime
 import logging
+import math
 import os
 
 import altair as alt
@@ -8,8 +8,18 @@ import pandas as pd
 import streamlit as st
 import tweepy
 
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from transformer_pipeline import TransformerPipeline
+from hashtag_index import HashtagIndex
+from metrics import metrics, serve_metrics
+from query_comparison import QueryComparison, split_queries
+from search_cache import SearchCache
+from sentiment_cache import SentimentCache
+from sentiment_scorer import SentimentScorer
+from transformer_pipeline import TIME_RESOLUTIONS, TransformerPipeline
+from tweet_aggregates import TweetAggregates
+from tweet_export import EXPORT_COMPRESSIONS, EXPORT_FORMATS, export_file_name, export_mime_type, gen_export
+from tweet_history import TweetHistory
+from tweet_store import TweetStore
+from tweet_stream import TweetStream
 
 # Only use dotenv in dev
 try:
@@ -18,16 +28,284 @@ try:
 except ImportError:
     logging.info("dotenv not found. Using sys env vars...")
 
-
+# Most tweets the search endpoint returns per page
+SEARCH_PAGE_SIZE = 100
+# Seconds searches and rate limit statuses are reused across reruns before being fetched again
+SEARCH_CACHE_TTL = 600
+RATE_LIMIT_TTL = 60
+# Set to show per-stage timings in the sidebar, METRICS_PORT and METRICS_PATH also serve or save them
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes')
+# Most tweets plotted individually on a chart, larger samples are downsampled and summarized per time bucket
+# Time series are only zero filled while they stay within as many buckets
+MAX_CHART_POINTS = 500
+# Set to keep every search's scored tweets in a SQLite file, and chart them over the windows below
+TWEET_HISTORY_PATH = os.getenv('TWEET_HISTORY_PATH')
+HISTORY_WINDOWS = {'1 day': pd.Timedelta('1 days'), '7 days': pd.Timedelta('7 days'),
+                   '30 days': pd.Timedelta('30 days'), 'All time': None}
+HISTORY_RESOLUTIONS = ['minute', '5 minutes', 'hour', 'day']
+
+
+@st.experimental_singleton(show_spinner=False)
 def twitter_connect():
     auth = tweepy.AppAuthHandler(os.getenv('TWITTER_KEY'), os.getenv('TWITTER_SECRET_KEY'))
     return tweepy.API(auth)
 
 
-def main():
+# Built once per process and shared by every session, the VADER lexicon is only loaded once
+@st.experimental_singleton(show_spinner=False)
+def load_pipeline():
     transformer = TransformerPipeline()
-    analyzer = SentimentIntensityAnalyzer()
+    scorer = SentimentScorer(cache=SentimentCache(path=os.getenv('SENTIMENT_CACHE_PATH')),
+                             backend=os.getenv('SENTIMENT_BACKEND', 'vader'))
+    return transformer, scorer
+
+
+# Comparisons search through one client per process, so its bearer token, pooled connections and rate limiter
+# carry over from one comparison to the next
+@st.experimental_singleton(show_spinner=False)
+def async_twitter_connect():
+    # aiohttp is only imported once a comparison needs it, single searches go through tweepy
+    from async_twitter import AsyncTwitterClient, ClientThread
+    return ClientThread(AsyncTwitterClient(os.getenv('TWITTER_KEY'), os.getenv('TWITTER_SECRET_KEY'),
+                                           rate_limit_ttl=RATE_LIMIT_TTL))
+
+
+@st.experimental_singleton(show_spinner=False)
+def load_search_cache():
+    return SearchCache(ttl=SEARCH_CACHE_TTL)
+
+
+@st.experimental_singleton(show_spinner=False)
+def load_history():
+    return TweetHistory(TWEET_HISTORY_PATH) if TWEET_HISTORY_PATH else None
+
+
+# Metrics are process wide, so they are turned on and served once for every session
+@st.experimental_singleton(show_spinner=False)
+def setup_metrics():
+    metrics.enable(trace_memory=os.getenv('METRICS_TRACE_MEMORY', '').lower() in ('1', 'true', 'yes'))
+    if os.getenv('METRICS_PORT'):
+        return serve_metrics(metrics, int(os.getenv('METRICS_PORT')))
+    return None
+
+
+@st.experimental_memo(ttl=RATE_LIMIT_TTL, show_spinner=False)
+def get_rate_limit_info(_api):
+    results = _api.rate_limit_status()
+    return results['resources']['search']['/search/tweets']
+
+
+# Fetch, convert and score tweets, each page is processed while the next one is fetched
+# The interaction and sentiment charts are redrawn from the running aggregates as every page arrives
+# With a history, every page is also stored so later visits can chart it without searching again
+@metrics.timed()
+def search_tweets(api, transformer, scorer, user_input, sample_size, time_resolution='minute', history=None):
+    logging.info('Analyzing {} Tweets for: {}'.format(sample_size, user_input))
+    pages = tweepy.Cursor(api.search, q=user_input, tweet_mode='extended', result_type='recent',
+                          count=SEARCH_PAGE_SIZE).pages(math.ceil(sample_size / SEARCH_PAGE_SIZE))
+    aggregates = TweetAggregates()
+    stream = TweetStream(transformer, scorer, aggregates, history=history)
+    progress_bar = st.progress(0.0)
+    preview = st.empty()
+    # Pages are compacted as they arrive so only one full page is held at a time
+    stores = []
+    for page_df in stream.process_pages(pages, limit=sample_size):
+        stores.append(TweetStore.from_dataframe(page_df))
+        if history is not None:
+            history.upsert(user_input, page_df)
+        progress_bar.progress(min(stream.tweets / sample_size, 1.0))
+        with preview.container():
+            st.write('{} tweets analyzed so far, averaging **{}**'.format(
+                aggregates.tweets, transformer.map_sentiment_label(aggregates.mean_sentiment)))
+            col1, col2 = st.columns([8, 4])
+            with col1:
+                df_tweets_by_time = aggregates.gen_tweets_by_time_dataframe(time_resolution, True, MAX_CHART_POINTS)
+                draw_chart(chart_tweets_by_time(df_tweets_by_time), 'preview_tweets_by_time')
+            with col2:
+                draw_chart(chart_sentiment_distribution(aggregates.gen_sentiment_counts_dataframe()),
+                           'preview_sentiment_distribution')
+    progress_bar.empty()
+    preview.empty()
+    if not stores:
+        return None, aggregates, None
+    store = TweetStore.concat(stores)
+    return store, aggregates, HashtagIndex.from_store(store)
+
+
+# Fetch every query concurrently, then convert and score the tweets they found once, however many queries found them
+@metrics.timed()
+def compare_tweets(transformer, scorer, client, queries, sample_size, history=None):
+    logging.info('Comparing {} Tweets each for: {}'.format(sample_size, ', '.join(queries)))
+    results = client.search_many(queries, sample_size)
+    comparison = QueryComparison.from_results(transformer, scorer, results, history)
+    if history is not None and comparison is not None:
+        for query, rows in comparison.rows.items():
+            history.upsert(query, comparison.frame(query), [comparison.store.hashtags[row] for row in rows])
+    return comparison
+
+
+def stop_if_rate_limited(rate_limit_info):
+    if rate_limit_info['remaining'] == 0:
+        local_tz = datetime.datetime.utcnow().astimezone().tzinfo
+        reset_time = pd.to_datetime(rate_limit_info['reset'], unit='s') \
+            .tz_localize('utc') \
+            .tz_convert(local_tz) \
+            .strftime('%I:%M:%S %p')
+        st.warning('⏲ We have to wait before getting more data. '
+                   'Try again at {}.'.format(reset_time))
+        st.stop()
+
+
+def chart_tweets_by_time(df_tweets_by_time):
+    return alt.Chart(df_tweets_by_time).mark_line().encode(x='Created', y='Tweets')
+
+
+def chart_sentiment_distribution(df_sentiment_counts):
+    return alt.Chart(df_sentiment_counts).mark_bar().encode(
+        x=alt.X('Tweets', axis=alt.Axis(tickMinStep=1)),
+        y=alt.Y('Sentiment', axis=alt.Axis(title=None), sort='-x'),
+        color=alt.Color('Sentiment',
+                        # Setup color by sentiment category
+                        sort=alt.EncodingSortField('Sentiment', order='ascending'),
+                        scale=alt.Scale(domain=['Positive', 'Neutral', 'Negative']),
+                        ),
+    )
+
+
+# Quartile band and mean line per time bucket, under a downsampled scatter of the tweets themselves
+def chart_sentiment_score_by_time(df_sentiment_score_by_time, df_sentiment_stats_by_time):
+    quartiles = alt.Chart(df_sentiment_stats_by_time).mark_area(opacity=0.2, color='gray').encode(
+        x='Created',
+        y=alt.Y('Lower Quartile', title='Sentiment Score'),
+        y2='Upper Quartile',
+    )
+    mean = alt.Chart(df_sentiment_stats_by_time).mark_line(color='gray').encode(x='Created', y='Sentiment Score')
+    scores = alt.Chart(df_sentiment_score_by_time).mark_circle(size=60).encode(
+        x='Created',
+        y='Sentiment Score',
+        color=alt.Color('Sentiment',
+                        # Setup color by sentiment category
+                        sort=alt.EncodingSortField('Sentiment', order='ascending'),
+                        scale=alt.Scale(domain=['Positive', 'Neutral', 'Negative']),
+                        ),
+    )
+    return alt.layer(quartiles, mean, scores)
+
+
+# Altair charts are serialized to Vega-Lite JSON here, so this is timed apart from building their data
+def draw_chart(chart, name):
+    with metrics.stage('altair.' + name):
+        st.altair_chart(chart, use_container_width=True)
+
+
+def show_metrics():
+    if not metrics.enabled:
+        return
+    if os.getenv('METRICS_PATH'):
+        metrics.write(os.getenv('METRICS_PATH'))
+    with st.sidebar.expander('Debug Metrics'):
+        st.dataframe(metrics.gen_summary_dataframe())
+        col1, col2 = st.columns(2)
+        col1.download_button('JSON', metrics.to_json(), file_name='metrics.json', mime='application/json')
+        col2.download_button('Prometheus', metrics.to_prometheus(), file_name='metrics.prom', mime='text/plain')
+        if st.button('Reset'):
+            metrics.reset()
+
+
+# Tweets and sentiment of every search for query stored over the window, read from the history's rollups
+def show_history(transformer, history, query, window, resolution):
+    start = None if HISTORY_WINDOWS[window] is None else pd.Timestamp.now(tz='UTC') - HISTORY_WINDOWS[window]
+    df_history = history.gen_rollup_dataframe(query, resolution, start=start)
+    st.write("""
+    <hr/>  
+    
+    ## History
+    """, unsafe_allow_html=True)
+    if df_history.empty:
+        st.write('No tweets stored for this search in the last {}.'.format(window))
+        return
+    num_tweets = int(df_history['Tweets'].sum())
+    first, last = history.gen_time_span(query, start=start)
+    time_range = last - first
+    col1, col2 = st.columns([4, 8])
+    with col1:
+        st.write("""
+          ### Stored Tweets
+          """, str(num_tweets))
+        st.write("""
+          ### Level
+          """, transformer.map_interaction_label(time_range, num_tweets))
+        st.write("""
+          ### Average
+          """, transformer.map_sentiment_label(
+            float((df_history['Sentiment Score'] * df_history['Tweets']).sum()) / num_tweets))
+    with col2:
+        chart_tweets = alt.Chart(df_history).mark_line().encode(x='Created', y='Tweets')
+        chart_sentiment = alt.Chart(df_history).mark_line(color='gray').encode(
+            x='Created', y=alt.Y('Sentiment Score', scale=alt.Scale(domain=[-1, 1])))
+        draw_chart(alt.vconcat(chart_tweets.properties(height=150), chart_sentiment.properties(height=150)),
+                   'history')
+
+
+def show_comparison(transformer, scorer, search_cache, queries, sample_size, time_resolution, history=None):
+    search_key = (tuple(queries), sample_size)
+    comparison = search_cache.get(search_key)
+    if comparison is None:
+        # The client's cached rate limit status also syncs its limiter with what Twitter has left
+        client = async_twitter_connect()
+        stop_if_rate_limited(client.rate_limit_status())
+        with st.spinner('🔎 Searching for tweets and analyzing sentiments...'):
+            comparison = compare_tweets(transformer, scorer, client, queries, sample_size, history)
+        if comparison is not None:
+            search_cache.put(search_key, comparison, size=comparison.store.memory_usage())
+
+    if comparison is None:
+        st.warning('⛔ No tweets found. Try other terms.')
+        st.stop()
 
+    st.write("""
+      ## Comparing {} Unique Tweets for: {}
+      {} tweets were found by more than one term.
+      """.format(len(comparison), ', '.join('<u>{}</u>'.format(query) for query in queries),
+                 comparison.shared_tweets), unsafe_allow_html=True)
+    df_summary = comparison.gen_summary_dataframe()
+    df_summary['Average Sentiment'] = transformer.map_sentiment_labels(df_summary['Sentiment Score'])
+    st.table(df_summary.assign(hack='').set_index('hack'))
+
+    # Row: Interactions over time, one chart per query
+    st.write("""
+    <hr/>  
+    
+    ## Interactions
+    """, unsafe_allow_html=True)
+    for col, query in zip(st.columns(len(queries)), queries):
+        df = comparison.frame(query)
+        with col:
+            st.write("""
+              ### {}
+              """.format(query), transformer.map_interaction_label(
+                df['created_at'].max() - df['created_at'].min(), sample_size) if len(df.index) else '')
+            df_tweets_by_time = transformer.gen_tweets_by_time_dataframe(df, time_resolution, True, MAX_CHART_POINTS)
+            draw_chart(chart_tweets_by_time(df_tweets_by_time), 'tweets_by_time')
+
+    # Row: Sentiments over time, one chart per query
+    st.write("""
+    <hr/>  
+    
+    ## Sentiments
+    """, unsafe_allow_html=True)
+    for col, query in zip(st.columns(len(queries)), queries):
+        df = comparison.frame(query)
+        with col:
+            st.write("""
+              ### {}
+              """.format(query))
+            draw_chart(chart_sentiment_score_by_time(
+                transformer.gen_sentiment_score_by_time_dataframe(df, MAX_CHART_POINTS),
+                transformer.gen_sentiment_stats_by_time_dataframe(df, time_resolution)), 'sentiment_score_by_time')
+
+
+def show_page():
     # Setup Page Title and Styles
     st.set_page_config(page_title='Trending Sentiments', page_icon='📈', initial_sidebar_state='expanded', )
     st.markdown(
@@ -36,8 +314,14 @@ def main():
         </style>
         """, unsafe_allow_html=True)
 
+    if METRICS_ENABLED:
+        setup_metrics()
+
     # Setup Sentiment Prediction Model & Twitter API
-    with st.spinner('🔨 Getting everything ready...'):
+    with st.spinner('🔨 Getting everything ready...'), metrics.stage('main.setup'):
+        transformer, scorer = load_pipeline()
+        search_cache = load_search_cache()
+        history = load_history()
         api = twitter_connect()
 
     # Setup Page Header
@@ -48,8 +332,13 @@ def main():
 
     # Setup Sidebar
     # Handle user input
-    user_input = st.sidebar.text_input('Search for a hashtag or keyword to begin', '#Avatar')
+    user_input = st.sidebar.text_input('Search for a hashtag or keyword to begin', '#Avatar',
+                                       help='Separate several terms with commas to compare them')
     sample_size = st.sidebar.slider('Sample Size', min_value=100, max_value=1000, step=100)
+    time_resolution = st.sidebar.selectbox('Time Resolution', list(TIME_RESOLUTIONS), index=1)
+    if history is not None:
+        history_window = st.sidebar.selectbox('History Window', list(HISTORY_WINDOWS), index=1)
+        history_resolution = st.sidebar.selectbox('History Resolution', HISTORY_RESOLUTIONS, index=2)
     st.sidebar.write("""
       Created by [Ryan Dorman](https://github.com/dormanator)
       """)
@@ -63,42 +352,39 @@ def main():
         using [VADER (Valence Aware Dictionary and sEntiment Reasoner)](https://github.com/cjhutto/vaderSentiment).
         """, unsafe_allow_html=True)
 
-    # Check Twitter API rate limits and handle search state
-    results = api.rate_limit_status()
-    rate_limit_info = results['resources']['search']['/search/tweets']
-
-    if not user_input:
+    queries = split_queries(user_input)
+    if not queries:
         st.warning('⛔ Please input a search value.')
         st.stop()
-
-    if rate_limit_info['remaining'] == 0:
-        local_tz = datetime.datetime.utcnow().astimezone().tzinfo
-        reset_time = pd.to_datetime(rate_limit_info['reset'], unit='s') \
-            .tz_localize('utc') \
-            .tz_convert(local_tz) \
-            .strftime('%I:%M:%S %p')
-        st.warning('⏲ We have to wait before getting more data. '
-                   'Try again at {}.'.format(reset_time))
-        st.stop()
-
-    with st.spinner('🔎 Searching for tweets...'):
-        logging.info('Analyzing {} Tweets for: {}'.format(sample_size, user_input))
-        cursor = tweepy.Cursor(api.search, q=user_input, tweet_mode='extended', result_type='recent').items(sample_size)
-        json_data = [ tweet._json for tweet in cursor]
-        df = transformer.convert_json_to_dataframe(json_data)
-
-    if df is None:
+    if len(queries) > 1:
+        with metrics.stage('main.comparison'):
+            show_comparison(transformer, scorer, search_cache, queries, sample_size, time_resolution, history)
+        return
+    user_input = queries[0]
+
+    # Row: Every stored search for the term over a longer window, read from the history alone so it shows even when
+    # the Twitter API is rate limited
+    if history is not None:
+        with metrics.stage('main.history'):
+            show_history(transformer, history, user_input, history_window, history_resolution)
+
+    # Reruns for a recent search reuse its results without touching the Twitter API
+    search_key = (user_input, sample_size)
+    search_result = search_cache.get(search_key)
+    if search_result is None:
+        # Check Twitter API rate limits and handle search state
+        stop_if_rate_limited(get_rate_limit_info(api))
+
+        with st.spinner('🔎 Searching for tweets and analyzing sentiments...'):
+            search_result = search_tweets(api, transformer, scorer, user_input, sample_size, time_resolution, history)
+        if search_result[0] is not None:
+            search_cache.put(search_key, search_result, size=search_result[0].memory_usage())
+    store, aggregates, hashtag_index = search_result
+
+    if store is None:
         st.warning('⛔ No tweets found. Try another term.')
         st.stop()
-
-    # Predict tweet sentiments using VADER
-    with st.spinner('⏳ Analyzing sentiments. This may take a moment...'):
-        df['sentiment_score'] = df['tweet'] \
-            .apply(transformer.clean_tweet) \
-            .apply(analyzer.polarity_scores) \
-            .apply(lambda d: d.get('compound'))
-        df['sentiment_text'] = df['sentiment_score'].map(transformer.map_sentiment_label)
-        df['sentiment_text'].astype('category')
+    df = store.frame
 
     # Start of Page Body
     st.write("""
@@ -106,190 +392,215 @@ def main():
       """.format(len(df.index), user_input), unsafe_allow_html=True)
 
     # Row: Interaction descriptive stats
-    st.write("""
-    <hr/>  
-    
-    ## Interactions
-    """, unsafe_allow_html=True)
-    col1, col2 = st.columns([8, 4])
-
-    # Col: Graph of tweet interaction over time
-    with col1:
-        st.write("""
-          ### Over Time
-          """)
-        df_tweets_by_time = transformer.gen_tweets_by_time_dataframe(df)
-        chart_tweets_by_time = alt.Chart(df_tweets_by_time).mark_line().encode(x='Created', y='Tweets')
-        st.altair_chart(chart_tweets_by_time, use_container_width=True)
-
-    # Col: length of time period 100 most recent occurred
-    # Current interaction rating: very low (> 24hrs), low (24hrs-12), med (12-4), high (4-2), very high (<2)
-    time_range = df['created_at'].max() - df['created_at'].min()
-    interaction_description = transformer.map_interaction_label(time_range, sample_size)
-    with col2:
-        st.write("""
-              ### Level
-              """, interaction_description)
+    with metrics.stage('main.interactions'):
         st.write("""
-              ### Period
-              """, str(time_range))
+        <hr/>  
+        
+        ## Interactions
+        """, unsafe_allow_html=True)
+        col1, col2 = st.columns([8, 4])
+
+        # Col: Graph of tweet interaction over time
+        with col1:
+            st.write("""
+              ### Over Time
+              """)
+            df_tweets_by_time = aggregates.gen_tweets_by_time_dataframe(time_resolution, True, MAX_CHART_POINTS)
+            draw_chart(chart_tweets_by_time(df_tweets_by_time), 'tweets_by_time')
+
+        # Col: length of time period 100 most recent occurred
+        # Current interaction rating: very low (> 24hrs), low (24hrs-12), med (12-4), high (4-2), very high (<2)
+        time_range = aggregates.time_range
+        interaction_description = transformer.map_interaction_label(time_range, sample_size)
+        with col2:
+            st.write("""
+                  ### Level
+                  """, interaction_description)
+            st.write("""
+                  ### Period
+                  """, str(time_range))
 
     # Row: Sentiment descriptive stats
-    st.write("""
-    <hr/>  
-    
-    ## Sentiments
-    """, unsafe_allow_html=True)
-    col1, col2 = st.columns([4, 8])
-
-    # Col: Avg sentiments across the sample
-    avg_sentiment_score = df['sentiment_score'].mean()
-    with col1:
-        st.write("""
-              ### Average
-              """, transformer.map_sentiment_label(avg_sentiment_score))
-
-    # Col: Graph of predictive sentiment time series
-    df_sentiment_score_by_time = transformer.gen_sentiment_score_by_time_dataframe(df)
-    chart_sentiment_score_by_time = alt.Chart(df_sentiment_score_by_time).mark_circle(size=60).encode(
-        x='Created',
-        y='Sentiment Score',
-        color=alt.Color('Sentiment',
-                        # Setup color by sentiment category
-                        sort=alt.EncodingSortField('Sentiment', order='ascending'),
-                        scale=alt.Scale(domain=['Positive', 'Neutral', 'Negative']),
-                        ),
-    )
-    with col2:
-        st.write("""
-            ### Over Time
-            """)
-        st.altair_chart(chart_sentiment_score_by_time, use_container_width=True)
-
-    col1, col2 = st.columns([4, 8])
-    # Col: Sentiments most seen across the sample
-    most_common_sentiment = df['sentiment_text'].mode()[0]
-    with col1:
-        st.write("""
-                ### Most Common
-                """, most_common_sentiment)
-
-    # Col: Graph of predictive sentiment time series
-    df_sentiment_score_by_time = transformer.gen_sentiment_score_by_time_dataframe(df)
-    sentiment_distribution = alt.Chart(df_sentiment_score_by_time).mark_bar().encode(
-        x=alt.X('count(Sentiment)', axis=alt.Axis(tickMinStep=1, title='Tweets')),
-        y=alt.Y('Sentiment', axis=alt.Axis(title=None), sort='-x'),
-        color=alt.Color('Sentiment',
-                        # Setup color by sentiment category
-                        sort=alt.EncodingSortField('Sentiment', order='ascending'),
-                        scale=alt.Scale(domain=['Positive', 'Neutral', 'Negative']),
-                        ),
-    )
-    with col2:
+    with metrics.stage('main.sentiments'):
         st.write("""
-            ### Distribution
-            """)
-        st.altair_chart(sentiment_distribution, use_container_width=True)
+        <hr/>  
+        
+        ## Sentiments
+        """, unsafe_allow_html=True)
+        col1, col2 = st.columns([4, 8])
+
+        # Col: Avg sentiments across the sample
+        avg_sentiment_score = aggregates.mean_sentiment
+        with col1:
+            st.write("""
+                  ### Average
+                  """, transformer.map_sentiment_label(avg_sentiment_score))
+
+        # Col: Graph of predictive sentiment time series
+        # Charts get pre-aggregated frames with a bounded number of rows, each built once per run
+        df_sentiment_score_by_time = transformer.gen_sentiment_score_by_time_dataframe(df, MAX_CHART_POINTS)
+        df_sentiment_stats_by_time = transformer.gen_sentiment_stats_by_time_dataframe(df, time_resolution)
+        df_sentiment_counts = transformer.gen_sentiment_counts_dataframe(df)
+        with col2:
+            st.write("""
+                ### Over Time
+                """)
+            draw_chart(chart_sentiment_score_by_time(df_sentiment_score_by_time, df_sentiment_stats_by_time),
+                       'sentiment_score_by_time')
+
+        col1, col2 = st.columns([4, 8])
+        # Col: Sentiments most seen across the sample
+        most_common_sentiment = aggregates.most_common_sentiment
+        with col1:
+            st.write("""
+                    ### Most Common
+                    """, most_common_sentiment)
+
+        # Col: Graph of predictive sentiment distribution
+        with col2:
+            st.write("""
+                ### Distribution
+                """)
+            draw_chart(chart_sentiment_distribution(df_sentiment_counts), 'sentiment_distribution')
 
     # Row: Top Tweets descriptive stats row
-    st.write("""
-    <hr/>  
-    
-    ## Features
-    """, unsafe_allow_html=True)
-    col1, col2 = st.columns(2)
-
-    # Col: Top favorite & sentiment
-    top_favorite = df.loc[df['favorite_count'] == df['favorite_count'].max()]
-    with col1:
-        st.write("""
-          ### Top Favorite Tweet   
-          """)
-        st.write("""
-          **Text:** {}  
-          **User:** {}  
-          **Sentiment:** {}    
-          """.format(
-            top_favorite['full_text'].values[0],
-            top_favorite['user.screen_name'].values[0],
-            top_favorite['sentiment_text'].values[0]
-        ))
-
-    # Col: Top re-tweet & sentiment
-    top_retweet = df.loc[df['retweet_count'] == df['retweet_count'].max()]
-    with col2:
-        st.write("""
-          ### Top Re-Tweet
-          """)
+    with metrics.stage('main.features'):
         st.write("""
-          **Text:** {}  
-          **User:** {}  
-          **Sentiment:** {}    
-          """.format(
-            top_retweet['full_text'].values[0],
-            top_retweet['user.screen_name'].values[0],
-            top_retweet['sentiment_text'].values[0]
-        ))
+        <hr/>  
+        
+        ## Features
+        """, unsafe_allow_html=True)
+        col1, col2 = st.columns(2)
+
+        # Col: Top favorite & sentiment
+        top_favorite = aggregates.top_favorites()[0]
+        with col1:
+            st.write("""
+              ### Top Favorite Tweet   
+              """)
+            st.write("""
+              **Text:** {}  
+              **User:** {}  
+              **Sentiment:** {}    
+              """.format(
+                top_favorite['full_text'],
+                top_favorite['user.screen_name'],
+                top_favorite['sentiment_text']
+            ))
+
+        # Col: Top re-tweet & sentiment
+        top_retweet = aggregates.top_retweets()[0]
+        with col2:
+            st.write("""
+              ### Top Re-Tweet
+              """)
+            st.write("""
+              **Text:** {}  
+              **User:** {}  
+              **Sentiment:** {}    
+              """.format(
+                top_retweet['full_text'],
+                top_retweet['user.screen_name'],
+                top_retweet['sentiment_text']
+            ))
 
     # Row: Top hashtags bar chart
-    df_top_hashtags = transformer.gen_hashtag_counts_dataframe(df)
-    chart_top_hashtags = alt.Chart(df_top_hashtags.head(5)).mark_bar().encode(
-        x=alt.X('Count', axis=alt.Axis(tickMinStep=1)),
-        y=alt.Y('Hashtag', axis=alt.Axis(title=""), sort='-x')) \
-        .configure_axis(labelFontSize=12)
-    st.write("""
-      ### Top 5 Hashtags
-      """)
-    st.altair_chart(chart_top_hashtags, use_container_width=True)
-
-    # Row: User descriptive stats
-    st.write("""
-    <hr/>  
-    
-    ## Users
-    """, unsafe_allow_html=True)
-    col1, col2 = st.columns(2)
-
-    # Col: Number of unique users
-    user_counts = df['user.screen_name'].value_counts()
-    num_users = user_counts.size
-    with col1:
+    with metrics.stage('main.hashtags'):
+        df_top_hashtags = hashtag_index.top_dataframe(5)
+        chart_top_hashtags = alt.Chart(df_top_hashtags).mark_bar().encode(
+            x=alt.X('Count', axis=alt.Axis(tickMinStep=1)),
+            y=alt.Y('Hashtag', axis=alt.Axis(title=""), sort='-x')) \
+            .configure_axis(labelFontSize=12)
         st.write("""
-          ### Unique Users
-          """, str(num_users))
+          ### Top 5 Hashtags
+          """)
+        draw_chart(chart_top_hashtags, 'top_hashtags')
+
+        # Row: Hashtags used alongside the searched hashtag & sentiment of top hashtags
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write("""
+              ### Related Hashtags
+              """)
+            if user_input in hashtag_index:
+                st.table(hashtag_index.related_dataframe(user_input).assign(hack='').set_index('hack'))
+            else:
+                st.write('Search for a hashtag to see the hashtags used with it.')
+        df_hashtag_sentiment = hashtag_index.sentiment_dataframe(5)
+        chart_hashtag_sentiment = alt.Chart(df_hashtag_sentiment).mark_bar().encode(
+            x=alt.X('Sentiment Score', scale=alt.Scale(domain=[-1, 1])),
+            y=alt.Y('Hashtag', axis=alt.Axis(title=""), sort=alt.EncodingSortField('Tweets', order='descending')))
+        with col2:
+            st.write("""
+              ### Top Hashtag Sentiments
+              """)
+            draw_chart(chart_hashtag_sentiment, 'hashtag_sentiment')
 
-    # Col: User with most tweets
-    user_max_tweets = user_counts.head(3).index.values
-    count_max_tweets = user_counts.head(3).values
-    df_top_tweets = pd.DataFrame({'User': user_max_tweets, 'Tweets': count_max_tweets})
-    with col2:
+    # Row: User descriptive stats
+    with metrics.stage('main.users'):
         st.write("""
-          ### Users with Most Tweets
-          """)
-        st.table(df_top_tweets.assign(hack='').set_index('hack'))
+        <hr/>  
+        
+        ## Users
+        """, unsafe_allow_html=True)
+        col1, col2 = st.columns(2)
+
+        # Col: Number of unique users
+        user_counts = store.gen_user_counts_series()
+        num_users = user_counts.size
+        with col1:
+            st.write("""
+              ### Unique Users
+              """, str(num_users))
+
+        # Col: User with most tweets
+        user_max_tweets = user_counts.head(3).index.values
+        count_max_tweets = user_counts.head(3).values
+        df_top_tweets = pd.DataFrame({'User': user_max_tweets, 'Tweets': count_max_tweets})
+        with col2:
+            st.write("""
+              ### Users with Most Tweets
+              """)
+            st.table(df_top_tweets.assign(hack='').set_index('hack'))
 
     # Row: Table with all sample data records and export
-    df_display = df[['created_at', 'user.screen_name', 'full_text', 'sentiment_text', 'sentiment_score']].rename(columns={
+    with metrics.stage('main.data'):
+        df_display = df[['created_at', 'user.screen_name', 'full_text', 'sentiment_text', 'sentiment_score']] \
+            .rename(columns={
                 'created_at': 'Created',
                 'user.screen_name': 'User',
                 'full_text': 'Tweet',
                 'sentiment_text': 'Sentiment',
                 'sentiment_score': 'Sentiment Score'
             })
-    csv = df_display.to_csv().encode()
-    b64 = base64.b64encode(csv).decode()
-    st.write("""
-    <hr/>  
-
-    ## Data
-    """, unsafe_allow_html=True)
-    with st.expander("All Tweets Analyzed"):
-        st.write(df_display)
         st.write("""
-            <div style="text-align:center;margin:1em 0;">
-                <a href="data:file/csv;base64,{}" download="tweets.csv" target="_blank">💾 Export</a>
-            </div>
-            """.format(b64), unsafe_allow_html=True)
+        <hr/>  
+
+        ## Data
+        """, unsafe_allow_html=True)
+        with st.expander("All Tweets Analyzed"):
+            st.write(df_display)
+            # The export is only serialized when asked for, and is served as a file rather than inlined in the page
+            col1, col2, col3 = st.columns(3)
+            export_format = col1.selectbox('Format', EXPORT_FORMATS)
+            compression = col2.selectbox('Compression', EXPORT_COMPRESSIONS, format_func=lambda c: c or 'none')
+            if col3.button('💾 Export'):
+                try:
+                    data = gen_export(df_display, export_format, compression)
+                except ImportError as error:
+                    st.warning('⛔ {} is needed for this export.'.format(error.name))
+                else:
+                    col3.download_button('Download', data,
+                                         file_name=export_file_name('tweets', export_format, compression),
+                                         mime=export_mime_type(export_format, compression))
+
+
+def main():
+    # The metrics panel also covers runs that st.stop ends early, such as rate limited or empty searches
+    try:
+        show_page()
+    finally:
+        show_metrics()
 
 
 if __name__ == '__main__':
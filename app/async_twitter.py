@@ -0,0 +1,217 @@
+import asyncio
+import base64
+import random
+import threading
+import time
+from urllib.parse import parse_qsl
+
+import aiohttp
+
+try:
+    from .metrics import metrics
+except ImportError:
+    from metrics import metrics
+
+TWITTER_API_URL = 'https://api.twitter.com'
+SEARCH_PATH = '/1.1/search/tweets.json'
+RATE_LIMIT_PATH = '/1.1/application/rate_limit_status.json'
+TOKEN_PATH = '/oauth2/token'
+# Most tweets the search endpoint returns per request
+SEARCH_PAGE_SIZE = 100
+# App auth allowance for /search/tweets: 450 requests every 15 minutes
+SEARCH_LIMIT = 450
+SEARCH_WINDOW = 15 * 60
+
+
+class TwitterAPIError(Exception):
+    """Raised when the Twitter API keeps failing after all retries"""
+
+    def __init__(self, status, message):
+        super().__init__('Twitter API returned {}: {}'.format(status, message))
+        self.status = status
+
+
+class RateLimiter:
+    """Token bucket that spreads the remaining search requests evenly until the rate limit window resets"""
+
+    def __init__(self, limit=SEARCH_LIMIT, window=SEARCH_WINDOW, burst=5, clock=time.time, sleep=asyncio.sleep):
+        self.limit = limit
+        self.window = window
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.remaining = limit
+        self.reset = clock() + window
+        self._refilled = clock()
+        self._lock = None
+
+    # Sync with the remaining requests and reset epoch reported by Twitter
+    def update(self, remaining, reset):
+        self.remaining = remaining
+        self.reset = reset
+
+    @property
+    def rate(self):
+        # Requests per second that use up the remaining budget exactly when the window resets
+        return max(self.remaining, 1) / max(self.reset - self.clock(), 1.0)
+
+    def _refill(self, now):
+        if now >= self.reset:
+            # A new window started, the full allowance is back
+            self.remaining = self.limit
+            self.reset = now + self.window
+        self.tokens = min(self.burst, self.tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    async def acquire(self):
+        # Created on first use so the lock belongs to the running event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = self.clock()
+                self._refill(now)
+                if self.remaining <= 0:
+                    # Wait out the window instead of giving up on the search
+                    await self.sleep(self.reset - now)
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    self.remaining -= 1
+                    return
+                else:
+                    await self.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncTwitterClient:
+    """Searches Twitter over one pooled HTTP session, running several searches at once within the rate limit"""
+
+    def __init__(self, key=None, secret=None, bearer_token=None, base_url=TWITTER_API_URL, max_connections=10,
+                 limiter=None, rate_limit_ttl=60, max_retries=3, backoff=1.0, clock=time.time, sleep=asyncio.sleep):
+        self.key = key
+        self.secret = secret
+        self.bearer_token = bearer_token
+        self.base_url = base_url.rstrip('/')
+        self.max_connections = max_connections
+        self.limiter = limiter or RateLimiter(clock=clock, sleep=sleep)
+        self.rate_limit_ttl = rate_limit_ttl
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.clock = clock
+        self.sleep = sleep
+        self._session = None
+        self._token_lock = None
+        self._rate_limit_info = None
+        self._rate_limit_expiry = 0.0
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_connections)
+        self._session = aiohttp.ClientSession(connector=connector)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self._session.close()
+        self._session = None
+
+    async def _get_bearer_token(self):
+        if self.bearer_token is not None:
+            return self.bearer_token
+        # Created on first use so the lock belongs to the running event loop
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        # Concurrent searches wait for the first one's token request instead of each sending their own
+        async with self._token_lock:
+            if self.bearer_token is None:
+                credentials = base64.b64encode('{}:{}'.format(self.key, self.secret).encode()).decode()
+                async with self._session.post(self.base_url + TOKEN_PATH, data={'grant_type': 'client_credentials'},
+                                              headers={'Authorization': 'Basic ' + credentials}) as response:
+                    if response.status != 200:
+                        raise TwitterAPIError(response.status, await response.text())
+                    self.bearer_token = (await response.json())['access_token']
+        return self.bearer_token
+
+    def _update_limiter(self, headers):
+        if 'x-rate-limit-remaining' in headers and 'x-rate-limit-reset' in headers:
+            self.limiter.update(int(headers['x-rate-limit-remaining']), int(headers['x-rate-limit-reset']))
+
+    async def _get(self, path, params, rate_limited=True):
+        headers = {'Authorization': 'Bearer ' + await self._get_bearer_token()}
+        for attempt in range(self.max_retries + 1):
+            if rate_limited:
+                await self.limiter.acquire()
+            with metrics.stage('AsyncTwitterClient.get'):
+                async with self._session.get(self.base_url + path, params=params, headers=headers) as response:
+                    if rate_limited:
+                        self._update_limiter(response.headers)
+                    if response.status == 200:
+                        return await response.json()
+                    error = TwitterAPIError(response.status, await response.text())
+            # Retry throttling and server errors with jittered exponential backoff
+            if error.status != 429 and error.status < 500:
+                raise error
+            if attempt < self.max_retries:
+                await self.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+        raise error
+
+    # Search rate limit info, fetched at most once every rate_limit_ttl seconds
+    async def rate_limit_status(self):
+        now = self.clock()
+        if self._rate_limit_info is None or now >= self._rate_limit_expiry:
+            results = await self._get(RATE_LIMIT_PATH, {'resources': 'search'}, rate_limited=False)
+            self._rate_limit_info = results['resources']['search']['/search/tweets']
+            self._rate_limit_expiry = now + self.rate_limit_ttl
+            self.limiter.update(self._rate_limit_info['remaining'], self._rate_limit_info['reset'])
+        return self._rate_limit_info
+
+    # Yield pages of up to SEARCH_PAGE_SIZE tweet dicts, newest first, until sample_size tweets are found
+    async def search_pages(self, query, sample_size):
+        params = {'q': query, 'tweet_mode': 'extended', 'result_type': 'recent'}
+        found = 0
+        while found < sample_size:
+            params['count'] = min(SEARCH_PAGE_SIZE, sample_size - found)
+            results = await self._get(SEARCH_PATH, params)
+            statuses = results.get('statuses', [])[:sample_size - found]
+            if not statuses:
+                return
+            found += len(statuses)
+            yield statuses
+            next_results = results.get('search_metadata', {}).get('next_results')
+            if not next_results:
+                return
+            params = dict(parse_qsl(next_results.lstrip('?')), tweet_mode='extended')
+
+    async def search(self, query, sample_size):
+        return [tweet async for page in self.search_pages(query, sample_size) for tweet in page]
+
+    # Run several searches at once, returning each query's tweets
+    async def search_many(self, queries, sample_size):
+        results = await asyncio.gather(*[self.search(query, sample_size) for query in queries])
+        return dict(zip(queries, results))
+
+
+class ClientThread:
+    """Keeps an AsyncTwitterClient open on an event loop in its own thread, for callers without a running loop"""
+
+    # The session, bearer token and rate limiter then last as long as this object, rather than one call
+    def __init__(self, client):
+        self.client = client
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+        self.run(client.__aenter__())
+
+    # Run a coroutine on the client's loop, blocking until it is done
+    def run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def rate_limit_status(self):
+        return self.run(self.client.rate_limit_status())
+
+    def search_many(self, queries, sample_size):
+        return self.run(self.client.search_many(queries, sample_size))
+
+    def close(self):
+        self.run(self.client.__aexit__(None, None, None))
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
@@ -0,0 +1,201 @@
+import argparse
+import gzip
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+
+try:
+    from .sentiment_scorer import SentimentScorer
+    from .transformer_pipeline import TIME_RESOLUTIONS, TransformerPipeline
+    from .tweet_aggregates import TweetAggregates
+    from .tweet_store import TweetStore
+    from .tweet_stream import TweetStream
+except ImportError:
+    from sentiment_scorer import SentimentScorer
+    from transformer_pipeline import TIME_RESOLUTIONS, TransformerPipeline
+    from tweet_aggregates import TweetAggregates
+    from tweet_store import TweetStore
+    from tweet_stream import TweetStream
+
+# Scored tweet columns written out, hashtags are flattened to space separated text
+OUTPUT_COLS = ['id', 'created_at', 'user.id', 'user.screen_name', 'full_text', 'hashtags', 'retweet_count',
+               'favorite_count', 'sentiment_score', 'sentiment_text']
+OUTPUT_FORMATS = ['csv', 'parquet']
+# Chunks with fewer distinct texts are scored in this process, the pool stays open between chunks so larger ones
+# only pay for sending their texts to the workers
+MIN_PARALLEL_SIZE = 1000
+
+
+def _open_text(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+# Tweets held in one parsed JSON value: a tweet, a list of tweets or a {"_json": [...]} response
+def _record_tweets(record):
+    if isinstance(record, list):
+        return record
+    if isinstance(record, dict) and '_json' in record:
+        return record['_json']
+    return [record]
+
+
+def _read_records(path):
+    with _open_text(path) as file:
+        first_line = file.readline()
+        try:
+            first_record = json.loads(first_line)
+        except ValueError:
+            # Not JSON lines, the whole file is a single JSON document
+            file.seek(0)
+            yield json.load(file)
+            return
+        yield first_record
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+# Read tweets from a JSON or JSON lines archive, holding at most chunk_size tweets at a time
+def read_tweet_chunks(paths, chunk_size):
+    chunk = []
+    for path in paths:
+        for record in _read_records(path):
+            for tweet in _record_tweets(record):
+                chunk.append(tweet)
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self.path = path
+        self._header = True
+
+    def write(self, dataframe):
+        dataframe.to_csv(self.path, mode='w' if self._header else 'a', header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        pass
+
+
+class _ParquetWriter:
+    def __init__(self, path):
+        # Parquet output is optional, pyarrow is only needed when it is asked for
+        import pyarrow
+        import pyarrow.parquet
+        self._pyarrow = pyarrow
+        self.path = path
+        self._writer = None
+
+    def write(self, dataframe):
+        table = self._pyarrow.Table.from_pandas(dataframe, preserve_index=False)
+        if self._writer is None:
+            self._writer = self._pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _open_writer(path, output_format):
+    return _ParquetWriter(path) if output_format == 'parquet' else _CsvWriter(path)
+
+
+def _write_table(dataframe, path, output_format):
+    writer = _open_writer(path, output_format)
+    writer.write(dataframe)
+    writer.close()
+
+
+def _add_counts(total, counts):
+    return counts if total is None else total.add(counts, fill_value=0)
+
+
+# Counts summed over every chunk, from most to least with ties in alphabetical order as TweetStore orders them
+def _sort_counts(counts, name):
+    if counts is None:
+        return pd.Series([], dtype='int64', name=name)
+    counts = counts.sort_index(kind='mergesort').astype('int64').rename(name)
+    return counts.sort_values(ascending=False, kind='mergesort')
+
+
+def _gen_output_dataframe(dataframe):
+    dataframe = dataframe.assign(hashtags=dataframe['entities.hashtags'].map(
+        lambda entities: ' '.join(entity['text'] for entity in entities)))
+    return dataframe[OUTPUT_COLS]
+
+
+# Score every tweet in the input archives, writing scored tweets and aggregate tables to output_dir
+def run_batch(input_paths, output_dir, output_format='csv', chunk_size=10000, workers=None, resolution='minute'):
+    os.makedirs(output_dir, exist_ok=True)
+    transformer = TransformerPipeline()
+    aggregates = TweetAggregates()
+    extension = '.' + output_format
+    tweet_writer = _open_writer(os.path.join(output_dir, 'tweets' + extension), output_format)
+    hashtag_counts = user_counts = None
+    start = time.perf_counter()
+    with SentimentScorer(workers=workers, min_parallel_size=MIN_PARALLEL_SIZE) as scorer:
+        stream = TweetStream(transformer, scorer, aggregates)
+        try:
+            for chunk_df in stream.process_pages(read_tweet_chunks(input_paths, chunk_size)):
+                tweet_writer.write(_gen_output_dataframe(chunk_df))
+                # Hashtags and users are counted on each chunk's compact store, only their totals are kept
+                store = TweetStore.from_dataframe(chunk_df)
+                hashtag_counts = _add_counts(hashtag_counts,
+                                             store.gen_hashtag_counts_dataframe().set_index('Hashtag')['Count'])
+                user_counts = _add_counts(user_counts, store.gen_user_counts_series())
+                elapsed = time.perf_counter() - start
+                logging.info('Scored {} tweets, {:.0f} tweets/s'.format(aggregates.tweets, aggregates.tweets / elapsed))
+        finally:
+            tweet_writer.close()
+    elapsed = time.perf_counter() - start
+
+    _write_table(aggregates.gen_tweets_by_time_dataframe(resolution, fill_empty=True),
+                 os.path.join(output_dir, 'tweets_by_time' + extension), output_format)
+    hashtag_counts = _sort_counts(hashtag_counts, 'Count')
+    _write_table(pd.DataFrame({'Hashtag': hashtag_counts.index.astype('object'), 'Count': hashtag_counts.values}),
+                 os.path.join(output_dir, 'hashtag_counts' + extension), output_format)
+    user_counts = _sort_counts(user_counts, 'Tweets')
+    _write_table(pd.DataFrame({'User': user_counts.index, 'Tweets': user_counts.values}),
+                 os.path.join(output_dir, 'user_counts' + extension), output_format)
+    summary = pd.DataFrame({
+        'Tweets': [aggregates.tweets],
+        'Average Sentiment Score': [aggregates.mean_sentiment],
+        'Average Sentiment': [transformer.map_sentiment_label(aggregates.mean_sentiment)],
+        'Most Common Sentiment': [aggregates.most_common_sentiment],
+        'Seconds': [elapsed],
+        'Tweets Per Second': [aggregates.tweets / elapsed if elapsed else 0.0],
+    })
+    _write_table(summary, os.path.join(output_dir, 'summary' + extension), output_format)
+    return summary
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Score the sentiment of archived tweets without the dashboard.')
+    parser.add_argument('inputs', nargs='+', help='JSON or JSON lines tweet archives, optionally gzipped')
+    parser.add_argument('-o', '--output-dir', default='output', help='directory results are written to')
+    parser.add_argument('-f', '--format', default='csv', choices=OUTPUT_FORMATS, help='output file format')
+    parser.add_argument('-c', '--chunk-size', type=int, default=10000, help='tweets read and scored at a time')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='scoring processes, defaults to all cores')
+    parser.add_argument('-r', '--resolution', default='minute', choices=list(TIME_RESOLUTIONS),
+                        help='bucket size of the tweets by time table')
+    args = parser.parse_args(args)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    summary = run_batch(args.inputs, args.output_dir, args.format, args.chunk_size, args.workers, args.resolution)
+    logging.info('Scored {} tweets in {:.1f}s ({:.0f} tweets/s)'.format(
+        summary['Tweets'][0], summary['Seconds'][0], summary['Tweets Per Second'][0]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+
+class HashtagIndex:
+    """Counts, top-k lookups, co-occurrence and sentiment for the lowercased hashtags of a set of tweets"""
+
+    def __init__(self, hashtags, scores=None):
+        self.tags, codes = hashtags.lower_codes()
+        self._tag_codes = {tag: code for code, tag in enumerate(self.tags)}
+        num_tags = len(self.tags)
+        # Pairs of codes are packed into one int64 key as first * stride + second
+        self._stride = max(num_tags, 1)
+        tweets = np.repeat(np.arange(len(hashtags)), np.diff(hashtags.offsets))
+        # Every use of a hashtag counts, as in TransformerPipeline.gen_hashtag_counts_dataframe
+        self.counts = np.bincount(codes, minlength=num_tags)
+        # Each (tweet, hashtag) pair once, ordered by tweet, for per-tweet statistics
+        pairs = np.unique(tweets * self._stride + codes)
+        pair_tweets, pair_codes = pairs // self._stride, pairs % self._stride
+        self.tweet_counts = np.bincount(pair_codes, minlength=num_tags)
+        self._build_cooccurrence(pair_tweets, pair_codes, num_tags)
+        self.sentiment_sums = None
+        if scores is not None:
+            self.sentiment_sums = np.bincount(pair_codes, weights=np.asarray(scores, dtype='float64')[pair_tweets],
+                                              minlength=num_tags)
+
+    # Build a CSR matrix of how many tweets each pair of distinct hashtags share
+    def _build_cooccurrence(self, pair_tweets, pair_codes, num_tags):
+        starts = np.flatnonzero(np.diff(pair_tweets, prepend=-1))
+        sizes = np.diff(np.r_[starts, len(pair_tweets)])
+        # Pair every hashtag of a tweet with every hashtag of the same tweet
+        group_sizes = np.repeat(sizes, sizes)
+        group_starts = np.repeat(starts, sizes)
+        left = np.repeat(np.arange(len(pair_codes)), group_sizes)
+        right = np.repeat(group_starts, group_sizes) + \
+            np.arange(len(left)) - np.repeat(np.cumsum(group_sizes) - group_sizes, group_sizes)
+        keep = left != right
+        keys, values = np.unique(pair_codes[left[keep]] * self._stride + pair_codes[right[keep]], return_counts=True)
+        self.cooccurrence_indptr = np.r_[0, np.cumsum(np.bincount(keys // self._stride, minlength=num_tags))]
+        self.cooccurrence_indices = keys % self._stride
+        self.cooccurrence_counts = values
+
+    @classmethod
+    def from_store(cls, store):
+        return cls(store.hashtags, store.frame['sentiment_score'].to_numpy())
+
+    def __len__(self):
+        return len(self.tags)
+
+    def __contains__(self, tag):
+        return tag.lower().lstrip('#') in self._tag_codes
+
+    def _top(self, counts, k):
+        if k < len(counts):
+            candidates = np.argpartition(-counts, k - 1)[:k]
+        else:
+            candidates = np.arange(len(counts))
+        # Tags are sorted, so ties fall back to alphabetical order
+        return candidates[np.lexsort((candidates, -counts[candidates]))]
+
+    # Df with shape: Hashtag    Count
+    #                avatar     54
+    #                nfl        32
+    def top_dataframe(self, k=5):
+        top = self._top(self.counts, k)
+        return pd.DataFrame({'Hashtag': self.tags[top].astype('object'), 'Count': self.counts[top].astype('int64')})
+
+    # Hashtags sharing the most tweets with tag
+    # Df with shape: Hashtag    Tweets
+    #                avatar2    12
+    def related_dataframe(self, tag, k=5):
+        code = self._tag_codes.get(tag.lower().lstrip('#'))
+        if code is None:
+            return pd.DataFrame({'Hashtag': pd.Series(dtype='object'), 'Tweets': pd.Series(dtype='int64')})
+        start, end = self.cooccurrence_indptr[code], self.cooccurrence_indptr[code + 1]
+        indices = self.cooccurrence_indices[start:end]
+        counts = self.cooccurrence_counts[start:end]
+        top = self._top(counts, k)
+        return pd.DataFrame({'Hashtag': self.tags[indices[top]].astype('object'),
+                             'Tweets': counts[top].astype('int64')})
+
+    # Mean sentiment score of the tweets using each of the top k hashtags
+    # Df with shape: Hashtag    Tweets    Sentiment Score
+    #                avatar     54        0.2342
+    def sentiment_dataframe(self, k=5):
+        top = self._top(self.counts, k)
+        return pd.DataFrame({'Hashtag': self.tags[top].astype('object'),
+                             'Tweets': self.tweet_counts[top].astype('int64'),
+                             'Sentiment Score': self.sentiment_sums[top] / self.tweet_counts[top]})
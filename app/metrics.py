@@ -0,0 +1,234 @@
+import bisect
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_PROMETHEUS_PREFIX = 'trending_sentiments_stage'
+
+
+class StageMetrics:
+    """Latency histogram, row count and peak memory of every run of one stage"""
+
+    __slots__ = ('count', 'seconds', 'max_seconds', 'bucket_counts', 'rows', 'peak_bytes')
+
+    def __init__(self, num_buckets):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        # One count per bucket plus one for runs slower than the last bound
+        self.bucket_counts = [0] * (num_buckets + 1)
+        self.rows = None
+        self.peak_bytes = None
+
+
+class _Stage:
+    """Times one run of a stage, tracking its peak traced memory when memory tracing is on"""
+
+    __slots__ = ('metrics', 'name', 'rows', '_start', '_memory')
+
+    def __init__(self, metrics, name, rows):
+        self.metrics = metrics
+        self.name = name
+        # Set by the caller once the number of rows handled is known
+        self.rows = rows
+
+    def __enter__(self):
+        self._memory = self.metrics._enter_memory() if tracemalloc.is_tracing() else None
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self._start
+        peak_bytes = self.metrics._exit_memory(self._memory) if self._memory is not None else None
+        self.metrics.record(self.name, seconds, self.rows, peak_bytes)
+
+
+class _NullStage:
+    """Stands in for a stage while metrics are off, so instrumented code runs unchanged at almost no cost"""
+
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Metrics:
+    """Per-stage latency histograms, row counts and peak memory, off until enable is called"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.enabled = False
+        self.buckets = buckets
+        self._stages = {}
+        self._tracing = False
+        self._lock = threading.Lock()
+        # Peak memory of every open stage across all threads. tracemalloc's peak is process wide, so whichever stage
+        # resets it first folds it into all of them, and stages running at once count each other's allocations.
+        self._frames = []
+        self._memory_lock = threading.Lock()
+
+    # Tracing memory slows every allocation down, so it is only turned on when asked for
+    def enable(self, trace_memory=False):
+        self.enabled = True
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+
+    def disable(self):
+        self.enabled = False
+        # Leave tracing started by anything else alone
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+
+    def stage(self, name, rows=None):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, rows)
+
+    # Decorator timing every call as stage name, the qualified name of the function by default
+    def timed(self, name=None):
+        def decorator(func):
+            stage_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.stage(stage_name) as stage:
+                    result = func(*args, **kwargs)
+                    # Frames, series and arrays report their rows, other results are not counted
+                    shape = getattr(result, 'shape', None)
+                    stage.rows = shape[0] if shape else None
+                return result
+            return wrapper
+        return decorator
+
+    def _enter_memory(self):
+        with self._memory_lock:
+            current, peak = tracemalloc.get_traced_memory()
+            # Resetting the peak below would lose the open stages' peaks so far, in this thread or any other
+            for frame in self._frames:
+                frame[1] = max(frame[1], peak)
+            tracemalloc.reset_peak()
+            frame = [current, 0]
+            self._frames.append(frame)
+            return frame
+
+    def _exit_memory(self, frame):
+        with self._memory_lock:
+            self._frames.remove(frame)
+            return max(tracemalloc.get_traced_memory()[1], frame[1]) - frame[0]
+
+    def record(self, name, seconds, rows=None, peak_bytes=None):
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = StageMetrics(len(self.buckets))
+            stage.count += 1
+            stage.seconds += seconds
+            stage.max_seconds = max(stage.max_seconds, seconds)
+            stage.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            if rows is not None:
+                stage.rows = (stage.rows or 0) + rows
+            if peak_bytes is not None:
+                stage.peak_bytes = max(stage.peak_bytes or 0, peak_bytes)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: {
+                'count': stage.count,
+                'seconds': stage.seconds,
+                'max_seconds': stage.max_seconds,
+                'buckets': dict(zip([str(bound) for bound in self.buckets] + ['+Inf'], stage.bucket_counts)),
+                'rows': stage.rows,
+                'peak_bytes': stage.peak_bytes,
+            } for name, stage in self._stages.items()}
+
+    # Df with shape: Stage                 Calls    Total (s)    Mean (ms)    Max (ms)    Rows    Peak (MiB)
+    #                TweetStream.fetch     10       2.31         231.0        402.5       1000    1.2
+    def gen_summary_dataframe(self):
+        snapshot = self.snapshot()
+        return pd.DataFrame({
+            'Stage': list(snapshot),
+            'Calls': [stage['count'] for stage in snapshot.values()],
+            'Total (s)': [stage['seconds'] for stage in snapshot.values()],
+            'Mean (ms)': [1000 * stage['seconds'] / stage['count'] for stage in snapshot.values()],
+            'Max (ms)': [1000 * stage['max_seconds'] for stage in snapshot.values()],
+            'Rows': [stage['rows'] for stage in snapshot.values()],
+            'Peak (MiB)': [None if stage['peak_bytes'] is None else stage['peak_bytes'] / 2 ** 20
+                           for stage in snapshot.values()],
+        }, columns=['Stage', 'Calls', 'Total (s)', 'Mean (ms)', 'Max (ms)', 'Rows', 'Peak (MiB)'])
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    # Metrics in the Prometheus text exposition format
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        lines = ['# HELP {}_seconds Time spent in each stage'.format(_PROMETHEUS_PREFIX),
+                 '# TYPE {}_seconds histogram'.format(_PROMETHEUS_PREFIX)]
+        for name, stage in snapshot.items():
+            cumulative = 0
+            for bound, count in stage['buckets'].items():
+                cumulative += count
+                lines.append('{}_seconds_bucket{{stage="{}",le="{}"}} {}'.format(
+                    _PROMETHEUS_PREFIX, name, bound, cumulative))
+            lines.append('{}_seconds_sum{{stage="{}"}} {}'.format(_PROMETHEUS_PREFIX, name, stage['seconds']))
+            lines.append('{}_seconds_count{{stage="{}"}} {}'.format(_PROMETHEUS_PREFIX, name, stage['count']))
+        lines += ['# HELP {}_rows_total Rows handled by each stage'.format(_PROMETHEUS_PREFIX),
+                  '# TYPE {}_rows_total counter'.format(_PROMETHEUS_PREFIX)]
+        lines += ['{}_rows_total{{stage="{}"}} {}'.format(_PROMETHEUS_PREFIX, name, stage['rows'])
+                  for name, stage in snapshot.items() if stage['rows'] is not None]
+        lines += ['# HELP {}_peak_bytes Most traced memory allocated during a run of each stage'.format(
+                      _PROMETHEUS_PREFIX),
+                  '# TYPE {}_peak_bytes gauge'.format(_PROMETHEUS_PREFIX)]
+        lines += ['{}_peak_bytes{{stage="{}"}} {}'.format(_PROMETHEUS_PREFIX, name, stage['peak_bytes'])
+                  for name, stage in snapshot.items() if stage['peak_bytes'] is not None]
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(self.to_prometheus() if path.endswith('.prom') else self.to_json())
+
+
+# Serve metrics.to_prometheus() on a background thread for Prometheus to scrape
+def serve_metrics(metrics, port, host='0.0.0.0'):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = metrics.to_prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Shared by the instrumented modules, the app turns it on
+metrics = Metrics()
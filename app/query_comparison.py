@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from .tweet_store import TweetStore
+    from .tweet_stream import TweetStream
+except ImportError:
+    from tweet_store import TweetStore
+    from tweet_stream import TweetStream
+
+
+# Comma separated search terms, without blanks or repeats, in the order they were typed
+def split_queries(user_input):
+    queries = [query.strip() for query in user_input.split(',')]
+    return list(dict.fromkeys(query for query in queries if query))
+
+
+class QueryComparison:
+    """Scored tweets for several searches, where a tweet found by more than one query is converted and scored once"""
+
+    # Query -> positions in store of the tweets it found, in search order
+    def __init__(self, store, rows):
+        self.store = store
+        self.rows = rows
+
+    # Build from the tweet dicts each query found, as returned by AsyncTwitterClient.search_many
+    # Tweets already in history keep their stored scores
+    @classmethod
+    def from_results(cls, transformer, scorer, results, history=None):
+        positions = {}
+        tweets = []
+        rows = {}
+        for query, query_tweets in results.items():
+            query_rows = []
+            for tweet in query_tweets:
+                position = positions.setdefault(tweet['id'], len(positions))
+                if position == len(tweets):
+                    tweets.append(tweet)
+                query_rows.append(position)
+            rows[query] = pd.unique(np.array(query_rows, dtype='int64'))
+        stream = TweetStream(transformer, scorer, history=history)
+        dataframe = next(stream.process_pages([tweets]), None)
+        if dataframe is None:
+            return None
+        return cls(TweetStore.from_dataframe(dataframe), rows)
+
+    @property
+    def queries(self):
+        return list(self.rows)
+
+    def __len__(self):
+        return len(self.store)
+
+    # Scored tweets found by query
+    def frame(self, query):
+        return self.store.frame.iloc[self.rows[query]]
+
+    # Per unique tweet, how many of the queries found it
+    def _query_counts(self):
+        return np.bincount(np.concatenate(list(self.rows.values())), minlength=len(self.store))
+
+    @property
+    def shared_tweets(self):
+        return int(np.count_nonzero(self._query_counts() > 1))
+
+    # Df with shape: Query      Tweets    Shared Tweets    Sentiment Score    Most Common Sentiment
+    #                #Avatar    100       12               0.2342             Positive
+    def gen_summary_dataframe(self):
+        shared = self._query_counts() > 1
+        summaries = []
+        for query, rows in self.rows.items():
+            scores = self.store.frame['sentiment_score'].to_numpy()[rows]
+            labels = self.store.frame['sentiment_text'].iloc[rows]
+            summaries.append({
+                'Query': query,
+                'Tweets': len(rows),
+                'Shared Tweets': int(np.count_nonzero(shared[rows])),
+                'Sentiment Score': float(scores.mean()) if len(rows) else 0.0,
+                'Most Common Sentiment': labels.value_counts().idxmax() if len(rows) else None,
+            })
+        return pd.DataFrame(summaries, columns=['Query', 'Tweets', 'Shared Tweets', 'Sentiment Score',
+                                                'Most Common Sentiment'])
@@ -0,0 +1,48 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class SearchCache:
+    """Keeps recent search results in memory, bounded by age, entry count and total size"""
+
+    def __init__(self, ttl=600, max_entries=32, max_bytes=512 * 2 ** 20, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.total_bytes = 0
+        # Key -> (expiry time, size in bytes, value), ordered from least to most recently used
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _pop(self, key):
+        expiry, size, value = self._entries.pop(key)
+        self.total_bytes -= size
+        return value
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self.clock():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    # Store a value taking up size bytes, evicting the least recently used entries to stay within bounds
+    def put(self, key, value, size=0):
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (self.clock() + self.ttl, size, value)
+            self.total_bytes += size
+            while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
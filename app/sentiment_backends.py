@@ -0,0 +1,245 @@
+import functools
+import string
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+import vaderSentiment.vaderSentiment as vader
+
+try:
+    from .vader_lexicon import get_analyzer
+except ImportError:
+    from vader_lexicon import get_analyzer
+
+SCORE_COLUMNS = ['neg', 'neu', 'pos', 'compound']
+
+_NEGATE = frozenset(vader.NEGATE)
+# VADER's multi-word idioms, special cases replace the valence of the lexicon word they contain or follow, booster
+# phrases ("kind of") add to it
+_IDIOMS = {tuple(phrase.split()): value for phrase, value in vader.SPECIAL_CASES.items() if ' ' in phrase}
+_BOOSTER_PHRASES = {tuple(phrase.split()): value for phrase, value in vader.BOOSTER_DICT.items() if ' ' in phrase}
+# Words VADER's rules look for around a lexicon word, numbered so whole batches can be compared at once
+_RULE_WORDS = ['no', 'but', 'least', 'kind', 'of', 'or', 'nor', 'at', 'very', 'never', 'so', 'this', 'without',
+               'doubt']
+_RULE_WORDS += sorted({word for phrase in chain(_IDIOMS, _BOOSTER_PHRASES) for word in phrase} - set(_RULE_WORDS))
+_NO, _BUT, _LEAST, _KIND, _OF, _OR, _NOR, _AT, _VERY, _NEVER, _SO, _THIS, _WITHOUT, _DOUBT = range(1, 15)
+
+
+class VaderBackend:
+    """Scores texts one at a time with VADER's own analyzer, the reference the other backends are measured against"""
+
+    name = 'vader'
+
+    def __init__(self):
+        self.analyzer = get_analyzer()
+
+    # Array of shape (len(texts), 4), one row of SCORE_COLUMNS per text
+    def score(self, texts):
+        scores = np.empty((len(texts), len(SCORE_COLUMNS)), dtype=np.float32)
+        for i, text in enumerate(texts):
+            polarity = self.analyzer.polarity_scores(text)
+            scores[i] = [polarity[col] for col in SCORE_COLUMNS]
+        return scores
+
+
+# VADER's _strip_punc_if_word, short tokens are likely emoticons and kept whole
+def _strip_punctuation(token):
+    stripped = token.strip(string.punctuation)
+    return token if len(stripped) <= 2 else stripped
+
+
+# Values of the token k places before each token (after it for negative k), positions without one hold fill
+def _shift(values, k, fill):
+    if not k:
+        return values
+    shifted = np.full_like(values, fill)
+    if k > 0:
+        shifted[k:] = values[:-k]
+    else:
+        shifted[:k] = values[-k:]
+    return shifted
+
+
+# Texts where VADER's _but_check rescales a different word than the one at hand: it finds each word by its score, so
+# a word scoring what an earlier word scores once rescaled has that earlier word rescaled again instead
+def _but_collisions(doc, pos, sentiment, scale, has_but):
+    scored = has_but & (sentiment != 0)
+    words = pd.DataFrame({'doc': doc[scored], 'pos': pos[scored], 'sentiment': sentiment[scored],
+                          'scaled': (sentiment * scale)[scored]})
+    pairs = words.merge(words, on='doc', suffixes=('_earlier', ''))
+    collides = ((pairs['pos_earlier'] < pairs['pos']) &
+                np.isclose(pairs['scaled_earlier'], pairs['sentiment'], rtol=0.0, atol=1e-9))
+    return np.unique(pairs.loc[collides, 'doc'].to_numpy())
+
+
+class LexiconBackend:
+    """Scores whole batches of texts with NumPy, applying VADER's lexicon and rules to every token at once"""
+
+    # Only the distinct tokens of a batch are looked up in the lexicon, the rules then run as array operations over
+    # every token, so the Python work per text is just splitting it. Scores match VADER's: the few texts where VADER's
+    # "but" rule rescales a word by its score rather than its position are found up front and scored by VADER itself.
+
+    name = 'lexicon'
+
+    def __init__(self):
+        analyzer = get_analyzer()
+        self.lexicon = analyzer.lexicon
+        # VADER swaps single character emojis for their descriptions before splitting the text into words
+        self._emoji_table = str.maketrans({emoji: ' ' + description
+                                           for emoji, description in analyzer.emojis.items() if len(emoji) == 1})
+        self._rule_words = {word: i for i, word in enumerate(_RULE_WORDS, 1)}
+        self._idioms = [(self._phrase_ids(phrase), value) for phrase, value in _IDIOMS.items()]
+        self._booster_phrases = [(self._phrase_ids(phrase), value) for phrase, value in _BOOSTER_PHRASES.items()]
+        self._vader = VaderBackend()
+
+    def _phrase_ids(self, phrase):
+        return tuple(self._rule_words[word] for word in phrase)
+
+    # Lexicon lookups for each distinct token: valence, in lexicon, booster, upper case, negation and rule word
+    def _token_features(self, tokens):
+        words = [_strip_punctuation(token) for token in tokens]
+        lower = [word.lower() for word in words]
+        valence = np.array([self.lexicon.get(word, 0.0) for word in lower], dtype=np.float64)
+        in_lexicon = np.array([word in self.lexicon for word in lower], dtype=bool)
+        is_booster = np.array([word in vader.BOOSTER_DICT for word in lower], dtype=bool)
+        booster = np.array([vader.BOOSTER_DICT.get(word, 0.0) for word in lower], dtype=np.float64)
+        is_upper = np.array([word.isupper() for word in words], dtype=bool)
+        negated = np.array([word in _NEGATE or "n't" in word for word in lower], dtype=bool)
+        rule_word = np.array([self._rule_words.get(word, 0) for word in lower], dtype=np.int8)
+        return valence, in_lexicon, is_booster, booster, is_upper, negated, rule_word
+
+    # _special_idioms_check: the first idiom ending on or just before the word sets its valence, unless an idiom
+    # starting at the word does, then booster phrases just before it are added
+    def _idioms_check(self, score, applies, phrase_ends):
+        ends = [(phrase_ends(phrase), len(phrase), value) for phrase, value in self._idioms]
+        idiom = np.full(len(score), np.nan)
+        # Ending offset and length of the phrases VADER looks for, in the order it checks them
+        for end, length in ((0, 2), (0, 3), (1, 2), (1, 3), (2, 2)):
+            for phrase_end, phrase_length, value in ends:
+                if phrase_length == length:
+                    idiom = np.where(np.isnan(idiom) & _shift(phrase_end, end, False), value, idiom)
+        for end, length in ((-1, 2), (-2, 3)):
+            for phrase_end, phrase_length, value in ends:
+                if phrase_length == length:
+                    idiom = np.where(_shift(phrase_end, end, False), value, idiom)
+        score = np.where(applies & ~np.isnan(idiom), idiom, score)
+        for end, length in ((1, 3), (2, 2), (1, 2)):
+            for phrase, value in self._booster_phrases:
+                if len(phrase) == length:
+                    score = np.where(applies & _shift(phrase_ends(phrase), end, False), score + value, score)
+        return score
+
+    # Array of shape (len(texts), 4), one row of SCORE_COLUMNS per text
+    def score(self, texts):
+        scores = np.zeros((len(texts), len(SCORE_COLUMNS)), dtype=np.float32)
+        # Emojis are never ASCII, so most tweets skip the translation
+        tokens = [(text if text.isascii() else text.translate(self._emoji_table)).split() for text in texts]
+        lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+        if not lengths.sum():
+            return scores
+        codes, uniques = pd.factorize(np.array(list(chain.from_iterable(tokens)), dtype=object))
+        valence, in_lexicon, is_booster, booster, is_upper, negated, rule_word = (
+            feature[codes] for feature in self._token_features(uniques))
+
+        # Text and position within it of every token
+        num_texts = len(texts)
+        doc = np.repeat(np.arange(num_texts), lengths)
+        pos = np.arange(len(doc)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        has_next = pos + 1 < lengths[doc]
+        # Upper case words only add emphasis when some, but not all, words of the text are upper case
+        num_upper = np.bincount(doc, weights=is_upper, minlength=num_texts)
+        cap_diff = ((num_upper > 0) & (num_upper < lengths))[doc]
+
+        prev_word = [None] + [_shift(rule_word, k, 0) for k in (1, 2, 3)]
+        next_word = np.where(has_next, _shift(rule_word, -1, 0), 0)
+        next_in_lexicon = has_next & _shift(in_lexicon, -1, False)
+
+        # Where each multi-word phrase ends, the words of a phrase must all be in the same text
+        def phrase_ends(phrase):
+            ends = pos >= len(phrase) - 1
+            for k, word in enumerate(reversed(phrase)):
+                ends &= _shift(rule_word, k, 0) == word
+            return ends
+
+        # sentiment_valence, all lexicon words at once
+        score = valence.copy()
+        score[(rule_word == _NO) & next_in_lexicon] = 0.0
+        after_no = (((pos >= 1) & (prev_word[1] == _NO)) | ((pos >= 2) & (prev_word[2] == _NO)) |
+                    ((pos >= 3) & (prev_word[3] == _NO) & np.isin(prev_word[1], (_OR, _NOR))))
+        score[after_no] = valence[after_no] * vader.N_SCALAR
+        caps = is_upper & cap_diff
+        score[caps] += np.where(score[caps] > 0, vader.C_INCR, -vader.C_INCR)
+        for k, dampen in ((1, 1.0), (2, 0.95), (3, 0.9)):
+            # Boosters among the three preceding words that are not lexicon words themselves
+            applies = (pos >= k) & ~_shift(in_lexicon, k, True)
+            scalar = np.where(score < 0, -1, 1) * _shift(booster, k, 0.0)
+            boosted_caps = _shift(is_booster, k, False) & _shift(is_upper, k, False) & cap_diff
+            scalar += np.where(boosted_caps, np.where(score > 0, vader.C_INCR, -vader.C_INCR), 0.0)
+            score = np.where(applies, score + scalar * dampen, score)
+            # _negation_check
+            preceding_negation = _shift(negated, k, False)
+            if k == 1:
+                score = np.where(applies & preceding_negation, score * vader.N_SCALAR, score)
+            elif k == 2:
+                never_so = (prev_word[2] == _NEVER) & np.isin(prev_word[1], (_SO, _THIS))
+                without_doubt = (prev_word[2] == _WITHOUT) & (prev_word[1] == _DOUBT)
+                score = np.where(applies & never_so, score * 1.25,
+                                 np.where(applies & ~without_doubt & preceding_negation, score * vader.N_SCALAR,
+                                          score))
+            else:
+                never_so = (((prev_word[3] == _NEVER) & np.isin(prev_word[2], (_SO, _THIS))) |
+                            np.isin(prev_word[1], (_SO, _THIS)))
+                without_doubt = (prev_word[3] == _WITHOUT) & ((prev_word[2] == _DOUBT) | (prev_word[1] == _DOUBT))
+                score = np.where(applies & never_so, score * 1.25,
+                                 np.where(applies & ~without_doubt & preceding_negation, score * vader.N_SCALAR,
+                                          score))
+                score = self._idioms_check(score, applies, phrase_ends)
+        # _least_check, "least" negates unless it follows "at" or "very"
+        least = (pos >= 1) & (prev_word[1] == _LEAST) & ~_shift(in_lexicon, 1, True)
+        least &= (pos == 1) | ~np.isin(prev_word[2], (_AT, _VERY))
+        score[least] *= vader.N_SCALAR
+        # Boosters and "kind of" carry no valence of their own
+        sentiment = np.where(in_lexicon & ~is_booster & ~((rule_word == _KIND) & (next_word == _OF)), score, 0.0)
+
+        # _but_check, words before the first "but" count half and the words after it one and a half times
+        is_but = rule_word == _BUT
+        first_but = np.full(num_texts, np.iinfo(np.int64).max)
+        np.minimum.at(first_but, doc[is_but], pos[is_but])
+        but_pos = first_but[doc]
+        has_but = but_pos < lengths[doc]
+        but_scale = np.where(pos < but_pos, np.where(has_but, 0.5, 1.0), np.where(pos > but_pos, 1.5, 1.0))
+        vader_texts = _but_collisions(doc, pos, sentiment, but_scale, has_but)
+        sentiment *= but_scale
+
+        # score_valence, emphasis from up to 4 exclamation marks and 2 or more question marks
+        exclamations = np.minimum(np.fromiter((text.count('!') for text in texts), np.int64, num_texts), 4)
+        questions = np.fromiter((text.count('?') for text in texts), np.int64, num_texts)
+        emphasis = exclamations * 0.292 + np.where(questions > 3, 0.96, np.where(questions > 1, questions * 0.18, 0))
+        total = np.bincount(doc, weights=sentiment, minlength=num_texts)
+        total = np.where(total > 0, total + emphasis, np.where(total < 0, total - emphasis, total))
+        compound = np.clip(total / np.sqrt(total * total + 15), -1.0, 1.0)
+        pos_sum = np.bincount(doc, weights=np.where(sentiment > 0, sentiment + 1, 0.0), minlength=num_texts)
+        neg_sum = np.bincount(doc, weights=np.where(sentiment < 0, sentiment - 1, 0.0), minlength=num_texts)
+        neu_count = np.bincount(doc, weights=sentiment == 0, minlength=num_texts)
+        pos_sum = np.where(pos_sum > -neg_sum, pos_sum + emphasis, pos_sum)
+        neg_sum = np.where(pos_sum < -neg_sum, neg_sum - emphasis, neg_sum)
+        # Texts without any words score 0 across the board
+        denominator = np.where(lengths > 0, pos_sum - neg_sum + neu_count, 1.0)
+        scores[:, 0] = np.round(np.abs(neg_sum) / denominator, 3)
+        scores[:, 1] = np.round(neu_count / denominator, 3)
+        scores[:, 2] = np.round(pos_sum / denominator, 3)
+        scores[:, 3] = np.round(compound, 4)
+        if len(vader_texts):
+            scores[vader_texts] = self._vader.score([texts[i] for i in vader_texts])
+        return scores
+
+
+BACKENDS = {backend.name: backend for backend in (VaderBackend, LexiconBackend)}
+
+
+# One backend of each kind per process, like the analyzer they are built from
+@functools.lru_cache(maxsize=None)
+def get_backend(name):
+    if name not in BACKENDS:
+        raise ValueError('Unknown sentiment backend: {}'.format(name))
+    return BACKENDS[name]()
@@ -0,0 +1,82 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    from .sqlite_batches import connect, select_in
+except ImportError:
+    from sqlite_batches import connect, select_in
+
+
+class SentimentCache:
+    """Caches sentiment scores keyed by a hash of the cleaned tweet text"""
+
+    # Scores live in an in-memory LRU tier capped at max_size entries. When a path is given they are also written
+    # to a SQLite database so they survive app restarts, disk hits are promoted back into memory.
+    def __init__(self, max_size=100000, path=None):
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        if path:
+            self._connection = connect(path)
+            self._connection.execute('CREATE TABLE IF NOT EXISTS sentiment_scores ('
+                                     'key BLOB PRIMARY KEY, neg REAL, neu REAL, pos REAL, compound REAL)')
+            self._connection.commit()
+
+    @staticmethod
+    def key(text):
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+    def __len__(self):
+        return len(self._memory)
+
+    def _remember(self, key, scores):
+        self._memory[key] = scores
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def _get_from_disk(self, keys):
+        rows = select_in(self._connection,
+                         'SELECT key, neg, neu, pos, compound FROM sentiment_scores WHERE key IN ({})', keys)
+        return {row[0]: row[1:] for row in rows}
+
+    # Look up scores for a list of keys, returns a dict holding only the keys found
+    def get_many(self, keys):
+        with self._lock:
+            found = {}
+            missing = []
+            for key in keys:
+                scores = self._memory.get(key)
+                if scores is None:
+                    missing.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[key] = scores
+            if missing and self._connection is not None:
+                for key, scores in self._get_from_disk(missing).items():
+                    self._remember(key, scores)
+                    found[key] = scores
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            return found
+
+    # Store rows of (neg, neu, pos, compound) scores for a list of keys
+    def put_many(self, keys, scores):
+        rows = [(key, *map(float, row)) for key, row in zip(keys, scores)]
+        with self._lock:
+            for row in rows:
+                self._remember(row[0], row[1:])
+            if self._connection is not None:
+                self._connection.executemany('INSERT OR REPLACE INTO sentiment_scores VALUES (?, ?, ?, ?, ?)', rows)
+                self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,107 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .metrics import metrics
+    from .sentiment_backends import BACKENDS, SCORE_COLUMNS, get_backend
+except ImportError:
+    from metrics import metrics
+    from sentiment_backends import BACKENDS, SCORE_COLUMNS, get_backend
+
+# Backend owned by each pool worker, built once when the worker starts
+_worker_backend = None
+
+
+def _init_worker(backend):
+    global _worker_backend
+    _worker_backend = get_backend(backend)
+
+
+def _score_chunk(texts):
+    return _worker_backend.score(texts)
+
+
+class SentimentScorer:
+    """Scores the sentiment of cleaned tweets with a sentiment backend, across a process pool for large inputs"""
+
+    # chunk_size is how many texts each pool task scores, by default the texts are split evenly across the workers
+    # backend names one of sentiment_backends.BACKENDS: 'vader' scores exactly as VADER does, 'lexicon' is several
+    # times faster with the same scores
+    def __init__(self, workers=None, chunk_size=None, min_parallel_size=10000, cache=None, backend='vader'):
+        if backend not in BACKENDS:
+            raise ValueError('Unknown sentiment backend: {}'.format(backend))
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.min_parallel_size = min_parallel_size
+        self.cache = cache
+        self.backend = backend
+        self._executor = None
+
+    def _get_backend(self):
+        # Loading the VADER lexicon is slow, only do it when scoring serially
+        return get_backend(self.backend)
+
+    # One chunk per worker keeps every worker busy, however many distinct texts are left after deduplication
+    def _split(self, texts):
+        chunk_size = self.chunk_size or max(math.ceil(len(texts) / self.workers), 1)
+        return [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+
+    def _score_parallel(self, texts):
+        chunks = self._split(texts)
+        # A scorer opened as a context manager keeps its pool, and the workers' analyzers, between calls
+        if self._executor is not None:
+            return np.concatenate(list(self._executor.map(_score_chunk, chunks)))
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks)), initializer=_init_worker,
+                                 initargs=(self.backend,)) as executor:
+            return np.concatenate(list(executor.map(_score_chunk, chunks)))
+
+    def __enter__(self):
+        if self.workers > 1 and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(self.backend,))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _score(self, texts):
+        if self.workers > 1 and len(texts) >= max(self.min_parallel_size, 1):
+            return self._score_parallel(texts)
+        return self._get_backend().score(texts)
+
+    def _score_cached(self, texts):
+        # Other backends' scores are kept apart, VADER's keep the plain text keys existing caches were built with
+        prefix = '' if self.backend == 'vader' else self.backend + '\0'
+        keys = [self.cache.key(prefix + text) for text in texts]
+        cached = self.cache.get_many(keys)
+        scores = np.empty((len(texts), len(SCORE_COLUMNS)), dtype=np.float32)
+        missing = []
+        for i, key in enumerate(keys):
+            if key in cached:
+                scores[i] = cached[key]
+            else:
+                missing.append(i)
+        if missing:
+            scores[missing] = self._score([texts[i] for i in missing])
+            self.cache.put_many([keys[i] for i in missing], scores[missing])
+        return scores
+
+    # Score a series of cleaned tweets
+    # Df with shape: neg    neu    pos    compound
+    #                0.0    0.7    0.3    0.4404
+    @metrics.timed()
+    def score_tweets(self, series):
+        # Re-tweets repeat the same text, so each distinct tweet is only scored once
+        codes, uniques = pd.factorize(series)
+        texts = list(uniques)
+        scores = self._score(texts) if self.cache is None else self._score_cached(texts)
+        return pd.DataFrame(scores[codes], index=series.index, columns=SCORE_COLUMNS)
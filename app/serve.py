@@ -0,0 +1,34 @@
+import logging
+import os
+import sys
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+
+# Import the dashboard's modules and build the sentiment backend in this process, before the server takes requests
+def warm():
+    start = time.perf_counter()
+    import altair
+    import pandas
+    import tweepy
+    import streamlit
+
+    import sentiment_scorer
+    import transformer_pipeline
+    from sentiment_backends import get_backend
+    get_backend(os.getenv('SENTIMENT_BACKEND', 'vader'))
+    logging.info('Warmed up in {:.2f}s'.format(time.perf_counter() - start))
+
+
+# Run the dashboard in this already warm process, the first session then skips the imports and lexicon loading
+# Arguments are passed on to streamlit run, e.g. python app/serve.py --server.port 8501
+def main():
+    warm()
+    from streamlit.web import cli
+    sys.argv = ['streamlit', 'run', APP_PATH] + sys.argv[1:]
+    sys.exit(cli.main())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,17 @@
+import sqlite3
+
+# SQLite builds before 3.32 cap a statement at 999 bound parameters
+SQLITE_BATCH_SIZE = 900
+
+
+# Streamlit runs each session in its own thread, callers serialize access to the connection with a lock
+def connect(path):
+    return sqlite3.connect(path, check_same_thread=False)
+
+
+# Rows of sql for every value, run a batch of values at a time. The {} in sql is replaced by the batch's
+# placeholders, params are bound ahead of them.
+def select_in(connection, sql, values, params=()):
+    for i in range(0, len(values), SQLITE_BATCH_SIZE):
+        batch = values[i:i + SQLITE_BATCH_SIZE]
+        yield from connection.execute(sql.format(','.join('?' * len(batch))), (*params, *batch))
@@ -1,43 +1,192 @@
+import bisect
 import re
 
 import numpy as np
 import pandas as pd
 
+try:
+    from .metrics import metrics
+except ImportError:
+    from metrics import metrics
+
+# JSON paths extracted from each tweet, keyed by the column name pd.json_normalize would give them
+_JSON_PATHS = {
+    'id': ('id',),
+    'created_at': ('created_at',),
+    'full_text': ('full_text',),
+    'retweeted_status.full_text': ('retweeted_status', 'full_text'),
+    'retweet_count': ('retweet_count',),
+    'favorite_count': ('favorite_count',),
+    'entities.hashtags': ('entities', 'hashtags'),
+    'user.id': ('user', 'id'),
+    'user.screen_name': ('user', 'screen_name'),
+}
+_CREATED_AT_FORMAT = '%a %b %d %H:%M:%S %z %Y'
+
+# Bucket sizes for tweet time series in nanoseconds, buckets are aligned to the UTC epoch
+TIME_RESOLUTIONS = {
+    'second': 10 ** 9,
+    'minute': 60 * 10 ** 9,
+    '5 minutes': 5 * 60 * 10 ** 9,
+    'hour': 60 * 60 * 10 ** 9,
+    'day': 24 * 60 * 60 * 10 ** 9,
+}
+
+SENTIMENT_LABELS = ['Negative', 'Neutral', 'Positive']
+SENTIMENT_DTYPE = pd.CategoricalDtype(SENTIMENT_LABELS)
+# Scores at or below the first threshold are Negative, at or above the second Positive
+SENTIMENT_THRESHOLDS = (-0.05, 0.05)
+
+# Interaction levels from least to most, ordered so batches of labels sort by level
+INTERACTION_LABELS = ['Very Low', 'Low', 'Medium', 'High', 'Very High']
+INTERACTION_DTYPE = pd.CategoricalDtype(INTERACTION_LABELS, ordered=True)
+# Time taken per 100 tweets in nanoseconds, ascending, a sample faster than a bound rates a level above it
+_INTERACTION_BOUNDS = [pd.Timedelta(bound).value for bound in ['2 hours', '4 hours', '12 hours', '1 days']]
+
+# Precompiled cleaning patterns shared by the per-tweet and batch cleaners
+_LINK_PATTERN = re.compile(r'https?://[A-Za-z0-9./]+')
+_MENTION_PATTERN = re.compile(r'(@[A-Za-z0-9_]+)')
+_HASHTAG_PATTERN = re.compile(r'(#[A-Za-z0-9_]+)')
+# Hashtags and mentions share no characters, so one pass removes both exactly as two passes would
+_TAG_PATTERN = re.compile(r'[#@][A-Za-z0-9_]+')
+
+
+# Sum counts at nanosecond epoch times into buckets of the given resolution
+# With fill_empty, every bucket between the first and last gets a row and empty ones count zero. Past max_buckets
+# rows only the buckets holding tweets are kept, so a long span at a fine resolution can't blow up the chart data.
+# Df with shape: Created                Tweets
+#                2000-01-01 12:34:00    2
+#                2000-01-01 12:35:00    3
+def gen_time_counts_dataframe(times, counts, resolution='minute', fill_empty=False, tz=None, max_buckets=None):
+    bucket_size = TIME_RESOLUTIONS[resolution]
+    buckets = np.asarray(times, dtype='int64') // bucket_size
+    counts = np.asarray(counts, dtype='int64')
+    if len(buckets) == 0:
+        starts, totals = buckets, counts
+    elif fill_empty and (max_buckets is None or buckets.max() - buckets.min() < max_buckets):
+        first_bucket = buckets.min()
+        totals = np.bincount(buckets - first_bucket, weights=counts).astype('int64')
+        starts = np.arange(first_bucket, first_bucket + len(totals), dtype='int64')
+    else:
+        starts, inverse = np.unique(buckets, return_inverse=True)
+        totals = np.bincount(inverse, weights=counts).astype('int64')
+    return pd.DataFrame({'Created': _bucket_times(starts, bucket_size, tz), 'Tweets': totals})
+
+
+# Positions in SENTIMENT_LABELS of the label of each score
+def _sentiment_codes(scores):
+    scores = np.asarray(scores)
+    return np.select([scores <= SENTIMENT_THRESHOLDS[0], scores >= SENTIMENT_THRESHOLDS[1]], [0, 2], 1)
+
+
+# Positions in INTERACTION_LABELS of the interaction level of each pair of time delta and sample size
+def _interaction_codes(time_deltas, sample_sizes):
+    deltas = pd.TimedeltaIndex(np.atleast_1d(time_deltas))
+    # Missing deltas compare as NaN, which sorts after every bound and so rates Very Low
+    nanos = np.where(deltas.isna(), np.nan, deltas.asi8)
+    # Consider time it takes for each 100 tweets to occur
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normalized_deltas = nanos / (np.asarray(sample_sizes, dtype='float64') / 100)
+    return len(_INTERACTION_BOUNDS) - np.searchsorted(_INTERACTION_BOUNDS, normalized_deltas, side='right')
+
+
+def _bucket_times(starts, bucket_size, tz=None):
+    created = pd.to_datetime(starts * bucket_size)
+    if tz is not None:
+        created = created.tz_localize('UTC').tz_convert(tz)
+    return created
+
+
+# Linearly interpolated q quantile of each run values[start:start + count] of sorted values
+def _sorted_quantiles(values, starts, counts, q):
+    positions = starts + q * (counts - 1)
+    lower = np.floor(positions).astype('int64')
+    upper = np.ceil(positions).astype('int64')
+    return values[lower] + (values[upper] - values[lower]) * (positions - lower)
+
+
+# Positions of at most max_points points of the series x, y (x ascending) picked by Largest-Triangle-Three-Buckets,
+# which keeps the peaks and troughs that give the series its visual shape
+def lttb_indices(x, y, max_points):
+    num_points = len(x)
+    if max_points >= num_points or max_points < 3:
+        return np.arange(num_points)
+    x = (np.asarray(x) - x[0]).astype('float64')
+    y = np.asarray(y, dtype='float64')
+    # The first and last points are always kept, the rest are split into max_points - 2 buckets
+    edges = np.linspace(1, num_points - 1, max_points - 1).astype('int64')
+    edges[-1] = num_points - 1
+    # Mean of every bucket, with the last point as the bucket after the final one
+    sums_x = np.add.reduceat(x[1:num_points - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:num_points - 1], edges[:-1] - 1)
+    sizes = np.diff(edges)
+    means_x = np.r_[sums_x / sizes, x[-1]]
+    means_y = np.r_[sums_y / sizes, y[-1]]
+    selected = np.empty(max_points, dtype='int64')
+    selected[0], selected[-1] = 0, num_points - 1
+    previous = 0
+    # Each pick depends on the one before, so buckets are walked in order with the area of each bucket vectorized
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        areas = np.abs((x[previous] - means_x[i + 1]) * (y[start:end] - y[previous]) -
+                       (x[previous] - x[start:end]) * (means_y[i + 1] - y[previous]))
+        previous = start + int(areas.argmax())
+        selected[i + 1] = previous
+    return selected
+
 
 class TransformerPipeline:
     """Handles the transformation of data to formats expected by app"""
 
     # Convert Twitter JSON response to dataframe with proper columns and types
+    @metrics.timed()
     def convert_json_to_dataframe(self, json_data):
         cols_to_include = ['id', 'created_at', 'full_text', 'tweet', 'retweet_count', 'favorite_count',
                            'entities.hashtags', 'user.id', 'user.screen_name']
-        dataframe = pd.json_normalize(json_data)
+        columns = self._extract_json_columns(json_data)
         # If tweets exist
-        if 'full_text' in dataframe:
+        if any(text is not None for text in columns['full_text']):
+            dataframe = pd.DataFrame(columns)
             # If re-tweets, get full original tweet and add RT tag
-            if 'retweeted_status.full_text' in dataframe:
-                dataframe['tweet'] = dataframe['retweeted_status.full_text'].fillna(dataframe['full_text'])
-                retweet_mask = ~dataframe['retweeted_status.full_text'].isnull()
+            dataframe['tweet'] = dataframe['retweeted_status.full_text'].fillna(dataframe['full_text'])
+            retweet_mask = ~dataframe['retweeted_status.full_text'].isnull()
+            if retweet_mask.any():
                 retweet_tags = dataframe.loc[retweet_mask, 'full_text'].apply(lambda s: s.split(':')[0])
                 dataframe.loc[retweet_mask, 'full_text'] = retweet_tags + ': ' + dataframe.loc[retweet_mask, 'tweet']
-            else:
-                dataframe['tweet'] = dataframe['full_text']
-            dataframe['created_at'] = pd.to_datetime(dataframe['created_at'])
+            dataframe['created_at'] = self._parse_created_at(dataframe['created_at'])
             return dataframe[cols_to_include]
 
+    # Pull only the JSON paths kept in the dataframe, the rest of each tweet's payload is never copied
+    def _extract_json_columns(self, json_data):
+        columns = {name: [] for name in _JSON_PATHS}
+        for tweet in json_data:
+            for name, path in _JSON_PATHS.items():
+                value = tweet
+                for key in path:
+                    value = value.get(key) if isinstance(value, dict) else None
+                columns[name].append(value)
+        return columns
+
+    def _parse_created_at(self, series):
+        # Parsing with Twitter's known format avoids guessing the format of every timestamp
+        try:
+            return pd.to_datetime(series, format=_CREATED_AT_FORMAT)
+        except (TypeError, ValueError):
+            return pd.to_datetime(series)
+
     # Methods for cleaning text
     def _remove_links(self, s):
-        return re.sub(r'https?://[A-Za-z0-9./]+', '', s)
+        return _LINK_PATTERN.sub('', s)
 
     def _remove_mentions(self, s):
-        return re.sub(r'(@[A-Za-z0-9_]+)', '', s)
+        return _MENTION_PATTERN.sub('', s)
 
     def _remove_hashtags(self, s):
-        return re.sub(r'(#[A-Za-z0-9_]+)', '', s)
+        return _HASHTAG_PATTERN.sub('', s)
 
     def _trim_spaces(self, s):
-        result = re.sub(r'\s+', ' ', s)
-        return result.strip()
+        # str.split() and the \s regex class agree on whitespace, so this matches collapsing \s+ then stripping
+        return ' '.join(s.split())
 
     def clean_tweet(self, tweet):
         result = self._remove_links(tweet)
@@ -46,46 +195,60 @@ class TransformerPipeline:
         result = self._trim_spaces(result)
         return result
 
-    # Map sentiment scores to text labels
+    # Clean a series of tweets, output matches clean_tweet for every row
+    @metrics.timed()
+    def clean_tweets(self, series):
+        # Re-tweets repeat the same text, so each distinct tweet is only cleaned once
+        codes, uniques = pd.factorize(series)
+        # Links must go first, removing one can join the text around it into a new hashtag or mention
+        cleaned = np.array([self._trim_spaces(_TAG_PATTERN.sub('', _LINK_PATTERN.sub('', tweet)))
+                            for tweet in uniques], dtype='object')
+        return pd.Series(cleaned[codes], index=series.index, name=series.name, dtype='object')
+
+    # Map sentiment scores to text labels, a NaN score is Neutral as in map_sentiment_labels
     def map_sentiment_label(self, score):
-        category = 'Neutral'
-        if score <= -0.05:
-            category = 'Negative'
-        elif score >= 0.05:
-            category = 'Positive'
-        return category
+        return SENTIMENT_LABELS[1 - (score <= SENTIMENT_THRESHOLDS[0]) + (score >= SENTIMENT_THRESHOLDS[1])]
+
+    # Map an array or series of sentiment scores to categorical labels, a series keeps its index
+    def map_sentiment_labels(self, scores):
+        labels = pd.Categorical.from_codes(_sentiment_codes(scores), dtype=SENTIMENT_DTYPE)
+        if isinstance(scores, pd.Series):
+            return pd.Series(labels, index=scores.index)
+        return labels
 
     # Map time period sample took place over to interaction labels
+    # Current interaction rating: very low (> 24hrs), low (24hrs-12), med (12-4), high (4-2), very high (<2)
     def map_interaction_label(self, time_delta, sample_size):
-        # Consider time it takes for each 100 tweets to occur
-        normalized_size = sample_size / 100
-        normalized_delta = time_delta / normalized_size;
-        interaction_level = 'Very Low'
-        if pd.Timedelta("12 hours") <= normalized_delta < pd.Timedelta("1 days"):
-            interaction_level = 'Low'
-        elif pd.Timedelta("4 hours") <= normalized_delta < pd.Timedelta("12 hours"):
-            interaction_level = 'Medium'
-        elif pd.Timedelta("2 hours") <= normalized_delta < pd.Timedelta("4 hours"):
-            interaction_level = 'High'
-        elif normalized_delta < pd.Timedelta("2 hours"):
-            interaction_level = 'Very High'
-        return interaction_level
+        time_delta = pd.Timedelta(time_delta)
+        # NaN is greater than no bound, so a missing delta rates Very Low as in map_interaction_labels
+        nanos = np.nan if time_delta is pd.NaT else time_delta.value
+        normalized_delta = nanos / (sample_size / 100)
+        return INTERACTION_LABELS[len(_INTERACTION_BOUNDS) - bisect.bisect_right(_INTERACTION_BOUNDS, normalized_delta)]
+
+    # Map arrays of time periods and the sample sizes they took to categorical interaction labels
+    def map_interaction_labels(self, time_deltas, sample_sizes):
+        return pd.Categorical.from_codes(_interaction_codes(time_deltas, sample_sizes), dtype=INTERACTION_DTYPE)
 
     # Generate a dataframe with tweet frequency time series formatted for use in a altair chart
-    def gen_tweets_by_time_dataframe(self, dataframe):
-        dataframe = dataframe[['created_at']].copy()
-        # Get counts per sentiment level for every timestamp to the minute
+    @metrics.timed()
+    def gen_tweets_by_time_dataframe(self, dataframe, resolution='minute', fill_empty=False, max_buckets=None):
+        created_at = dataframe['created_at']
+        # Get counts for every timestamp to the chosen resolution
         # Df with shape: Created                Tweets
         #                2000-01-01 12:34:00    2
         #                2000-01-01 12:35:00    3
-        tweets_by_sentiment = dataframe.groupby(dataframe['created_at'].map(lambda x: x.replace(second=0))).count()
-        return tweets_by_sentiment \
-            .rename(columns={"created_at": "Tweets"}) \
-            .reset_index() \
-            .rename(columns={"created_at": "Created"})
-
-    # Generate a dataframe with sentiment score time series data
-    def gen_sentiment_score_by_time_dataframe(self, dataframe):
+        # Timezone aware values are held as UTC nanoseconds
+        return gen_time_counts_dataframe(created_at.values.astype('int64'), np.ones(len(created_at), dtype='int64'),
+                                         resolution, fill_empty, created_at.dt.tz, max_buckets)
+
+    # Generate a dataframe with sentiment score time series data, downsampled to at most max_points tweets
+    @metrics.timed()
+    def gen_sentiment_score_by_time_dataframe(self, dataframe, max_points=None):
+        if max_points is not None and len(dataframe.index) > max_points:
+            created = dataframe['created_at'].values.astype('int64')
+            order = np.argsort(created, kind='mergesort')
+            scores = dataframe['sentiment_score'].to_numpy(dtype='float64')
+            dataframe = dataframe.iloc[order[lttb_indices(created[order], scores[order], max_points)]]
         dataframe = dataframe[['created_at', 'sentiment_score', 'sentiment_text']].copy()
         # Get every timestamp to the minute and associated sentiment scores
         # Df with shape: Created              Score         Sentiment
@@ -97,6 +260,38 @@ class TransformerPipeline:
             "sentiment_text": "Sentiment"
         })
 
+    # Summarize sentiment scores per time bucket so charts get one row per bucket rather than one per tweet
+    # Df with shape: Created                Tweets    Sentiment Score    Lower Quartile    Median    Upper Quartile
+    #                2000-01-01 12:34:00    2         0.2342             0.1021            0.2342    0.3663
+    @metrics.timed()
+    def gen_sentiment_stats_by_time_dataframe(self, dataframe, resolution='minute'):
+        created_at = dataframe['created_at']
+        bucket_size = TIME_RESOLUTIONS[resolution]
+        buckets = created_at.values.astype('int64') // bucket_size
+        scores = dataframe['sentiment_score'].to_numpy(dtype='float64')
+        # Sort by bucket, then score, so each bucket's scores are one sorted run
+        order = np.lexsort((scores, buckets))
+        buckets, scores = buckets[order], scores[order]
+        starts, first, counts = np.unique(buckets, return_index=True, return_counts=True)
+        sums = np.add.reduceat(scores, first) if len(scores) else scores
+        return pd.DataFrame({
+            'Created': _bucket_times(starts, bucket_size, created_at.dt.tz),
+            'Tweets': counts.astype('int64'),
+            'Sentiment Score': sums / counts,
+            'Lower Quartile': _sorted_quantiles(scores, first, counts, 0.25),
+            'Median': _sorted_quantiles(scores, first, counts, 0.5),
+            'Upper Quartile': _sorted_quantiles(scores, first, counts, 0.75),
+        })
+
+    # Df with shape: Sentiment    Tweets
+    #                Positive     54
+    #                Neutral      32
+    @metrics.timed()
+    def gen_sentiment_counts_dataframe(self, dataframe):
+        counts = dataframe['sentiment_text'].value_counts()
+        counts = counts[counts > 0]
+        return pd.DataFrame({'Sentiment': counts.index.astype('object'), 'Tweets': counts.to_numpy(dtype='int64')})
+
     def _flatten_hashtag_arr(self, arr):
         flat_entities = []
         for entity in arr:
@@ -104,6 +299,7 @@ class TransformerPipeline:
             flat_entities.append(hashtag_entry)
         return [hashtag for sublist in flat_entities for hashtag in sublist]
 
+    @metrics.timed()
     def gen_hashtag_counts_dataframe(self, dataframe):
         hashtags = self._flatten_hashtag_arr(dataframe['entities.hashtags'].to_list())
         df_hashtags = pd.DataFrame({'Hashtag': pd.Series(hashtags, dtype='str'),
@@ -0,0 +1,116 @@
+import heapq
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .transformer_pipeline import gen_time_counts_dataframe
+except ImportError:
+    from transformer_pipeline import gen_time_counts_dataframe
+
+# Tweet fields kept for each entry of the top favorite and top re-tweet heaps
+_TOP_TWEET_COLS = ['full_text', 'user.screen_name', 'sentiment_text', 'favorite_count', 'retweet_count']
+
+
+class TweetAggregates:
+    """Keeps dashboard statistics current as batches of scored tweets are absorbed"""
+
+    def __init__(self, top_k=5):
+        self.top_k = top_k
+        self.tweets = 0
+        self.sentiment_sum = 0.0
+        self.sentiment_counts = Counter()
+        # Tweets per second since the epoch, coarser resolutions are summed from these when charted
+        self.second_counts = Counter()
+        self.tz = None
+        self.first_created = None
+        self.last_created = None
+        # Min-heaps of (count, -position, tweet), the position breaks ties in favor of the earliest tweet
+        self._top_favorites = []
+        self._top_retweets = []
+
+    def _push_top(self, heap, entry):
+        if len(heap) < self.top_k:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+    def _update_top(self, heap, dataframe, col):
+        counts = dataframe[col].to_numpy()
+        # Only the batch's own top k can make it into the heap, order them by count then position
+        candidates = np.lexsort((np.arange(len(counts)), -counts))[:self.top_k]
+        records = dataframe.iloc[candidates][_TOP_TWEET_COLS].to_dict('records')
+        for i, record in zip(candidates, records):
+            self._push_top(heap, (int(counts[i]), -(self.tweets + int(i)), record))
+
+    def _update_created_range(self, first_created, last_created):
+        if self.first_created is None or first_created < self.first_created:
+            self.first_created = first_created
+        if self.last_created is None or last_created > self.last_created:
+            self.last_created = last_created
+
+    # Absorb a batch of scored tweets without rescanning earlier batches
+    def update(self, dataframe):
+        if dataframe is None or dataframe.empty:
+            return self
+        self._update_top(self._top_favorites, dataframe, 'favorite_count')
+        self._update_top(self._top_retweets, dataframe, 'retweet_count')
+        self.sentiment_sum += float(dataframe['sentiment_score'].sum())
+        self.sentiment_counts.update(dataframe['sentiment_text'].value_counts().to_dict())
+        seconds, counts = np.unique(dataframe['created_at'].values.astype('int64') // 10 ** 9, return_counts=True)
+        self.second_counts.update(dict(zip(seconds.tolist(), counts.tolist())))
+        self.tz = self.tz or dataframe['created_at'].dt.tz
+        self._update_created_range(dataframe['created_at'].min(), dataframe['created_at'].max())
+        self.tweets += len(dataframe.index)
+        return self
+
+    # Combine with a state built from other tweets, as if its batches were absorbed after this state's
+    def merge(self, other):
+        for heap, other_heap in [(self._top_favorites, other._top_favorites),
+                                 (self._top_retweets, other._top_retweets)]:
+            for count, position, record in other_heap:
+                self._push_top(heap, (count, position - self.tweets, record))
+        self.sentiment_sum += other.sentiment_sum
+        self.sentiment_counts.update(other.sentiment_counts)
+        self.second_counts.update(other.second_counts)
+        self.tz = self.tz or other.tz
+        if other.tweets:
+            self._update_created_range(other.first_created, other.last_created)
+        self.tweets += other.tweets
+        return self
+
+    @property
+    def mean_sentiment(self):
+        return self.sentiment_sum / self.tweets if self.tweets else 0.0
+
+    @property
+    def most_common_sentiment(self):
+        # Ties go to the first label alphabetically, as Series.mode does
+        return min(self.sentiment_counts.items(), key=lambda item: (-item[1], item[0]))[0] \
+            if self.sentiment_counts else None
+
+    @property
+    def time_range(self):
+        return self.last_created - self.first_created if self.tweets else pd.Timedelta(0)
+
+    def _sorted_top(self, heap):
+        return [record for count, position, record in sorted(heap, reverse=True)]
+
+    def top_favorites(self):
+        return self._sorted_top(self._top_favorites)
+
+    def top_retweets(self):
+        return self._sorted_top(self._top_retweets)
+
+    # Same shape as TransformerPipeline.gen_sentiment_counts_dataframe
+    def gen_sentiment_counts_dataframe(self):
+        counts = sorted(((label, count) for label, count in self.sentiment_counts.items() if count),
+                        key=lambda item: (-item[1], item[0]))
+        return pd.DataFrame(counts, columns=['Sentiment', 'Tweets']).astype({'Tweets': 'int64'})
+
+    # Same shape as TransformerPipeline.gen_tweets_by_time_dataframe
+    def gen_tweets_by_time_dataframe(self, resolution='minute', fill_empty=False, max_buckets=None):
+        seconds = np.fromiter(self.second_counts.keys(), dtype='int64', count=len(self.second_counts))
+        counts = np.fromiter(self.second_counts.values(), dtype='int64', count=len(self.second_counts))
+        return gen_time_counts_dataframe(seconds * 10 ** 9, counts, resolution, fill_empty, self.tz, max_buckets)
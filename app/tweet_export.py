@@ -0,0 +1,80 @@
+import gzip
+import io
+
+EXPORT_FORMATS = ['csv', 'parquet']
+EXPORT_COMPRESSIONS = [None, 'gzip', 'zstd']
+_MIME_TYPES = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+_COMPRESSION_EXTENSIONS = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+
+def export_file_name(name, export_format='csv', compression=None):
+    file_name = '{}.{}'.format(name, export_format)
+    # Parquet compresses its pages internally, so the file keeps its extension
+    if export_format == 'csv' and compression:
+        file_name += _COMPRESSION_EXTENSIONS[compression]
+    return file_name
+
+
+def export_mime_type(export_format='csv', compression=None):
+    if export_format == 'csv' and compression:
+        return 'application/gzip' if compression == 'gzip' else 'application/zstd'
+    return _MIME_TYPES[export_format]
+
+
+def _open_compressed(file, compression):
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=file, mode='wb')
+    if compression == 'zstd':
+        # zstd is optional, zstandard is only needed when it is asked for
+        import zstandard
+        return zstandard.ZstdCompressor().stream_writer(file, closefd=False)
+    return None
+
+
+def _write_csv(dataframe, file, compression, chunk_size):
+    compressed = _open_compressed(file, compression)
+    text = io.TextIOWrapper(compressed or file, encoding='utf-8', newline='')
+    for start in range(0, max(len(dataframe.index), 1), chunk_size):
+        dataframe.iloc[start:start + chunk_size].to_csv(text, header=start == 0, index=False)
+    text.flush()
+    # Leave the caller's file open
+    text.detach()
+    if compressed is not None:
+        compressed.close()
+
+
+def _write_parquet(dataframe, file, compression, chunk_size):
+    # Parquet output is optional, pyarrow is only needed when it is asked for
+    import pyarrow
+    import pyarrow.parquet
+    writer = None
+    for start in range(0, max(len(dataframe.index), 1), chunk_size):
+        table = pyarrow.Table.from_pandas(dataframe.iloc[start:start + chunk_size], preserve_index=False)
+        if writer is None:
+            writer = pyarrow.parquet.ParquetWriter(file, table.schema, compression=compression or 'none')
+        writer.write_table(table.cast(writer.schema))
+    writer.close()
+
+
+# Write dataframe to a binary file chunk_size rows at a time, so only one chunk is ever serialized in memory
+def write_export(dataframe, file, export_format='csv', compression=None, chunk_size=10000):
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError('Unknown export format: {}'.format(export_format))
+    if compression not in EXPORT_COMPRESSIONS:
+        raise ValueError('Unknown export compression: {}'.format(compression))
+    if export_format == 'parquet':
+        _write_parquet(dataframe, file, compression, chunk_size)
+    else:
+        _write_csv(dataframe, file, compression, chunk_size)
+
+
+def gen_export(dataframe, export_format='csv', compression=None, chunk_size=10000):
+    buffer = io.BytesIO()
+    write_export(dataframe, buffer, export_format, compression, chunk_size)
+    return buffer.getvalue()
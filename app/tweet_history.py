@@ -0,0 +1,253 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .sqlite_batches import connect, select_in
+    from .transformer_pipeline import SENTIMENT_LABELS, TIME_RESOLUTIONS, _bucket_times
+except ImportError:
+    from sqlite_batches import connect, select_in
+    from transformer_pipeline import SENTIMENT_LABELS, TIME_RESOLUTIONS, _bucket_times
+
+# Time resolutions rolled up as tweets are written, coarser ones are summed from the coarsest that divides them
+ROLLUP_RESOLUTIONS = ['minute', 'hour']
+
+_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS tweets ('
+    'id INTEGER PRIMARY KEY, created_at INTEGER NOT NULL, full_text TEXT, tweet TEXT, retweet_count INTEGER, '
+    'favorite_count INTEGER, hashtags TEXT, user_id INTEGER, screen_name TEXT, sentiment_score REAL, '
+    'sentiment_text TEXT)',
+    # Tweets each query found and the tweets using each lowercased hashtag, both scanned by time range
+    'CREATE TABLE IF NOT EXISTS query_tweets ('
+    'query TEXT, created_at INTEGER, id INTEGER, PRIMARY KEY (query, created_at, id)) WITHOUT ROWID',
+    'CREATE TABLE IF NOT EXISTS hashtag_tweets ('
+    'hashtag TEXT, created_at INTEGER, id INTEGER, PRIMARY KEY (hashtag, created_at, id)) WITHOUT ROWID',
+    'CREATE TABLE IF NOT EXISTS rollups ('
+    'query TEXT, resolution TEXT, bucket INTEGER, tweets INTEGER, sentiment_sum REAL, negative INTEGER, '
+    'neutral INTEGER, positive INTEGER, PRIMARY KEY (query, resolution, bucket)) WITHOUT ROWID',
+]
+_TWEET_COLS = ['id', 'created_at', 'full_text', 'tweet', 'retweet_count', 'favorite_count', 'hashtags', 'user.id',
+               'user.screen_name', 'sentiment_score', 'sentiment_text']
+# Same columns, in the same order, as a dataframe scored by TweetStream
+_FRAME_COLS = ['id', 'created_at', 'full_text', 'tweet', 'retweet_count', 'favorite_count', 'entities.hashtags',
+               'user.id', 'user.screen_name', 'sentiment_score', 'sentiment_text']
+
+
+def _epoch_seconds(timestamp):
+    return None if timestamp is None else pd.Timestamp(timestamp).value // 10 ** 9
+
+
+# SQL condition and arguments keeping rows of column created from start up to end
+def _time_range(column, start, end):
+    sql = ''
+    args = []
+    if start is not None:
+        sql += ' AND {} >= ?'.format(column)
+        args.append(_epoch_seconds(start))
+    if end is not None:
+        sql += ' AND {} < ?'.format(column)
+        args.append(_epoch_seconds(end))
+    return sql, args
+
+
+class TweetHistory:
+    """Scored tweets kept in SQLite across searches, indexed by query, time and hashtag, with per bucket rollups"""
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self._connection = connect(path)
+        self._lock = threading.Lock()
+        with self._lock:
+            for statement in _SCHEMA:
+                self._connection.execute(statement)
+            self._connection.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM tweets').fetchone()[0]
+
+    def _select_ids(self, sql, ids, *args):
+        return {row[0] for row in select_in(self._connection, sql, ids, args)}
+
+    # Ids among ids of tweets already stored
+    def known_ids(self, ids):
+        with self._lock:
+            return self._select_ids('SELECT id FROM tweets WHERE id IN ({})', [int(i) for i in ids])
+
+    # Sentiment scores of the tweets among ids already stored, by id
+    def stored_scores(self, ids):
+        with self._lock:
+            return dict(select_in(self._connection, 'SELECT id, sentiment_score FROM tweets WHERE id IN ({})',
+                                  [int(i) for i in ids]))
+
+    # Store the scored tweets query found, as TweetStream yields them. Tweets already stored keep their scores, only
+    # their re-tweet and favorite counts are refreshed, and only tweets new to query are added to its rollups.
+    # hashtags are the hashtag texts of each tweet, taken from the entities.hashtags column when not given.
+    def upsert(self, query, dataframe, hashtags=None):
+        if dataframe is None or dataframe.empty:
+            return 0
+        if hashtags is None:
+            hashtags = [[entity['text'] for entity in entities] for entities in dataframe['entities.hashtags']]
+        ids = dataframe['id'].to_numpy(dtype='int64')
+        created = dataframe['created_at'].values.astype('datetime64[ns]').astype('int64') // 10 ** 9
+        tweets = pd.DataFrame({
+            'id': ids,
+            'created_at': created,
+            'full_text': dataframe['full_text'].astype('object'),
+            'tweet': dataframe['tweet'].astype('object'),
+            'retweet_count': dataframe['retweet_count'].to_numpy(dtype='int64'),
+            'favorite_count': dataframe['favorite_count'].to_numpy(dtype='int64'),
+            'hashtags': [' '.join(tags) for tags in hashtags],
+            'user.id': dataframe['user.id'].to_numpy(dtype='int64'),
+            'user.screen_name': dataframe['user.screen_name'].astype('object'),
+            'sentiment_score': dataframe['sentiment_score'].to_numpy(dtype='float64'),
+            'sentiment_text': dataframe['sentiment_text'].astype('object'),
+        }, columns=_TWEET_COLS).drop_duplicates('id')
+        with self._lock:
+            known = self._select_ids('SELECT id FROM tweets WHERE id IN ({})', tweets['id'].tolist())
+            # Only the query's own index entries in the page's time range need checking
+            found = self._select_ids(
+                'SELECT id FROM query_tweets WHERE query = ? AND created_at BETWEEN ? AND ? AND id IN ({})',
+                tweets['id'].tolist(), query, int(created.min()), int(created.max()))
+            is_known = tweets['id'].isin(known).to_numpy()
+            new_tweets = tweets[~is_known]
+            new_hashtags = [(tag.lower(), created_at, tweet_id)
+                            for tweet_id, created_at, tags in zip(ids, created, hashtags)
+                            if tweet_id not in known for tag in tags]
+            self._connection.executemany('INSERT INTO tweets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                         new_tweets.itertuples(index=False, name=None))
+            self._connection.executemany('UPDATE tweets SET retweet_count = ?, favorite_count = ? WHERE id = ?',
+                                         tweets.loc[is_known, ['retweet_count', 'favorite_count', 'id']]
+                                         .itertuples(index=False, name=None))
+            self._connection.executemany('INSERT OR IGNORE INTO hashtag_tweets VALUES (?, ?, ?)',
+                                         [(tag, int(created_at), int(tweet_id))
+                                          for tag, created_at, tweet_id in new_hashtags])
+            # Scores are read back from the store, so a tweet found again by another query rolls up as first scored
+            query_rows = tweets[~tweets['id'].isin(found)]
+            self._connection.executemany('INSERT INTO query_tweets VALUES (?, ?, ?)',
+                                         [(query, int(created_at), int(tweet_id)) for created_at, tweet_id in
+                                          zip(query_rows['created_at'], query_rows['id'])])
+            if len(query_rows.index):
+                self._update_rollups(query, query_rows['id'].tolist())
+            self._connection.commit()
+        return len(query_rows.index)
+
+    def _update_rollups(self, query, ids):
+        rows = select_in(self._connection,
+                         'SELECT created_at, sentiment_score, sentiment_text FROM tweets WHERE id IN ({})', ids)
+        scored = pd.DataFrame.from_records(list(rows), columns=['created_at', 'sentiment_score', 'sentiment_text'])
+        labels = pd.Categorical(scored['sentiment_text'], categories=SENTIMENT_LABELS)
+        for resolution in ROLLUP_RESOLUTIONS:
+            bucket_seconds = TIME_RESOLUTIONS[resolution] // 10 ** 9
+            buckets, inverse = np.unique(scored['created_at'].to_numpy(dtype='int64') // bucket_seconds,
+                                         return_inverse=True)
+            tweets = np.bincount(inverse, minlength=len(buckets))
+            sums = np.bincount(inverse, weights=scored['sentiment_score'].to_numpy(dtype='float64'),
+                               minlength=len(buckets))
+            # Counts of each sentiment label per bucket, one column per label
+            label_counts = np.zeros((len(buckets), len(SENTIMENT_LABELS)), dtype='int64')
+            np.add.at(label_counts, (inverse[labels.codes >= 0], labels.codes[labels.codes >= 0]), 1)
+            keys = [(query, resolution, int(bucket)) for bucket in buckets]
+            self._connection.executemany('INSERT OR IGNORE INTO rollups VALUES (?, ?, ?, 0, 0.0, 0, 0, 0)', keys)
+            self._connection.executemany(
+                'UPDATE rollups SET tweets = tweets + ?, sentiment_sum = sentiment_sum + ?, negative = negative + ?, '
+                'neutral = neutral + ?, positive = positive + ? WHERE query = ? AND resolution = ? AND bucket = ?',
+                [(int(count), float(total), *map(int, label_count), *key)
+                 for count, total, label_count, key in zip(tweets, sums, label_counts, keys)])
+
+    def _load(self, table, column, value, start, end):
+        sql = ('SELECT t.id, t.created_at, t.full_text, t.tweet, t.retweet_count, t.favorite_count, t.hashtags, '
+               't.user_id, t.screen_name, t.sentiment_score, t.sentiment_text FROM {0} AS i '
+               'JOIN tweets AS t ON t.id = i.id WHERE i.{1} = ?').format(table, column)
+        range_sql, range_args = _time_range('i.created_at', start, end)
+        # Newest first, as searches return them
+        sql += range_sql + ' ORDER BY i.created_at DESC, i.id DESC'
+        args = [value, *range_args]
+        with self._lock:
+            rows = self._connection.execute(sql, args).fetchall()
+        dataframe = pd.DataFrame.from_records(rows, columns=_TWEET_COLS)
+        dataframe['created_at'] = pd.to_datetime(dataframe['created_at'].to_numpy(dtype='int64'), unit='s', utc=True)
+        dataframe['entities.hashtags'] = [[{'text': tag} for tag in tags.split()] for tags in dataframe['hashtags']]
+        dataframe['sentiment_score'] = dataframe['sentiment_score'].astype('float32')
+        return dataframe[_FRAME_COLS]
+
+    # Stored tweets query found, created from start up to end, shaped like the dataframes TweetStream yields
+    def load_query(self, query, start=None, end=None):
+        return self._load('query_tweets', 'query', query, start, end)
+
+    # Stored tweets using hashtag, whatever query found them
+    def load_hashtag(self, hashtag, start=None, end=None):
+        return self._load('hashtag_tweets', 'hashtag', hashtag.lstrip('#').lower(), start, end)
+
+    # Creation times of the first and last stored tweet query found from start up to end, NaT when there are none.
+    # Rollup buckets only hold their start, so the span of the tweets themselves is read from the query index.
+    def gen_time_span(self, query, start=None, end=None):
+        range_sql, range_args = _time_range('created_at', start, end)
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT MIN(created_at), MAX(created_at) FROM query_tweets WHERE query = ?' + range_sql,
+                (query, *range_args)).fetchone()
+        return tuple(pd.NaT if seconds is None else pd.Timestamp(seconds, unit='s', tz='UTC') for seconds in row)
+
+    # The stored rollup the resolution can be summed from without splitting its buckets
+    @staticmethod
+    def _rollup_resolution(resolution):
+        for rollup in reversed(ROLLUP_RESOLUTIONS):
+            if TIME_RESOLUTIONS[resolution] % TIME_RESOLUTIONS[rollup] == 0:
+                return rollup
+        raise ValueError('No rollup for resolution: {}'.format(resolution))
+
+    # Tweet counts and sentiment of query per time bucket, read from the rollups without touching the tweets
+    # Df with shape: Created                Tweets    Sentiment Score    Negative    Neutral    Positive
+    #                2000-01-01 12:00:00    120       0.2342             20          40         60
+    def gen_rollup_dataframe(self, query, resolution='hour', start=None, end=None, tz='UTC'):
+        rollup = self._rollup_resolution(resolution)
+        rollup_seconds = TIME_RESOLUTIONS[rollup] // 10 ** 9
+        ratio = TIME_RESOLUTIONS[resolution] // TIME_RESOLUTIONS[rollup]
+        sql = ('SELECT bucket / ? AS b, SUM(tweets), SUM(sentiment_sum), SUM(negative), SUM(neutral), SUM(positive) '
+               'FROM rollups WHERE query = ? AND resolution = ?')
+        args = [ratio, query, rollup]
+        # Buckets are kept when they start within the range
+        if start is not None:
+            sql += ' AND bucket >= ?'
+            args.append(-(-_epoch_seconds(start) // rollup_seconds))
+        if end is not None:
+            sql += ' AND bucket < ?'
+            args.append(-(-_epoch_seconds(end) // rollup_seconds))
+        sql += ' GROUP BY b ORDER BY b'
+        with self._lock:
+            rows = self._connection.execute(sql, args).fetchall()
+        buckets, tweets, sums, negative, neutral, positive = \
+            (np.array(column) for column in zip(*rows)) if rows else [np.zeros(0, dtype='int64')] * 6
+        tweets = tweets.astype('int64')
+        return pd.DataFrame({
+            'Created': _bucket_times(buckets.astype('int64'), TIME_RESOLUTIONS[resolution], tz),
+            'Tweets': tweets,
+            'Sentiment Score': sums.astype('float64') / np.maximum(tweets, 1),
+            'Negative': negative.astype('int64'),
+            'Neutral': neutral.astype('int64'),
+            'Positive': positive.astype('int64'),
+        })
+
+    # Df with shape: Query      Tweets    First                  Last
+    #                #Avatar    5400      2000-01-01 12:00:00    2000-01-04 18:00:00
+    def gen_queries_dataframe(self, tz='UTC'):
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT query, SUM(tweets), MIN(bucket), MAX(bucket) FROM rollups WHERE resolution = ? '
+                'GROUP BY query ORDER BY SUM(tweets) DESC, query', (ROLLUP_RESOLUTIONS[0],)).fetchall()
+        queries, tweets, first, last = zip(*rows) if rows else ((), (), (), ())
+        bucket_size = TIME_RESOLUTIONS[ROLLUP_RESOLUTIONS[0]]
+        return pd.DataFrame({
+            'Query': pd.Series(queries, dtype='object'),
+            'Tweets': pd.Series(tweets, dtype='int64'),
+            'First': _bucket_times(np.array(first, dtype='int64'), bucket_size, tz),
+            'Last': _bucket_times(np.array(last, dtype='int64'), bucket_size, tz),
+        })
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
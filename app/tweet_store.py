@@ -0,0 +1,133 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .transformer_pipeline import SENTIMENT_DTYPE
+except ImportError:
+    from transformer_pipeline import SENTIMENT_DTYPE
+
+# Compact dtypes for the scalar tweet columns, text repeated across re-tweets and users is stored once as a category
+_COLUMN_DTYPES = {
+    'id': 'int64',
+    'full_text': 'category',
+    'tweet': 'category',
+    'retweet_count': 'int32',
+    'favorite_count': 'int32',
+    'user.id': 'int64',
+    'user.screen_name': 'category',
+    'sentiment_score': 'float32',
+    'sentiment_text': SENTIMENT_DTYPE,
+}
+
+
+class HashtagColumn:
+    """Hashtags of each tweet, stored as offsets into one flat array of codes for interned tags"""
+
+    __slots__ = ('offsets', 'codes', 'tags')
+
+    # Tweet i has the tags codes[offsets[i]:offsets[i + 1]], each code indexing into tags
+    def __init__(self, offsets, codes, tags):
+        self.offsets = offsets
+        self.codes = codes
+        self.tags = tags
+
+    @classmethod
+    def from_entities(cls, entities):
+        offsets = [0]
+        codes = []
+        tag_codes = {}
+        for hashtags in entities:
+            for hashtag in hashtags:
+                codes.append(tag_codes.setdefault(sys.intern(hashtag['text']), len(tag_codes)))
+            offsets.append(len(codes))
+        return cls(np.array(offsets, dtype='int64'), np.array(codes, dtype='int32'), list(tag_codes))
+
+    @classmethod
+    def concat(cls, columns):
+        columns = list(columns)
+        tag_codes = {}
+        offsets = [np.zeros(1, dtype='int64')]
+        codes = []
+        total = 0
+        for column in columns:
+            # Re-code each column's tags into the combined vocabulary
+            recode = np.array([tag_codes.setdefault(tag, len(tag_codes)) for tag in column.tags], dtype='int32')
+            codes.append(recode[column.codes])
+            offsets.append(column.offsets[1:] + total)
+            total += len(column.codes)
+        return cls(np.concatenate(offsets), np.concatenate(codes) if codes else np.zeros(0, dtype='int32'),
+                   list(tag_codes))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return [self.tags[code] for code in self.codes[self.offsets[i]:self.offsets[i + 1]]]
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.codes.nbytes + sum(sys.getsizeof(tag) for tag in self.tags)
+
+    # Lowercased tags and, for every stored code, the code of its lowercased tag
+    def lower_codes(self):
+        lower_tags, lower_map = np.unique([tag.lower() for tag in self.tags], return_inverse=True) \
+            if self.tags else (np.zeros(0, dtype='object'), np.zeros(0, dtype='int64'))
+        return lower_tags, lower_map[self.codes]
+
+    # Df with shape: Hashtag    Count
+    #                avatar     54
+    #                nfl        32
+    def gen_counts_dataframe(self):
+        lower_tags, codes = self.lower_codes()
+        counts = np.bincount(codes, minlength=len(lower_tags))
+        # Stable sort keeps tied hashtags in alphabetical order
+        order = np.argsort(-counts, kind='mergesort')
+        return pd.DataFrame({'Hashtag': lower_tags[order].astype('object'), 'Count': counts[order].astype('int64')})
+
+
+class TweetStore:
+    """Scored tweets held in compact columns, with hashtags in a HashtagColumn"""
+
+    __slots__ = ('frame', 'hashtags')
+
+    def __init__(self, frame, hashtags):
+        self.frame = frame
+        self.hashtags = hashtags
+
+    @classmethod
+    def from_dataframe(cls, dataframe):
+        frame = dataframe.drop(columns=['entities.hashtags']) \
+            .astype({col: dtype for col, dtype in _COLUMN_DTYPES.items() if col in dataframe})
+        return cls(frame, HashtagColumn.from_entities(dataframe['entities.hashtags']))
+
+    @classmethod
+    def concat(cls, stores):
+        stores = list(stores)
+        frame = pd.concat([store.frame for store in stores])
+        # Concatenating categoricals with different categories falls back to objects, so restore the dtypes
+        frame = frame.astype({col: dtype for col, dtype in _COLUMN_DTYPES.items() if col in frame})
+        return cls(frame, HashtagColumn.concat(store.hashtags for store in stores))
+
+    def __len__(self):
+        return len(self.frame.index)
+
+    def memory_usage(self):
+        return int(self.frame.memory_usage(deep=True).sum()) + self.hashtags.nbytes
+
+    def gen_hashtag_counts_dataframe(self):
+        return self.hashtags.gen_counts_dataframe()
+
+    # Users ordered by their number of tweets, counted from the codes of the categorical column
+    def gen_user_counts_series(self):
+        users = self.frame['user.screen_name'].cat
+        names = users.categories.to_numpy(dtype='object')
+        codes = users.codes.to_numpy()
+        counts = np.bincount(codes[codes >= 0], minlength=len(names))
+        # Stable sort of the users in alphabetical order, so tied users stay alphabetical as tied hashtags do
+        order = np.argsort(names, kind='mergesort')
+        order = order[np.argsort(-counts[order], kind='mergesort')]
+        order = order[counts[order] > 0]
+        return pd.Series(counts[order].astype('int64'), index=pd.Index(names[order], dtype='object'),
+                         name='user.screen_name')
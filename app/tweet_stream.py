@@ -0,0 +1,99 @@
+import queue
+import threading
+import time
+
+try:
+    from .metrics import metrics
+except ImportError:
+    from metrics import metrics
+
+# Marks the end of the fetched pages in the prefetch buffer
+_END = object()
+
+
+class TweetStream:
+    """Converts, cleans and scores pages of tweets while the next page is being fetched"""
+
+    def __init__(self, transformer, scorer, aggregates=None, prefetch=2, history=None):
+        self.transformer = transformer
+        self.scorer = scorer
+        # Optional TweetAggregates kept current with every page processed
+        self.aggregates = aggregates
+        # Optional TweetHistory, tweets it already holds keep their stored scores instead of being scored again
+        self.history = history
+        self.prefetch = prefetch
+        self.tweets = 0
+
+    def _put(self, buffer, stop, item):
+        # Give up once the consumer stops reading so the fetch thread can exit
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fetch(self, pages, buffer, stop):
+        try:
+            fetched = time.perf_counter()
+            for page in pages:
+                # Tweepy pages hold Status models, the raw tweet is kept in _json
+                json_data = [getattr(tweet, '_json', tweet) for tweet in page]
+                if metrics.enabled:
+                    metrics.record('TweetStream.fetch_page', time.perf_counter() - fetched, len(json_data))
+                if not self._put(buffer, stop, json_data):
+                    return
+                fetched = time.perf_counter()
+        except Exception as error:
+            self._put(buffer, stop, error)
+        self._put(buffer, stop, _END)
+
+    def _process_page(self, json_data):
+        dataframe = self.transformer.convert_json_to_dataframe(json_data)
+        if dataframe is None:
+            return None
+        dataframe['sentiment_score'] = self._score(dataframe)
+        # Plain strings as before, TweetStore makes the column categorical when pages are compacted
+        sentiment_text = self.transformer.map_sentiment_labels(dataframe['sentiment_score'])
+        dataframe['sentiment_text'] = sentiment_text.astype('object')
+        # Continue the index of the previous pages so the frames concatenate into one range
+        dataframe.index = dataframe.index + self.tweets
+        return dataframe
+
+    def _score(self, dataframe):
+        stored = {} if self.history is None else self.history.stored_scores(dataframe['id'])
+        if not stored:
+            return self.scorer.score_tweets(self.transformer.clean_tweets(dataframe['tweet']))['compound']
+        scores = dataframe['id'].map(stored).astype('float32')
+        is_new = scores.isna()
+        if is_new.any():
+            new_tweets = self.transformer.clean_tweets(dataframe.loc[is_new, 'tweet'])
+            scores[is_new] = self.scorer.score_tweets(new_tweets)['compound']
+        return scores
+
+    # Yield a scored dataframe per page of tweets, stopping after limit tweets
+    def process_pages(self, pages, limit=None):
+        self.tweets = 0
+        buffer = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        fetcher = threading.Thread(target=self._fetch, args=(pages, buffer, stop), daemon=True)
+        fetcher.start()
+        try:
+            while limit is None or self.tweets < limit:
+                json_data = buffer.get()
+                if json_data is _END:
+                    break
+                if isinstance(json_data, Exception):
+                    raise json_data
+                if limit is not None:
+                    json_data = json_data[:limit - self.tweets]
+                dataframe = self._process_page(json_data)
+                if dataframe is None:
+                    continue
+                if self.aggregates is not None:
+                    self.aggregates.update(dataframe)
+                self.tweets += len(dataframe.index)
+                yield dataframe
+        finally:
+            stop.set()
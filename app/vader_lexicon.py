@@ -0,0 +1,60 @@
+import functools
+import os
+import pickle
+import sys
+
+import vaderSentiment.vaderSentiment as vader
+
+# VADER parses these text files every time an analyzer is built
+_LEXICON_FILES = ['vader_lexicon.txt', 'emoji_utf8_lexicon.txt']
+# Precompiled lexicons, built into the container image so new containers skip the parsing
+LEXICON_PATH = os.getenv('VADER_LEXICON_PATH',
+                         os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vader_lexicon.pickle'))
+
+
+# Size and modification time of the lexicon files, a pickle built from other files is stale
+def _lexicon_version():
+    vader_dir = os.path.dirname(os.path.abspath(vader.__file__))
+    stats = [os.stat(os.path.join(vader_dir, name)) for name in _LEXICON_FILES]
+    return tuple((stat.st_size, stat.st_mtime_ns) for stat in stats)
+
+
+def compile_lexicon(path=LEXICON_PATH):
+    analyzer = vader.SentimentIntensityAnalyzer()
+    lexicons = (analyzer.lexicon, analyzer.emojis)
+    # Write to a temporary file first so processes starting at the same time never read half a pickle
+    temp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temp_path, 'wb') as file:
+        pickle.dump((_lexicon_version(), lexicons), file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+    return lexicons
+
+
+# The word and emoji lexicons, from the precompiled pickle when it is current
+def load_lexicon(path=LEXICON_PATH):
+    try:
+        with open(path, 'rb') as file:
+            version, lexicons = pickle.load(file)
+        if version == _lexicon_version():
+            return lexicons
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+        pass
+    try:
+        return compile_lexicon(path)
+    except OSError:
+        # A read only install still works, it just parses the lexicon each time the process starts
+        analyzer = vader.SentimentIntensityAnalyzer()
+        return analyzer.lexicon, analyzer.emojis
+
+
+# One analyzer per process, scoring only reads the lexicons so every thread can share it
+@functools.lru_cache(maxsize=None)
+def get_analyzer():
+    analyzer = vader.SentimentIntensityAnalyzer.__new__(vader.SentimentIntensityAnalyzer)
+    analyzer.lexicon, analyzer.emojis = load_lexicon()
+    return analyzer
+
+
+# Run at image build time: python app/vader_lexicon.py
+if __name__ == '__main__':
+    compile_lexicon(sys.argv[1] if len(sys.argv) > 1 else LEXICON_PATH)
@@ -0,0 +1,106 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.sentiment_backends import BACKENDS, SCORE_COLUMNS, get_backend
+from app.transformer_pipeline import TransformerPipeline
+from benchmark.synthetic import FIXTURE_PATH, gen_synthetic_tweets
+
+SAMPLE_SIZES = [10_000, 100_000]
+REFERENCE = 'vader'
+# Sentences exercising VADER's rules, the fixture and synthetic tweets hardly use them
+RULE_EXAMPLES = [
+    'VADER is VERY SMART, handsome, and FUNNY!!!',
+    'VADER is not smart, handsome, nor funny.',
+    'At least it isn\'t a horrible book.',
+    'The book was only kind of good.',
+    'The plot was good, but the characters are uncompelling and the dialog is not great.',
+    'Today only kinda sux! But I\'ll get by, lol',
+    'Make sure you :) or :D today!',
+    'Catch utf-8 emoji such as \U0001f498 and \U0001f48b and \U0001f601',
+    'Sentiment analysis has never been this good!',
+    'Without a doubt, excellent idea.',
+    'Roger Dodger is one of the least compelling variations on this theme.',
+    'With VADER, sentiment analysis is the shit!',
+    'No good deed goes unpunished??',
+]
+
+
+def _load_fixture_texts(transformer):
+    with open(FIXTURE_PATH, encoding='utf-8') as json_file:
+        json_data = json.load(json_file)['_json']
+    return transformer.clean_tweets(transformer.convert_json_to_dataframe(json_data)['tweet'])
+
+
+def _gen_texts(transformer, size):
+    return transformer.clean_tweets(transformer.convert_json_to_dataframe(gen_synthetic_tweets(size))['tweet'])
+
+
+# Score the distinct texts with every backend and compare each against the reference
+def compare_backends(transformer, texts, data, show=0):
+    texts = list(pd.unique(texts))
+    scores = {}
+    seconds = {}
+    for name in BACKENDS:
+        backend = get_backend(name)
+        start = time.perf_counter()
+        scores[name] = backend.score(texts)
+        seconds[name] = time.perf_counter() - start
+    reference = scores[REFERENCE]
+    reference_labels = transformer.map_sentiment_labels(reference[:, SCORE_COLUMNS.index('compound')])
+    results = []
+    for name in BACKENDS:
+        error = np.abs(scores[name] - reference)
+        compound_error = error[:, SCORE_COLUMNS.index('compound')]
+        labels = transformer.map_sentiment_labels(scores[name][:, SCORE_COLUMNS.index('compound')])
+        results.append({
+            'data': data,
+            'backend': name,
+            'texts': len(texts),
+            'seconds': seconds[name],
+            'texts_per_second': len(texts) / seconds[name] if seconds[name] else None,
+            'speedup': seconds[REFERENCE] / seconds[name] if seconds[name] else None,
+            'compound_mae': float(compound_error.mean()),
+            'compound_max_error': float(compound_error.max()),
+            'exact_share': float((error.max(axis=1) < 1e-3).mean()),
+            'label_agreement': float((labels == reference_labels).mean()),
+        })
+        print('{:<18} {:<10} {:>8} {:>12.0f} {:>8.1f}x {:>10.4f} {:>10.4f} {:>8.2%} {:>8.2%}'.format(
+            data, name, len(texts), results[-1]['texts_per_second'] or 0, results[-1]['speedup'] or 0,
+            results[-1]['compound_mae'], results[-1]['compound_max_error'], results[-1]['exact_share'],
+            results[-1]['label_agreement']))
+        # The texts scored furthest from the reference, to see which of VADER's rules a backend misses
+        for i in np.argsort(-compound_error)[:show] if name != REFERENCE else []:
+            if compound_error[i] > 0:
+                print('    {:+.4f} vs {:+.4f}  {}'.format(scores[name][i, -1], reference[i, -1], texts[i][:80]))
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Compare the sentiment backends against VADER for accuracy and speed.')
+    parser.add_argument('sizes', nargs='*', type=int, default=SAMPLE_SIZES, help='numbers of synthetic tweets')
+    parser.add_argument('-o', '--output', help='JSON file results are saved to')
+    parser.add_argument('-s', '--show', type=int, default=5, help='furthest off texts to list for each backend')
+    args = parser.parse_args(args)
+
+    transformer = TransformerPipeline()
+    print('{:<18} {:<10} {:>8} {:>12} {:>9} {:>10} {:>10} {:>8} {:>8}'.format(
+        'Data', 'Backend', 'Texts', 'Texts/s', 'Speedup', 'MAE', 'Max error', 'Exact', 'Labels'))
+    results = compare_backends(transformer, pd.Series(RULE_EXAMPLES), 'rules', args.show)
+    results += compare_backends(transformer, _load_fixture_texts(transformer), 'fixture', args.show)
+    for size in args.sizes:
+        results += compare_backends(transformer, _gen_texts(transformer, size), 'synthetic {}'.format(size),
+                                    args.show)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+
+# Run from the trending-sentiments directory: python -m benchmark.bench_backends [sizes...] [-o parity.json]
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+import json
+import re
+import sys
+import timeit
+
+import pandas as pd
+
+from app.transformer_pipeline import TransformerPipeline
+
+SAMPLE_SIZES = [1_000, 100_000, 1_000_000]
+
+
+# Per-tweet cleaner as it was before clean_tweets, kept as the baseline to measure against
+def _legacy_clean_tweet(tweet):
+    result = re.sub(r'https?://[A-Za-z0-9./]+', '', tweet)
+    result = re.sub(r'(#[A-Za-z0-9_]+)', '', result)
+    result = re.sub(r'(@[A-Za-z0-9_]+)', '', result)
+    return re.sub(r'\s+', ' ', result).strip()
+
+
+def _load_fixture_tweets():
+    with open('./test/resources/test_twitter_response.json', encoding='utf-8') as json_file:
+        json_data = json.load(json_file)['_json']
+    return TransformerPipeline().convert_json_to_dataframe(json_data)['tweet']
+
+
+def _gen_tweets(fixture_tweets, size, unique=False):
+    repeats = size // len(fixture_tweets) + 1
+    tweets = pd.concat([fixture_tweets] * repeats, ignore_index=True).head(size)
+    # Suffix every tweet with its row number so no two texts repeat
+    if unique:
+        tweets = tweets + ' ' + pd.Series(range(size)).astype(str)
+    return tweets
+
+
+def main(sample_sizes):
+    transformer = TransformerPipeline()
+    fixture_tweets = _load_fixture_tweets()
+    print('{:>10} {:>8} {:>12} {:>12} {:>8}'.format('Tweets', 'Texts', 'legacy (s)', 'batch (s)', 'Speedup'))
+    for size in sample_sizes:
+        for unique in (True, False):
+            tweets = _gen_tweets(fixture_tweets, size, unique)
+            # Batch output must match the legacy cleaner before timing means anything
+            assert transformer.clean_tweets(tweets).equals(tweets.apply(_legacy_clean_tweet))
+            legacy_time = min(timeit.repeat(lambda: tweets.apply(_legacy_clean_tweet), number=1, repeat=3))
+            batch_time = min(timeit.repeat(lambda: transformer.clean_tweets(tweets), number=1, repeat=3))
+            print('{:>10} {:>8} {:>12.4f} {:>12.4f} {:>7.1f}x'.format(
+                size, 'unique' if unique else 'fixture', legacy_time, batch_time, legacy_time / batch_time))
+
+
+# Run from the trending-sentiments directory: python -m benchmark.bench_clean_tweets [sizes...]
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SAMPLE_SIZES)
@@ -0,0 +1,70 @@
+import json
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from app.transformer_pipeline import TransformerPipeline
+
+SAMPLE_SIZES = [100_000]
+
+
+# Conversion as it was before the targeted extractor, kept as the baseline to measure against
+def _legacy_convert_json_to_dataframe(json_data):
+    cols_to_include = ['id', 'created_at', 'full_text', 'tweet', 'retweet_count', 'favorite_count',
+                       'entities.hashtags', 'user.id', 'user.screen_name']
+    dataframe = pd.json_normalize(json_data)
+    if 'full_text' in dataframe:
+        if 'retweeted_status.full_text' in dataframe:
+            dataframe['tweet'] = dataframe['retweeted_status.full_text'].fillna(dataframe['full_text'])
+            retweet_mask = ~dataframe['retweeted_status.full_text'].isnull()
+            retweet_tags = dataframe.loc[retweet_mask, 'full_text'].apply(lambda s: s.split(':')[0])
+            dataframe.loc[retweet_mask, 'full_text'] = retweet_tags + ': ' + dataframe.loc[retweet_mask, 'tweet']
+        else:
+            dataframe['tweet'] = dataframe['full_text']
+        dataframe['created_at'] = pd.to_datetime(dataframe['created_at'])
+        return dataframe[cols_to_include]
+
+
+def _gen_json_data(size):
+    with open('./test/resources/test_twitter_response.json', encoding='utf-8') as json_file:
+        fixture = json.load(json_file)['_json']
+    return [fixture[i % len(fixture)] for i in range(size)]
+
+
+def _time(convert, json_data):
+    start = time.perf_counter()
+    dataframe = convert(json_data)
+    return dataframe, time.perf_counter() - start
+
+
+# Memory is traced in its own run, tracemalloc slows allocations down too much to time the same run
+def _peak_memory(convert, json_data):
+    tracemalloc.start()
+    convert(json_data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def main(sample_sizes):
+    transformer = TransformerPipeline()
+    print('{:>10} {:>12} {:>12} {:>14} {:>14}'.format(
+        'Tweets', 'legacy (s)', 'new (s)', 'legacy (MiB)', 'new (MiB)'))
+    for size in sample_sizes:
+        json_data = _gen_json_data(size)
+        legacy_df, legacy_time = _time(_legacy_convert_json_to_dataframe, json_data)
+        new_df, new_time = _time(transformer.convert_json_to_dataframe, json_data)
+        # New output must match the legacy dataframe before the numbers mean anything
+        assert new_df.equals(legacy_df)
+        del legacy_df, new_df
+        legacy_peak = _peak_memory(_legacy_convert_json_to_dataframe, json_data)
+        new_peak = _peak_memory(transformer.convert_json_to_dataframe, json_data)
+        print('{:>10} {:>12.3f} {:>12.3f} {:>14.1f} {:>14.1f}'.format(
+            size, legacy_time, new_time, legacy_peak, new_peak))
+
+
+# Run from the trending-sentiments directory: python -m benchmark.bench_convert_json [sizes...]
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SAMPLE_SIZES)
@@ -0,0 +1,147 @@
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from app.sentiment_scorer import SentimentScorer
+from app.transformer_pipeline import TransformerPipeline
+from app.tweet_export import gen_export
+from benchmark.synthetic import gen_synthetic_tweets
+
+SAMPLE_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+# Slowdown over the baseline reported as a regression
+TOLERANCE = 0.1
+
+
+def _time(func, arg, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(arg)
+        times.append(time.perf_counter() - start)
+    return result, times
+
+
+# Memory is traced in its own run, tracemalloc slows allocations down too much to time the same run
+def _peak_memory(func, arg):
+    tracemalloc.start()
+    func(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+class _StageRunner:
+    """Times and memory profiles each pipeline stage, collecting one result per stage and sample size"""
+
+    def __init__(self, size, repeat, memory):
+        self.size = size
+        self.repeat = repeat
+        self.memory = memory
+        self.results = []
+
+    def run(self, stage, func, arg, repeat=None):
+        result, times = _time(func, arg, repeat or self.repeat)
+        peak = _peak_memory(func, arg) if self.memory else None
+        self.results.append({
+            'stage': stage,
+            'tweets': self.size,
+            'seconds': min(times),
+            'mean_seconds': sum(times) / len(times),
+            'tweets_per_second': self.size / min(times) if min(times) else None,
+            'peak_mib': peak,
+        })
+        print('{:>10} {:<30} {:>10.3f} {:>14.0f} {:>10}'.format(
+            self.size, stage, min(times), self.results[-1]['tweets_per_second'] or 0,
+            '-' if peak is None else '{:.1f}'.format(peak)))
+        return result
+
+
+def run_stages(size, repeat=3, memory=True, workers=1, backend='vader'):
+    transformer = TransformerPipeline()
+    runner = _StageRunner(size, repeat, memory)
+    json_data = gen_synthetic_tweets(size)
+    df = runner.run('convert_json_to_dataframe', transformer.convert_json_to_dataframe, json_data)
+    del json_data
+    runner.run('clean_tweet', lambda tweets: tweets.map(transformer.clean_tweet), df['tweet'])
+    cleaned = runner.run('clean_tweets', transformer.clean_tweets, df['tweet'])
+    # Scoring is by far the slowest stage, so it is only timed once
+    with SentimentScorer(workers=workers, backend=backend) as scorer:
+        scores = runner.run('score_tweets', scorer.score_tweets, cleaned, repeat=1)
+    df['sentiment_score'] = scores['compound']
+    df['sentiment_text'] = transformer.map_sentiment_labels(df['sentiment_score'])
+    runner.run('gen_tweets_by_time_dataframe', transformer.gen_tweets_by_time_dataframe, df)
+    runner.run('gen_hashtag_counts_dataframe', transformer.gen_hashtag_counts_dataframe, df)
+    df_display = df[['created_at', 'user.screen_name', 'full_text', 'sentiment_text', 'sentiment_score']]
+    runner.run('export_csv', lambda frame: gen_export(frame, 'csv'), df_display)
+    return runner.results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Compare against an earlier run, returning the stages that got slower by more than tolerance
+def compare_results(results, baseline, tolerance=TOLERANCE):
+    baseline_seconds = {(result['stage'], result['tweets']): result['seconds'] for result in baseline['results']}
+    regressions = []
+    print('\n{:>10} {:<30} {:>10} {:>10} {:>8}'.format('Tweets', 'Stage', 'base (s)', 'new (s)', 'Ratio'))
+    for result in results:
+        base = baseline_seconds.get((result['stage'], result['tweets']))
+        if base is None:
+            continue
+        ratio = result['seconds'] / base if base else float('inf')
+        print('{:>10} {:<30} {:>10.3f} {:>10.3f} {:>8.2f}'.format(
+            result['tweets'], result['stage'], base, result['seconds'], ratio))
+        if ratio > 1 + tolerance:
+            regressions.append(result)
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Benchmark each stage of the pipeline on synthetic tweets.')
+    parser.add_argument('sizes', nargs='*', type=int, default=SAMPLE_SIZES, help='numbers of tweets to generate')
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help='JSON file results are saved to')
+    parser.add_argument('-c', '--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='timed runs per stage, the fastest is kept')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='scoring processes')
+    parser.add_argument('-b', '--backend', default='vader', help='sentiment backend scoring the tweets')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='slowdown reported as a regression')
+    parser.add_argument('--no-memory', action='store_true', help='skip the traced memory runs')
+    args = parser.parse_args(args)
+
+    print('{:>10} {:<30} {:>10} {:>14} {:>10}'.format('Tweets', 'Stage', 'Time (s)', 'Tweets/s', 'Peak (MiB)'))
+    results = []
+    for size in args.sizes:
+        results.extend(run_stages(size, args.repeat, not args.no_memory, args.workers, args.backend))
+    report = {
+        'commit': _git_commit(),
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': args.backend,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            regressions = compare_results(results, json.load(file), args.tolerance)
+        if regressions:
+            print('\n{} stages slower than the baseline by more than {:.0%}'.format(len(regressions), args.tolerance))
+            return 1
+    return 0
+
+
+# Run from the trending-sentiments directory: python -m benchmark.bench_pipeline [sizes...] [-o results.json]
+if __name__ == '__main__':
+    sys.exit(main())
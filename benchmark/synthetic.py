@@ -0,0 +1,94 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+FIXTURE_PATH = './test/resources/test_twitter_response.json'
+# Roughly what a recent search for a trending hashtag returns
+RETWEET_RATIO = 0.5
+HASHTAGS_PER_TWEET = 1.5
+TWEETS_PER_SECOND = 20
+
+
+def _load_fixture():
+    with open(FIXTURE_PATH, encoding='utf-8') as json_file:
+        return json.load(json_file)['_json']
+
+
+def _gen_vocabulary(fixture):
+    words = sorted({word for tweet in fixture for word in tweet['full_text'].split()
+                    if word.isalpha() and not word.startswith(('#', '@'))})
+    hashtags = sorted({hashtag['text'] for tweet in fixture for hashtag in tweet['entities']['hashtags']})
+    return words, hashtags
+
+
+# Zipf distributed picks from range(n), popular items come up far more often than the rest
+def _zipf_choice(rng, n, size, exponent=1.2):
+    weights = 1 / np.arange(1, n + 1) ** exponent
+    return rng.choice(n, size=size, p=weights / weights.sum())
+
+
+# Generate size tweet dicts shaped like the search API's, built from the fixture's words and hashtags
+# Retweets repeat a popular original's text and hashtags, the rest are original tweets with unique text
+def gen_synthetic_tweets(size, seed=0, retweet_ratio=RETWEET_RATIO, hashtags_per_tweet=HASHTAGS_PER_TWEET):
+    rng = np.random.default_rng(seed)
+    words, fixture_hashtags = _gen_vocabulary(_load_fixture())
+    num_users = max(size // 4, 1)
+    screen_names = ['user_{}'.format(i) for i in range(num_users)]
+    hashtags = fixture_hashtags + ['tag{}'.format(i) for i in range(max(size // 50, 10))]
+
+    is_retweet = rng.random(size) < retweet_ratio
+    num_originals = max(int((~is_retweet).sum()), 1)
+    # Originals first: a few words, sometimes a mention or link, then their hashtags
+    word_counts = rng.integers(6, 20, num_originals)
+    word_picks = rng.integers(0, len(words), int(word_counts.sum()))
+    tag_counts = rng.poisson(hashtags_per_tweet, num_originals)
+    tag_picks = _zipf_choice(rng, len(hashtags), int(tag_counts.sum()))
+    has_mention = rng.random(num_originals) < 0.3
+    has_link = rng.random(num_originals) < 0.3
+    originals = []
+    word_start = tag_start = 0
+    for i in range(num_originals):
+        text = ' '.join(words[w] for w in word_picks[word_start:word_start + word_counts[i]])
+        tags = [hashtags[t] for t in tag_picks[tag_start:tag_start + tag_counts[i]]]
+        word_start += word_counts[i]
+        tag_start += tag_counts[i]
+        if has_mention[i]:
+            text = '@{} {}'.format(screen_names[(i + 1) % num_users], text)
+        if has_link[i]:
+            text += ' https://t.co/{:010x}'.format(i)
+        if tags:
+            text += ' ' + ' '.join('#' + tag for tag in tags)
+        originals.append((screen_names[i % num_users], text, tags))
+
+    # Newest first, as the search endpoint returns them
+    created = pd.to_datetime(1616768010 - np.sort(rng.integers(0, max(size // TWEETS_PER_SECOND, 1), size)),
+                             unit='s')
+    created_at = created.strftime('%a %b %d %H:%M:%S +0000 %Y')
+    users = rng.integers(0, num_users, size)
+    retweeted = _zipf_choice(rng, num_originals, size)
+    retweet_counts = rng.geometric(0.05, size) - 1
+    favorite_counts = rng.geometric(0.1, size) - 1
+    tweets = []
+    original = 0
+    for i in range(size):
+        if is_retweet[i]:
+            author, text, tags = originals[retweeted[i]]
+            full_text = 'RT @{}: {}'.format(author, text)
+        else:
+            author, text, tags = originals[original]
+            full_text = text
+            original += 1
+        tweet = {
+            'id': 1375000000000000000 + i,
+            'created_at': created_at[i],
+            'full_text': full_text,
+            'retweet_count': int(retweet_counts[i]),
+            'favorite_count': int(favorite_counts[i]),
+            'entities': {'hashtags': [{'text': tag} for tag in tags]},
+            'user': {'id': 1000 + int(users[i]), 'screen_name': screen_names[users[i]]},
+        }
+        if is_retweet[i]:
+            tweet['retweeted_status'] = {'full_text': text}
+        tweets.append(tweet)
+    return tweets
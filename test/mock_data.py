@@ -0,0 +1,33 @@
+import json
+import numpy as np
+
+from app.transformer_pipeline import TransformerPipeline
+
+MOCK_RESPONSE_PATH = './test/resources/test_twitter_response.json'
+
+
+def load_mock_json():
+    with open(MOCK_RESPONSE_PATH, encoding='utf-8') as json_file:
+        json_data = json.load(json_file)
+        return json_data['_json']
+
+
+def get_mock_sentiment_predictions(df):
+    df_copy = df.copy()
+    mock_scores = np.arange(-1.0, 1, 0.2)
+    mock_text = ['Negative'] * 5 + ['Neutral'] + ['Positive'] * 4
+    df_copy['sentiment_score'] = mock_scores
+    df_copy['sentiment_text'] = mock_text
+    return df_copy
+
+
+# The mock tweets with mock sentiment predictions, ranging from -1.0 to 0.8
+def load_mock_df():
+    df = TransformerPipeline().convert_json_to_dataframe(load_mock_json())
+    return get_mock_sentiment_predictions(df)
+
+
+# The cleaned text of the mock tweets, as they are passed to the sentiment scorer
+def load_mock_tweets():
+    transformer = TransformerPipeline()
+    return transformer.clean_tweets(transformer.convert_json_to_dataframe(load_mock_json())['tweet'])
@@ -0,0 +1,226 @@
+import unittest
+import asyncio
+
+from aiohttp import web
+
+from app.async_twitter import AsyncTwitterClient, ClientThread, RateLimiter, TwitterAPIError
+from test.mock_data import load_mock_json
+
+
+class _MockClock:
+    """Clock advanced by the mock sleep, so rate limit waits take no real time"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class _MockTwitterServer:
+    """Local stand-in for the Twitter API serving the mock tweets in pages"""
+
+    def __init__(self, failures=0, delay=0.05):
+        self.tweets = load_mock_json()
+        self.failures = failures
+        self.delay = delay
+        self.requests = []
+        self.token_requests = 0
+        self.active = 0
+        self.max_active = 0
+        app = web.Application()
+        app.router.add_post('/oauth2/token', self.token)
+        app.router.add_get('/1.1/search/tweets.json', self.search)
+        app.router.add_get('/1.1/application/rate_limit_status.json', self.rate_limit_status)
+        self.runner = web.AppRunner(app)
+
+    async def start(self):
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return 'http://127.0.0.1:{}'.format(port)
+
+    async def token(self, request):
+        self.token_requests += 1
+        await asyncio.sleep(self.delay)
+        return web.json_response({'token_type': 'bearer', 'access_token': 'mock-token'})
+
+    async def rate_limit_status(self, request):
+        self.requests.append(('rate_limit_status', None))
+        return web.json_response({'resources': {'search': {'/search/tweets': {
+            'limit': 450, 'remaining': 200, 'reset': 2000}}}})
+
+    async def search(self, request):
+        self.requests.append(('search', request.query.get('q')))
+        if self.failures:
+            self.failures -= 1
+            return web.json_response({'errors': [{'message': 'Rate limit exceeded'}]}, status=429,
+                                     headers={'x-rate-limit-remaining': '0', 'x-rate-limit-reset': '1060'})
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        count = int(request.query['count'])
+        start = int(request.query.get('max_id', 0))
+        statuses = self.tweets[start:start + count]
+        metadata = {}
+        if start + count < len(self.tweets):
+            metadata['next_results'] = '?max_id={}&q={}&count={}'.format(start + count, request.query['q'], count)
+        return web.json_response({'statuses': statuses, 'search_metadata': metadata},
+                                 headers={'x-rate-limit-remaining': '400', 'x-rate-limit-reset': '1900'})
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+    """Tests the spreading of requests across the rate limit window"""
+
+    async def test_acquire_spreads_requests(self):
+        clock = _MockClock()
+        limiter = RateLimiter(limit=100, window=100, burst=2, clock=clock, sleep=clock.sleep)
+
+        for _ in range(6):
+            await limiter.acquire()
+
+        # The burst goes straight through, the rest wait about one second each
+        self.assertEqual(len(clock.sleeps), 4)
+        self.assertAlmostEqual(clock.now - 1000.0, 4.0, delta=0.5)
+
+    async def test_acquire_waits_for_reset(self):
+        clock = _MockClock()
+        limiter = RateLimiter(limit=100, window=100, clock=clock, sleep=clock.sleep)
+        limiter.update(0, 1030)
+
+        await limiter.acquire()
+
+        self.assertGreaterEqual(clock.now, 1030)
+        self.assertEqual(limiter.remaining, 99)
+
+
+class TestAsyncTwitterClient(unittest.IsolatedAsyncioTestCase):
+    """Tests searching the mock Twitter API concurrently and within rate limits"""
+
+    async def asyncSetUp(self):
+        self.clock = _MockClock()
+
+    async def asyncTearDown(self):
+        await self.server.runner.cleanup()
+
+    async def _start_client(self, server, **kwargs):
+        self.server = server
+        base_url = await server.start()
+        limiter = RateLimiter(burst=10, clock=self.clock, sleep=self.clock.sleep)
+        return AsyncTwitterClient('key', 'secret', base_url=base_url, limiter=limiter, clock=self.clock,
+                                  sleep=self.clock.sleep, **kwargs)
+
+    async def test_search_pages(self):
+        client = await self._start_client(_MockTwitterServer())
+
+        async with client:
+            pages = [page async for page in client.search_pages('#Avatar', 7)]
+
+        self.assertListEqual([len(page) for page in pages], [7])
+        self.assertListEqual([tweet['id'] for tweet in pages[0]], [tweet['id'] for tweet in load_mock_json()[:7]])
+        self.assertEqual(client.limiter.remaining, 400)
+
+    async def test_search(self):
+        client = await self._start_client(_MockTwitterServer())
+
+        async with client:
+            tweets = await client.search('#Avatar', 25)
+
+        self.assertEqual(len(tweets), 10)
+
+    async def test_search_many(self):
+        server = _MockTwitterServer(delay=0.2)
+        client = await self._start_client(server)
+
+        async with client:
+            results = await client.search_many(['#Avatar', '#Avatar2', '#NFL'], 10)
+
+        self.assertListEqual(sorted(results), ['#Avatar', '#Avatar2', '#NFL'])
+        self.assertTrue(all(len(tweets) == 10 for tweets in results.values()))
+        # Searches overlap on the pooled session, sharing one bearer token request
+        self.assertEqual(server.max_active, 3)
+        self.assertEqual(server.token_requests, 1)
+
+    async def test_search_retries_rate_limited_requests(self):
+        server = _MockTwitterServer(failures=2)
+        client = await self._start_client(server, backoff=0.5)
+
+        async with client:
+            tweets = await client.search('#Avatar', 10)
+
+        self.assertEqual(len(tweets), 10)
+        self.assertEqual(len(server.requests), 3)
+        # The limiter waits for the reset the 429 reported
+        self.assertGreaterEqual(self.clock.now, 1060)
+
+    async def test_search_gives_up_after_retries(self):
+        server = _MockTwitterServer(failures=10)
+        client = await self._start_client(server, max_retries=2)
+
+        async with client:
+            with self.assertRaises(TwitterAPIError):
+                await client.search('#Avatar', 10)
+
+        self.assertEqual(len(server.requests), 3)
+
+    async def test_rate_limit_status_is_cached(self):
+        server = _MockTwitterServer()
+        client = await self._start_client(server)
+
+        async with client:
+            first = await client.rate_limit_status()
+            second = await client.rate_limit_status()
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(client.limiter.remaining, 200)
+
+    async def test_rate_limit_status_expires(self):
+        server = _MockTwitterServer()
+        client = await self._start_client(server, rate_limit_ttl=60)
+
+        async with client:
+            await client.rate_limit_status()
+            self.clock.now += 59
+            await client.rate_limit_status()
+            self.clock.now += 1
+            await client.rate_limit_status()
+
+        self.assertEqual(len(server.requests), 2)
+
+
+
+class TestClientThread(unittest.TestCase):
+    """Tests keeping one client open across calls from synchronous code"""
+
+    def test_reuses_client_across_calls(self):
+        server = _MockTwitterServer()
+        client = AsyncTwitterClient('key', 'secret')
+        thread = ClientThread(client)
+        # The mock server runs on the client's own loop
+        client.base_url = thread.run(server.start())
+
+        status = thread.rate_limit_status()
+        first = thread.search_many(['#Avatar', '#NFL'], 10)
+        second = thread.search_many(['#Avatar'], 5)
+        thread.run(server.runner.cleanup())
+        thread.close()
+
+        self.assertEqual(status['remaining'], 200)
+        self.assertTrue(all(len(tweets) == 10 for tweets in first.values()))
+        self.assertEqual(len(second['#Avatar']), 5)
+        # One token and one session serve every call, the limiter follows the latest response
+        self.assertEqual(server.token_requests, 1)
+        self.assertEqual(client.limiter.remaining, 400)
+        self.assertFalse(thread.loop.is_running())
+
+
+if __name__ == '__main__':
+    unittest.main()
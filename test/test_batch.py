@@ -0,0 +1,79 @@
+import unittest
+import gzip
+import json
+import os
+import tempfile
+import pandas as pd
+
+from app.batch import read_tweet_chunks, run_batch
+from app.tweet_store import TweetStore
+from test.mock_data import MOCK_RESPONSE_PATH, load_mock_df, load_mock_json
+
+
+def _write_mock_jsonl(path):
+    with gzip.open(path, 'wt', encoding='utf-8') if path.endswith('.gz') else open(path, 'w', encoding='utf-8') \
+            as jsonl_file:
+        for tweet in load_mock_json():
+            jsonl_file.write(json.dumps(tweet) + '\n')
+
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class TestBatch(unittest.TestCase):
+    """Tests the headless scoring of tweet archives"""
+
+    def test_read_tweet_chunks(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            jsonl_path = os.path.join(tmp_dir, 'tweets.jsonl.gz')
+            _write_mock_jsonl(jsonl_path)
+            paths = [jsonl_path, MOCK_RESPONSE_PATH]
+
+            chunks = list(read_tweet_chunks(paths, chunk_size=4))
+
+        self.assertListEqual([len(chunk) for chunk in chunks], [4, 4, 4, 4, 4])
+        self.assertListEqual([tweet['id'] for chunk in chunks for tweet in chunk],
+                             [tweet['id'] for tweet in load_mock_json()] * 2)
+
+    def test_run_batch(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            jsonl_path = os.path.join(tmp_dir, 'tweets.jsonl')
+            _write_mock_jsonl(jsonl_path)
+            output_dir = os.path.join(tmp_dir, 'output')
+
+            summary = run_batch([jsonl_path], output_dir, chunk_size=3, workers=1)
+            tweets = pd.read_csv(os.path.join(output_dir, 'tweets.csv'))
+            hashtag_counts = pd.read_csv(os.path.join(output_dir, 'hashtag_counts.csv'))
+            user_counts = pd.read_csv(os.path.join(output_dir, 'user_counts.csv'))
+            tweets_by_time = pd.read_csv(os.path.join(output_dir, 'tweets_by_time.csv'))
+
+        self.assertEqual(summary['Tweets'][0], 10)
+        self.assertGreater(summary['Tweets Per Second'][0], 0)
+        self.assertEqual(len(tweets), 10)
+        self.assertListEqual(tweets['id'].to_list(), [tweet['id'] for tweet in load_mock_json()])
+        # Counts summed over the chunks match counting every tweet's store at once
+        expected_store = TweetStore.from_dataframe(load_mock_df())
+        pd.testing.assert_frame_equal(hashtag_counts, expected_store.gen_hashtag_counts_dataframe())
+        expected_users = expected_store.gen_user_counts_series()
+        self.assertListEqual(user_counts['User'].to_list(), expected_users.index.to_list())
+        self.assertListEqual(user_counts['Tweets'].to_list(), expected_users.to_list())
+        self.assertEqual(hashtag_counts.set_index('Hashtag')['Count']['trm'], 9)
+        self.assertEqual(tweets_by_time['Tweets'].sum(), 10)
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_run_batch_parquet(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_dir = os.path.join(tmp_dir, 'output')
+
+            run_batch([MOCK_RESPONSE_PATH], output_dir, 'parquet', chunk_size=4, workers=1)
+            tweets = pd.read_parquet(os.path.join(output_dir, 'tweets.parquet'))
+
+        self.assertEqual(len(tweets), 10)
+        self.assertEqual(str(tweets['sentiment_score'].dtype), 'float32')
+
+
+if __name__ == '__main__':
+    unittest.main()
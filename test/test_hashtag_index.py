@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+
+from app.hashtag_index import HashtagIndex
+from app.transformer_pipeline import TransformerPipeline
+from app.tweet_store import HashtagColumn, TweetStore
+from test.mock_data import load_mock_df
+
+
+def _gen_mock_hashtags(tweets):
+    return HashtagColumn.from_entities([[{'text': tag} for tag in tags] for tags in tweets])
+
+
+class TestHashtagIndex(unittest.TestCase):
+    """Tests the indexing of hashtag counts, co-occurrence and sentiment"""
+
+    transformer = TransformerPipeline()
+
+    def test_top_dataframe(self):
+        mock_df = load_mock_df()
+        expected_df = self.transformer.gen_hashtag_counts_dataframe(mock_df)
+
+        index = HashtagIndex.from_store(TweetStore.from_dataframe(mock_df))
+        test_df = index.top_dataframe(len(expected_df))
+
+        self.assertDictEqual(dict(zip(test_df['Hashtag'], test_df['Count'])),
+                             dict(zip(expected_df['Hashtag'], expected_df['Count'])))
+        self.assertListEqual(index.top_dataframe(3)['Hashtag'].to_list(), ['richracer', 'trm', 'psn'])
+
+    def test_related_dataframe(self):
+        hashtags = _gen_mock_hashtags([['Avatar', 'avatar2', 'Film'], ['avatar', 'film'], ['avatar2'], ['nfl']])
+
+        index = HashtagIndex(hashtags)
+
+        test_df = index.related_dataframe('#AVATAR')
+        self.assertListEqual(test_df['Hashtag'].to_list(), ['film', 'avatar2'])
+        self.assertListEqual(test_df['Tweets'].to_list(), [2, 1])
+        self.assertEqual(len(index.related_dataframe('nfl')), 0)
+        self.assertEqual(len(index.related_dataframe('missing')), 0)
+        self.assertIn('#Film', index)
+
+    def test_sentiment_dataframe(self):
+        hashtags = _gen_mock_hashtags([['a', 'A', 'b'], ['a'], ['b'], []])
+        scores = [0.5, -0.5, 1.0, 0.9]
+
+        test_df = HashtagIndex(hashtags, scores).sentiment_dataframe()
+
+        # Repeated hashtags in one tweet count twice but only weigh the tweet's sentiment once
+        self.assertListEqual(test_df['Hashtag'].to_list(), ['a', 'b'])
+        self.assertListEqual(test_df['Tweets'].to_list(), [2, 2])
+        np.testing.assert_allclose(test_df['Sentiment Score'], [0.0, 0.75])
+
+    def test_empty(self):
+        index = HashtagIndex(_gen_mock_hashtags([[], []]), [0.1, 0.2])
+
+        self.assertEqual(len(index), 0)
+        self.assertEqual(len(index.top_dataframe()), 0)
+        self.assertEqual(len(index.sentiment_dataframe()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import json
+import threading
+import urllib.request
+import pandas as pd
+
+from app.metrics import Metrics, serve_metrics
+
+
+class TestMetrics(unittest.TestCase):
+    """Tests the recording and export of per-stage metrics"""
+
+    def setUp(self):
+        self.metrics = Metrics(buckets=(0.1, 1.0))
+
+    def tearDown(self):
+        self.metrics.disable()
+
+    def test_disabled_records_nothing(self):
+        @self.metrics.timed('double')
+        def double(series):
+            return series * 2
+
+        with self.metrics.stage('stage') as stage:
+            stage.rows = 10
+        result = double(pd.Series([1, 2]))
+
+        self.assertListEqual(result.tolist(), [2, 4])
+        self.assertDictEqual(self.metrics.snapshot(), {})
+
+    def test_stage(self):
+        self.metrics.enable()
+
+        with self.metrics.stage('fetch') as stage:
+            stage.rows = 100
+        with self.metrics.stage('fetch', rows=50):
+            pass
+        self.metrics.record('fetch', 0.5)
+        self.metrics.record('fetch', 2.0)
+
+        snapshot = self.metrics.snapshot()['fetch']
+        self.assertEqual(snapshot['count'], 4)
+        self.assertEqual(snapshot['rows'], 150)
+        self.assertEqual(snapshot['max_seconds'], 2.0)
+        self.assertDictEqual(snapshot['buckets'], {'0.1': 2, '1.0': 1, '+Inf': 1})
+        self.assertIsNone(snapshot['peak_bytes'])
+
+    def test_timed(self):
+        self.metrics.enable()
+
+        class Pipeline:
+            @self.metrics.timed()
+            def double(self, series):
+                return series * 2
+
+            @self.metrics.timed()
+            def label(self, score):
+                return 'Positive'
+
+        pipeline = Pipeline()
+        pipeline.double(pd.Series([1, 2, 3]))
+        pipeline.label(0.5)
+
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['TestMetrics.test_timed.<locals>.Pipeline.double']['rows'], 3)
+        self.assertIsNone(snapshot['TestMetrics.test_timed.<locals>.Pipeline.label']['rows'])
+
+    def test_stage_peak_memory(self):
+        self.metrics.enable(trace_memory=True)
+
+        with self.metrics.stage('outer'):
+            with self.metrics.stage('inner'):
+                data = bytearray(2 * 10 ** 6)
+                del data
+            data = bytearray(10 ** 6)
+            del data
+
+        snapshot = self.metrics.snapshot()
+        self.assertGreaterEqual(snapshot['inner']['peak_bytes'], 2 * 10 ** 6)
+        # The inner stage's peak counts toward the outer stage
+        self.assertGreaterEqual(snapshot['outer']['peak_bytes'], 2 * 10 ** 6)
+        self.assertLess(snapshot['outer']['peak_bytes'], 3 * 10 ** 6)
+
+    def test_stage_peak_memory_threads(self):
+        self.metrics.enable(trace_memory=True)
+        entered = threading.Event()
+        allocated = threading.Event()
+
+        def other_session():
+            allocated.wait()
+            # Entering a stage resets the process wide peak while the main thread's stage is open
+            with self.metrics.stage('other'):
+                entered.set()
+
+        thread = threading.Thread(target=other_session)
+        thread.start()
+        with self.metrics.stage('main'):
+            data = bytearray(2 * 10 ** 6)
+            del data
+            allocated.set()
+            entered.wait()
+        thread.join()
+
+        self.assertGreaterEqual(self.metrics.snapshot()['main']['peak_bytes'], 2 * 10 ** 6)
+
+    def test_gen_summary_dataframe(self):
+        self.metrics.enable()
+        self.metrics.record('score', 0.5, rows=10)
+        self.metrics.record('score', 1.5, rows=20)
+
+        test_df = self.metrics.gen_summary_dataframe()
+
+        self.assertListEqual(test_df.columns.tolist(),
+                             ['Stage', 'Calls', 'Total (s)', 'Mean (ms)', 'Max (ms)', 'Rows', 'Peak (MiB)'])
+        self.assertListEqual(test_df.iloc[0].tolist(), ['score', 2, 2.0, 1000.0, 1500.0, 30, None])
+
+    def test_export(self):
+        self.metrics.enable()
+        self.metrics.record('score', 0.05, rows=10)
+        self.metrics.record('score', 0.5, rows=20)
+
+        prometheus = self.metrics.to_prometheus().splitlines()
+
+        self.assertIn('trending_sentiments_stage_seconds_bucket{stage="score",le="0.1"} 1', prometheus)
+        self.assertIn('trending_sentiments_stage_seconds_bucket{stage="score",le="1.0"} 2', prometheus)
+        self.assertIn('trending_sentiments_stage_seconds_bucket{stage="score",le="+Inf"} 2', prometheus)
+        self.assertIn('trending_sentiments_stage_seconds_count{stage="score"} 2', prometheus)
+        self.assertIn('trending_sentiments_stage_rows_total{stage="score"} 30', prometheus)
+        self.assertEqual(json.loads(self.metrics.to_json())['score']['count'], 2)
+
+    def test_serve_metrics(self):
+        self.metrics.enable()
+        self.metrics.record('score', 0.05)
+        server = serve_metrics(self.metrics, 0, host='127.0.0.1')
+
+        try:
+            url = 'http://127.0.0.1:{}/metrics'.format(server.server_address[1])
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(body, self.metrics.to_prometheus())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import pandas as pd
+
+from app.query_comparison import QueryComparison, split_queries
+from app.sentiment_scorer import SentimentScorer
+from app.transformer_pipeline import TransformerPipeline
+from test.mock_data import load_mock_json
+
+
+class _CountingScorer(SentimentScorer):
+    """Records how many tweets are scored"""
+
+    scored = 0
+
+    def score_tweets(self, series):
+        self.scored += len(series)
+        return super().score_tweets(series)
+
+
+class TestQueryComparison(unittest.TestCase):
+    """Tests comparing the tweets of several searches"""
+
+    transformer = TransformerPipeline()
+
+    def _gen_results(self):
+        mock_json = load_mock_json()
+        # The middle tweets are found by both searches
+        return {'#Avatar': mock_json[:7], '#Avatar2': mock_json[3:]}
+
+    def test_split_queries(self):
+        self.assertListEqual(split_queries('#Avatar, #Avatar2,,#Avatar ,nfl'), ['#Avatar', '#Avatar2', 'nfl'])
+        self.assertListEqual(split_queries(' '), [])
+
+    def test_from_results_scores_each_tweet_once(self):
+        scorer = _CountingScorer(workers=1)
+        comparison = QueryComparison.from_results(self.transformer, scorer, self._gen_results())
+
+        self.assertEqual(scorer.scored, 10)
+        self.assertEqual(len(comparison), 10)
+        self.assertEqual(comparison.shared_tweets, 4)
+        self.assertListEqual(comparison.queries, ['#Avatar', '#Avatar2'])
+
+    def test_frame(self):
+        scorer = SentimentScorer(workers=1)
+        results = self._gen_results()
+        comparison = QueryComparison.from_results(self.transformer, scorer, results)
+
+        for query, tweets in results.items():
+            test_df = comparison.frame(query)
+            expected_df = self.transformer.convert_json_to_dataframe(tweets)
+            expected_df['sentiment_score'] = scorer.score_tweets(
+                self.transformer.clean_tweets(expected_df['tweet']))['compound']
+
+            self.assertListEqual(test_df['id'].tolist(), expected_df['id'].tolist())
+            self.assertListEqual(test_df['sentiment_score'].tolist(),
+                                 expected_df['sentiment_score'].astype('float32').tolist())
+            pd.testing.assert_frame_equal(
+                self.transformer.gen_tweets_by_time_dataframe(test_df, 'second'),
+                self.transformer.gen_tweets_by_time_dataframe(expected_df, 'second'))
+
+    def test_gen_summary_dataframe(self):
+        comparison = QueryComparison.from_results(self.transformer, SentimentScorer(workers=1), self._gen_results())
+
+        test_df = comparison.gen_summary_dataframe()
+
+        self.assertListEqual(test_df['Query'].tolist(), ['#Avatar', '#Avatar2'])
+        self.assertListEqual(test_df['Tweets'].tolist(), [7, 7])
+        self.assertListEqual(test_df['Shared Tweets'].tolist(), [4, 4])
+        self.assertAlmostEqual(test_df['Sentiment Score'][0],
+                               comparison.frame('#Avatar')['sentiment_score'].astype('float64').mean())
+
+    def test_from_results_without_tweets(self):
+        comparison = QueryComparison.from_results(self.transformer, SentimentScorer(workers=1), {'#Avatar': []})
+
+        self.assertIsNone(comparison)
+
+
+if __name__ == '__main__':
+    unittest.main()
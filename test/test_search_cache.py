@@ -0,0 +1,60 @@
+import unittest
+
+from app.search_cache import SearchCache
+
+
+class _MockClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSearchCache(unittest.TestCase):
+    """Tests the bounded caching of search results"""
+
+    def test_get(self):
+        cache = SearchCache()
+        cache.put(('#Avatar', 100), 'result')
+
+        self.assertEqual(cache.get(('#Avatar', 100)), 'result')
+        self.assertIsNone(cache.get(('#Avatar', 200)))
+
+    def test_ttl(self):
+        clock = _MockClock()
+        cache = SearchCache(ttl=60, clock=clock)
+        cache.put('key', 'result')
+
+        clock.now = 59
+        self.assertEqual(cache.get('key'), 'result')
+        clock.now = 60
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(len(cache), 0)
+
+    def test_max_entries(self):
+        cache = SearchCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        # Touch the oldest entry so the second one is evicted instead
+        cache.get('a')
+        cache.put('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_max_bytes(self):
+        cache = SearchCache(max_bytes=100)
+        cache.put('a', 1, size=60)
+        cache.put('b', 2, size=60)
+        cache.put('c', 3, size=101)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 2)
+        self.assertIsNone(cache.get('c'))
+        self.assertEqual(cache.total_bytes, 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from app.sentiment_backends import BACKENDS, LexiconBackend, VaderBackend, get_backend
+from app.sentiment_cache import SentimentCache
+from app.sentiment_scorer import SentimentScorer, SCORE_COLUMNS
+from test.mock_data import load_mock_tweets
+
+# Sentences exercising each of VADER's rules
+RULE_SENTENCES = [
+    'VADER is VERY SMART, handsome, and FUNNY!!!',
+    'VADER is not smart, handsome, nor funny.',
+    'At least it isn\'t a horrible book.',
+    'The book was only kind of good.',
+    'The plot was good, but the characters are uncompelling and the dialog is not great.',
+    'Today only kinda sux! But I\'ll get by, lol',
+    'THIS LOL BUT DISTRACTING ADEQUATE',
+    ':[ but :^\\ fu kind :-p',
+    'Make sure you :) or :D today!',
+    'Catch utf-8 emoji such as \U0001f498 and \U0001f48b and \U0001f601',
+    'Sentiment analysis has never been this good!',
+    'Without a doubt, excellent idea.',
+    'Roger Dodger is one of the least compelling variations on this theme.',
+    'With VADER, sentiment analysis is the shit!',
+    'no good no bad no',
+    'Why would anyone do that????',
+    '',
+]
+
+
+class TestSentimentBackends(unittest.TestCase):
+    """Tests the vectorized lexicon backend against VADER"""
+
+    def test_lexicon_matches_vader(self):
+        texts = list(load_mock_tweets()) + RULE_SENTENCES
+
+        expected = VaderBackend().score(texts)
+        test_scores = LexiconBackend().score(texts)
+
+        self.assertEqual(test_scores.dtype, np.float32)
+        self.assertEqual(test_scores.shape, (len(texts), len(SCORE_COLUMNS)))
+        np.testing.assert_allclose(test_scores, expected, atol=1e-6)
+
+    def test_lexicon_empty(self):
+        test_scores = LexiconBackend().score(['', '  '])
+
+        np.testing.assert_array_equal(test_scores, np.zeros((2, len(SCORE_COLUMNS))))
+        self.assertEqual(LexiconBackend().score([]).shape, (0, len(SCORE_COLUMNS)))
+
+    def test_get_backend(self):
+        self.assertSetEqual(set(BACKENDS), {'vader', 'lexicon'})
+        self.assertIsInstance(get_backend('lexicon'), LexiconBackend)
+        self.assertIs(get_backend('lexicon'), get_backend('lexicon'))
+        with self.assertRaises(ValueError):
+            get_backend('unknown')
+        with self.assertRaises(ValueError):
+            SentimentScorer(backend='unknown')
+
+    def test_score_tweets_lexicon(self):
+        mock_tweets = pd.concat([load_mock_tweets()] * 3, ignore_index=True)
+        expected_df = SentimentScorer(workers=1).score_tweets(mock_tweets)
+
+        test_df = SentimentScorer(workers=1, backend='lexicon').score_tweets(mock_tweets)
+        parallel_df = SentimentScorer(workers=2, chunk_size=4, min_parallel_size=0,
+                                      backend='lexicon').score_tweets(mock_tweets)
+
+        self.assertTrue(test_df.equals(expected_df))
+        self.assertTrue(parallel_df.equals(expected_df))
+
+    def test_score_tweets_cached_per_backend(self):
+        mock_tweets = load_mock_tweets()
+        cache = SentimentCache()
+
+        SentimentScorer(workers=1, cache=cache).score_tweets(mock_tweets)
+        SentimentScorer(workers=1, cache=cache, backend='lexicon').score_tweets(mock_tweets)
+
+        # Each backend keeps its own scores
+        self.assertEqual(len(cache), 2 * mock_tweets.nunique())
+        self.assertEqual(cache.hits, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
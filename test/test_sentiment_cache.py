@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from app.sentiment_cache import SentimentCache
+
+
+class TestSentimentCache(unittest.TestCase):
+    """Tests the caching of sentiment scores in memory and on disk"""
+
+    def test_get_many(self):
+        cache = SentimentCache()
+        keys = [cache.key('good day'), cache.key('bad day')]
+        cache.put_many(keys[:1], np.array([[0.0, 0.2, 0.8, 0.44]], dtype=np.float32))
+
+        found = cache.get_many(keys)
+
+        self.assertListEqual(list(found), keys[:1])
+        np.testing.assert_allclose(found[keys[0]], [0.0, 0.2, 0.8, 0.44], atol=1e-6)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_lru_eviction(self):
+        cache = SentimentCache(max_size=2)
+        keys = [cache.key(text) for text in ['a', 'b', 'c']]
+        scores = np.zeros((1, 4), dtype=np.float32)
+        cache.put_many(keys[:1], scores)
+        cache.put_many(keys[1:2], scores)
+        # Touch the oldest entry so the second one is evicted instead
+        cache.get_many(keys[:1])
+        cache.put_many(keys[2:], scores)
+
+        self.assertEqual(len(cache), 2)
+        self.assertListEqual(sorted(cache.get_many(keys)), sorted([keys[0], keys[2]]))
+
+    def test_disk_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'sentiment.db')
+            cache = SentimentCache(path=path)
+            keys = [cache.key('text {}'.format(i)) for i in range(1000)]
+            cache.put_many(keys, np.ones((len(keys), 4), dtype=np.float32))
+            cache.close()
+
+            reopened = SentimentCache(max_size=10, path=path)
+            found = reopened.get_many(keys)
+            reopened.close()
+
+            self.assertEqual(len(found), len(keys))
+            self.assertEqual(len(reopened), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from app.sentiment_cache import SentimentCache
+from app.sentiment_scorer import SentimentScorer, SCORE_COLUMNS
+from test.mock_data import load_mock_tweets
+
+
+class TestSentimentScorer(unittest.TestCase):
+    """Tests the scoring of tweet sentiments with VADER"""
+
+    def test_score_tweets(self):
+        mock_tweets = load_mock_tweets()
+        analyzer = SentimentIntensityAnalyzer()
+        expected_compound = [analyzer.polarity_scores(tweet)['compound'] for tweet in mock_tweets]
+
+        test_df = SentimentScorer(workers=1).score_tweets(mock_tweets)
+
+        self.assertListEqual(list(test_df), SCORE_COLUMNS)
+        self.assertTrue(test_df.index.equals(mock_tweets.index))
+        for col in SCORE_COLUMNS:
+            self.assertEqual(test_df[col].dtype, np.float32)
+        np.testing.assert_allclose(test_df['compound'], expected_compound, atol=1e-6)
+
+    def test_score_tweets_parallel(self):
+        mock_tweets = pd.concat([load_mock_tweets()] * 3, ignore_index=True)
+        expected_df = SentimentScorer(workers=1).score_tweets(mock_tweets)
+
+        test_df = SentimentScorer(workers=2, chunk_size=4, min_parallel_size=0).score_tweets(mock_tweets)
+
+        self.assertTrue(test_df.equals(expected_df))
+
+    def test_score_tweets_parallel_default_chunks(self):
+        mock_tweets = pd.concat([load_mock_tweets()] * 3, ignore_index=True)
+        expected_df = SentimentScorer(workers=1).score_tweets(mock_tweets)
+        scorer = SentimentScorer(workers=3, min_parallel_size=0)
+
+        test_df = scorer.score_tweets(mock_tweets)
+
+        self.assertTrue(test_df.equals(expected_df))
+        # Every worker gets one chunk of the distinct texts
+        self.assertListEqual([len(chunk) for chunk in scorer._split(list(range(10)))], [4, 4, 2])
+        self.assertListEqual([len(chunk) for chunk in scorer._split(list(range(2)))], [1, 1])
+
+    def test_score_tweets_pooled(self):
+        mock_tweets = pd.concat([load_mock_tweets()] * 3, ignore_index=True)
+        expected_df = SentimentScorer(workers=1).score_tweets(mock_tweets)
+
+        with SentimentScorer(workers=2, chunk_size=4, min_parallel_size=0) as scorer:
+            first_df = scorer.score_tweets(mock_tweets)
+            second_df = scorer.score_tweets(mock_tweets.head(5))
+
+        self.assertTrue(first_df.equals(expected_df))
+        self.assertTrue(second_df.equals(expected_df.head(5)))
+        self.assertIsNone(scorer._executor)
+
+    def test_score_tweets_cached(self):
+        mock_tweets = load_mock_tweets()
+        cache = SentimentCache()
+        scorer = SentimentScorer(workers=1, cache=cache)
+        expected_df = SentimentScorer(workers=1).score_tweets(mock_tweets)
+        num_unique = mock_tweets.nunique()
+
+        first_df = scorer.score_tweets(mock_tweets)
+        second_df = scorer.score_tweets(mock_tweets)
+
+        self.assertTrue(first_df.equals(expected_df))
+        self.assertTrue(second_df.equals(expected_df))
+        # Duplicate tweets are only looked up once per call
+        self.assertEqual(cache.misses, num_unique)
+        self.assertEqual(cache.hits, num_unique)
+
+    def test_score_tweets_empty(self):
+        test_df = SentimentScorer(workers=2, min_parallel_size=0).score_tweets(pd.Series([], dtype='object'))
+
+        self.assertEqual(len(test_df), 0)
+        self.assertListEqual(list(test_df), SCORE_COLUMNS)
+
+
+if __name__ == '__main__':
+    unittest.main()
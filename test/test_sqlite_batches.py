@@ -0,0 +1,23 @@
+import sqlite3
+import unittest
+
+from app.sqlite_batches import SQLITE_BATCH_SIZE, select_in
+
+
+class TestSqliteBatches(unittest.TestCase):
+    """Tests selecting rows for more values than one statement can bind"""
+
+    def test_select_in(self):
+        connection = sqlite3.connect(':memory:')
+        connection.execute('CREATE TABLE numbers (n INTEGER, parity INTEGER)')
+        connection.executemany('INSERT INTO numbers VALUES (?, ?)', [(n, n % 2) for n in range(3000)])
+        values = list(range(SQLITE_BATCH_SIZE * 2 + 50))
+
+        rows = list(select_in(connection, 'SELECT n FROM numbers WHERE parity = ? AND n IN ({})', values, (1,)))
+
+        self.assertListEqual(sorted(row[0] for row in rows), [n for n in values if n % 2])
+        self.assertListEqual(list(select_in(connection, 'SELECT n FROM numbers WHERE n IN ({})', [])), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,24 +1,9 @@
 import unittest
-import json
 import numpy as np
 import pandas as pd
 
-from app.transformer_pipeline import TransformerPipeline
-
-
-def _get_mock_sentiment_predictions(df):
-    df_copy = df.copy()
-    mock_scores = np.arange(-1.0, 1, 0.2)
-    mock_text = ['Negative'] * 5 + ['Neutral'] + ['Positive'] * 4
-    df_copy['sentiment_score'] = mock_scores
-    df_copy['sentiment_text'] = mock_text
-    return df_copy
-
-
-def _load_mock_json():
-    with open('./test/resources/test_twitter_response.json', encoding='utf-8') as json_file:
-        json_data = json.load(json_file)
-        return json_data['_json']
+from app.transformer_pipeline import TransformerPipeline, lttb_indices
+from test.mock_data import get_mock_sentiment_predictions, load_mock_json
 
 
 class TestTransformerPipeline(unittest.TestCase):
@@ -31,7 +16,7 @@ class TestTransformerPipeline(unittest.TestCase):
         expected_cols = ['id', 'created_at', 'full_text', 'tweet', 'retweet_count', 'favorite_count',
                          'entities.hashtags', 'user.id', 'user.screen_name']
 
-        mock_json = _load_mock_json()
+        mock_json = load_mock_json()
         test_df = self.transformer.convert_json_to_dataframe(mock_json)
 
         # Test shape
@@ -39,6 +24,24 @@ class TestTransformerPipeline(unittest.TestCase):
         for col in expected_cols:
             self.assertTrue(col in test_df)
 
+    def test_convert_json_to_dataframe_matches_json_normalize(self):
+        mock_json = load_mock_json()
+        expected_df = pd.json_normalize(mock_json)
+        retweet_mask = ~expected_df['retweeted_status.full_text'].isnull()
+        expected_df['tweet'] = expected_df['retweeted_status.full_text'].fillna(expected_df['full_text'])
+        expected_df.loc[retweet_mask, 'full_text'] = expected_df.loc[retweet_mask, 'full_text'] \
+            .apply(lambda s: s.split(':')[0]) + ': ' + expected_df.loc[retweet_mask, 'tweet']
+        expected_df['created_at'] = pd.to_datetime(expected_df['created_at'])
+
+        test_df = self.transformer.convert_json_to_dataframe(mock_json)
+
+        self.assertTrue(test_df.equals(expected_df[list(test_df)]))
+        # Tweets without any re-tweets keep their own text
+        originals = [tweet for tweet in mock_json if 'retweeted_status' not in tweet]
+        original_df = self.transformer.convert_json_to_dataframe(originals)
+        self.assertListEqual(original_df['tweet'].to_list(), original_df['full_text'].to_list())
+        self.assertIsNone(self.transformer.convert_json_to_dataframe([]))
+
     def test_clean_tweet(self):
         raw_tweet = '  In the #Avatar       https://www.test.com      sequels, you \t' \
                     '\n won’t just return   to Pandora — you’ll explore new parts of the world. @officialavatar '
@@ -48,9 +51,21 @@ class TestTransformerPipeline(unittest.TestCase):
         clean_tweet = self.transformer.clean_tweet(raw_tweet)
         self.assertEqual(clean_tweet, expected_tweet)
 
+    def test_clean_tweets(self):
+        mock_df = self.transformer.convert_json_to_dataframe(load_mock_json())
+        edge_tweets = ['', '   ', '#https://t.co/abc', '#ab https://t.co/x_cd', '@a#b_c @#d', ' x @y ']
+        mock_tweets = pd.concat([mock_df['tweet'], pd.Series(edge_tweets)], ignore_index=True)
+        expected_tweets = mock_tweets.map(self.transformer.clean_tweet)
+
+        test_tweets = self.transformer.clean_tweets(mock_tweets)
+
+        self.assertListEqual(test_tweets.to_list(), expected_tweets.to_list())
+        self.assertTrue(test_tweets.index.equals(mock_tweets.index))
+        self.assertEqual(len(self.transformer.clean_tweets(pd.Series([], dtype='object'))), 0)
+
     def test_map_sentiment_label(self):
-        mock_df = self.transformer.convert_json_to_dataframe(_load_mock_json())
-        mock_df = _get_mock_sentiment_predictions(mock_df)
+        mock_df = self.transformer.convert_json_to_dataframe(load_mock_json())
+        mock_df = get_mock_sentiment_predictions(mock_df)
         expected_text = mock_df['sentiment_text'].to_list()
 
         sentiment_text = mock_df['sentiment_score'].map(self.transformer.map_sentiment_label).to_list()
@@ -67,9 +82,34 @@ class TestTransformerPipeline(unittest.TestCase):
 
         self.assertListEqual(interaction_text, expected_text)
 
+    def test_map_sentiment_labels(self):
+        mock_df = self.transformer.convert_json_to_dataframe(load_mock_json())
+        mock_df = get_mock_sentiment_predictions(mock_df)
+        mock_scores = mock_df['sentiment_score'].set_axis(range(10, 20))
+
+        sentiment_text = self.transformer.map_sentiment_labels(mock_scores)
+
+        self.assertEqual(sentiment_text.dtype, 'category')
+        self.assertTrue(sentiment_text.index.equals(mock_scores.index))
+        self.assertListEqual(sentiment_text.to_list(), mock_df['sentiment_text'].to_list())
+        self.assertListEqual(list(self.transformer.map_sentiment_labels([-0.05, 0, 0.05])),
+                             ['Negative', 'Neutral', 'Positive'])
+
+    def test_map_interaction_labels(self):
+        mock_time_deltas = [pd.Timedelta("1 hour"), pd.Timedelta("2 hour"), pd.Timedelta("6 hour"),
+                            pd.Timedelta("13 hour"), pd.Timedelta("26 hour"), pd.NaT]
+        mock_sample_sizes = [100, 50, 100, 100, 100, 100]
+        expected_text = list(map(self.transformer.map_interaction_label, mock_time_deltas, mock_sample_sizes))
+
+        interaction_text = self.transformer.map_interaction_labels(mock_time_deltas, mock_sample_sizes)
+
+        self.assertTrue(interaction_text.ordered)
+        self.assertListEqual(list(interaction_text), expected_text)
+        self.assertListEqual(expected_text, ['Very High', 'Medium', 'Medium', 'Low', 'Very Low', 'Very Low'])
+
     def test_gen_tweets_by_time_dataframe(self):
-        mock_df = self.transformer.convert_json_to_dataframe(_load_mock_json())
-        mock_df = _get_mock_sentiment_predictions(mock_df)
+        mock_df = self.transformer.convert_json_to_dataframe(load_mock_json())
+        mock_df = get_mock_sentiment_predictions(mock_df)
 
         # Tallied manually from ./resources/test_twitter_response.json
         expected_times = ['3-26-21 14:23:00+00:00', '3-26-21 14:24:00+00:00', '3-26-21 14:26:00+00:00',
@@ -86,10 +126,34 @@ class TestTransformerPipeline(unittest.TestCase):
 
         self.assertTrue(test_df.equals(expected_df))
 
+    def test_gen_tweets_by_time_dataframe_resolution(self):
+        mock_df = self.transformer.convert_json_to_dataframe(load_mock_json())
+
+        # Tallied manually from ./resources/test_twitter_response.json
+        expected_times = pd.date_range('3-26-21 14:20:00+00:00', '3-26-21 14:30:00+00:00', freq='5min')
+        expected_counts = [3, 4, 3]
+
+        test_df = self.transformer.gen_tweets_by_time_dataframe(mock_df, resolution='5 minutes')
+        filled_df = self.transformer.gen_tweets_by_time_dataframe(mock_df, fill_empty=True)
+        hour_df = self.transformer.gen_tweets_by_time_dataframe(mock_df, resolution='hour')
+        capped_df = self.transformer.gen_tweets_by_time_dataframe(mock_df, fill_empty=True, max_buckets=10)
+        full_df = self.transformer.gen_tweets_by_time_dataframe(mock_df, fill_empty=True, max_buckets=11)
+
+        self.assertListEqual(test_df['Created'].to_list(), expected_times.to_list())
+        self.assertListEqual(test_df['Tweets'].to_list(), expected_counts)
+        # Minutes without tweets between 14:23 and 14:33 are filled with zeros
+        self.assertEqual(len(filled_df), 11)
+        self.assertEqual(filled_df['Tweets'].sum(), 10)
+        self.assertListEqual(filled_df['Tweets'].to_list()[:4], [2, 1, 0, 1])
+        self.assertListEqual(hour_df['Tweets'].to_list(), [10])
+        # Filling would take more than max_buckets rows, so only minutes with tweets are kept
+        self.assertTrue(capped_df.equals(self.transformer.gen_tweets_by_time_dataframe(mock_df)))
+        self.assertTrue(full_df.equals(filled_df))
+
     def test_gen_sentiment_score_by_time_dataframe(self):
         mock_cols = ['created_at', 'sentiment_score', 'sentiment_text']
-        mock_df = self.transformer.convert_json_to_dataframe(_load_mock_json())
-        mock_df = _get_mock_sentiment_predictions(mock_df)
+        mock_df = self.transformer.convert_json_to_dataframe(load_mock_json())
+        mock_df = get_mock_sentiment_predictions(mock_df)
 
         expected_cols = ['Created', 'Sentiment Score', 'Sentiment']
 
@@ -99,9 +163,60 @@ class TestTransformerPipeline(unittest.TestCase):
         for i, col in enumerate(expected_cols):
             self.assertListEqual(test_df[col].values.tolist(), mock_df[mock_cols[i]].values.tolist())
 
+    def test_gen_sentiment_score_by_time_dataframe_max_points(self):
+        mock_df = self.transformer.convert_json_to_dataframe(load_mock_json())
+        mock_df = get_mock_sentiment_predictions(mock_df)
+
+        test_df = self.transformer.gen_sentiment_score_by_time_dataframe(mock_df, max_points=4)
+        full_df = self.transformer.gen_sentiment_score_by_time_dataframe(mock_df, max_points=10)
+
+        self.assertEqual(len(test_df), 4)
+        self.assertTrue(test_df['Created'].is_monotonic_increasing)
+        # The first and last tweets are always kept
+        self.assertEqual(test_df['Created'].iloc[0], mock_df['created_at'].min())
+        self.assertEqual(test_df['Created'].iloc[-1], mock_df['created_at'].max())
+        self.assertEqual(len(full_df), 10)
+
+    def test_lttb_indices(self):
+        x = np.arange(11)
+        y = np.array([0, 0, 0, 5, 0, 0, 0, -5, 0, 0, 0])
+
+        self.assertListEqual(lttb_indices(x, y, 4).tolist(), [0, 3, 7, 10])
+        self.assertListEqual(lttb_indices(x, y, 20).tolist(), list(range(11)))
+
+    def test_gen_sentiment_stats_by_time_dataframe(self):
+        mock_df = self.transformer.convert_json_to_dataframe(load_mock_json())
+        mock_df = get_mock_sentiment_predictions(mock_df)
+        grouped = mock_df.groupby(mock_df['created_at'].dt.floor('min'))['sentiment_score']
+
+        test_df = self.transformer.gen_sentiment_stats_by_time_dataframe(mock_df, 'hour')
+        minute_df = self.transformer.gen_sentiment_stats_by_time_dataframe(mock_df, 'minute')
+
+        self.assertListEqual(list(test_df), ['Created', 'Tweets', 'Sentiment Score', 'Lower Quartile', 'Median',
+                                             'Upper Quartile'])
+        self.assertListEqual(test_df['Tweets'].to_list(), [10])
+        self.assertAlmostEqual(test_df['Sentiment Score'][0], mock_df['sentiment_score'].mean())
+        self.assertAlmostEqual(test_df['Lower Quartile'][0], mock_df['sentiment_score'].quantile(0.25))
+        self.assertAlmostEqual(test_df['Median'][0], mock_df['sentiment_score'].median())
+        self.assertAlmostEqual(test_df['Upper Quartile'][0], mock_df['sentiment_score'].quantile(0.75))
+        self.assertEqual(minute_df['Tweets'].sum(), 10)
+        self.assertListEqual(minute_df['Created'].to_list(),
+                             self.transformer.gen_tweets_by_time_dataframe(mock_df)['Created'].to_list())
+        np.testing.assert_allclose(minute_df['Median'], grouped.median())
+        np.testing.assert_allclose(minute_df['Upper Quartile'], grouped.quantile(0.75))
+
+    def test_gen_sentiment_counts_dataframe(self):
+        mock_df = self.transformer.convert_json_to_dataframe(load_mock_json())
+        mock_df = get_mock_sentiment_predictions(mock_df)
+
+        test_df = self.transformer.gen_sentiment_counts_dataframe(mock_df)
+
+        self.assertListEqual(test_df['Sentiment'].to_list(), ['Negative', 'Positive', 'Neutral'])
+        self.assertListEqual(test_df['Tweets'].to_list(), [5, 4, 1])
+
     def test_gen_hashtag_counts_dataframe(self):
-        mock_df = self.transformer.convert_json_to_dataframe(_load_mock_json())
-        mock_df = _get_mock_sentiment_predictions(mock_df)
+        mock_df = self.transformer.convert_json_to_dataframe(load_mock_json())
+        mock_df = get_mock_sentiment_predictions(mock_df)
 
         # Tallied manually from ./resources/test_twitter_response.json
         expected_hashtags = ['trm', 'richracer', 'psn', 'avatar', 'ps3']
@@ -0,0 +1,63 @@
+import unittest
+
+from app.transformer_pipeline import TransformerPipeline
+from app.tweet_aggregates import TweetAggregates
+from test.mock_data import load_mock_df
+
+
+class TestTweetAggregates(unittest.TestCase):
+    """Tests the incremental aggregation of dashboard statistics"""
+
+    transformer = TransformerPipeline()
+
+    def test_update(self):
+        mock_df = load_mock_df()
+
+        aggregates = TweetAggregates()
+        for i in range(0, len(mock_df.index), 3):
+            aggregates.update(mock_df.iloc[i:i + 3])
+
+        self.assertEqual(aggregates.tweets, 10)
+        self.assertAlmostEqual(aggregates.mean_sentiment, mock_df['sentiment_score'].mean())
+        self.assertEqual(aggregates.most_common_sentiment, mock_df['sentiment_text'].mode()[0])
+        self.assertEqual(aggregates.time_range, mock_df['created_at'].max() - mock_df['created_at'].min())
+        self.assertTrue(aggregates.gen_tweets_by_time_dataframe().equals(
+            self.transformer.gen_tweets_by_time_dataframe(mock_df)))
+        self.assertTrue(aggregates.gen_tweets_by_time_dataframe('5 minutes', fill_empty=True).equals(
+            self.transformer.gen_tweets_by_time_dataframe(mock_df, '5 minutes', fill_empty=True)))
+        self.assertTrue(aggregates.gen_sentiment_counts_dataframe().equals(
+            self.transformer.gen_sentiment_counts_dataframe(mock_df)))
+
+    def test_top_tweets(self):
+        mock_df = load_mock_df()
+        top_favorite = mock_df.loc[mock_df['favorite_count'] == mock_df['favorite_count'].max()]
+        top_retweet = mock_df.loc[mock_df['retweet_count'] == mock_df['retweet_count'].max()]
+
+        aggregates = TweetAggregates(top_k=3)
+        for i in range(0, len(mock_df.index), 4):
+            aggregates.update(mock_df.iloc[i:i + 4])
+
+        self.assertEqual(len(aggregates.top_favorites()), 3)
+        self.assertEqual(aggregates.top_favorites()[0]['full_text'], top_favorite['full_text'].values[0])
+        self.assertEqual(aggregates.top_retweets()[0]['full_text'], top_retweet['full_text'].values[0])
+        self.assertListEqual([record['retweet_count'] for record in aggregates.top_retweets()],
+                             mock_df['retweet_count'].nlargest(3).to_list())
+
+    def test_merge(self):
+        mock_df = load_mock_df()
+        expected = TweetAggregates(top_k=3).update(mock_df)
+
+        merged = TweetAggregates(top_k=3).update(mock_df.iloc[:6])
+        merged.merge(TweetAggregates(top_k=3).update(mock_df.iloc[6:]))
+
+        self.assertEqual(merged.tweets, expected.tweets)
+        self.assertAlmostEqual(merged.mean_sentiment, expected.mean_sentiment)
+        self.assertEqual(merged.time_range, expected.time_range)
+        self.assertListEqual(merged.top_favorites(), expected.top_favorites())
+        self.assertListEqual(merged.top_retweets(), expected.top_retweets())
+        self.assertTrue(merged.gen_tweets_by_time_dataframe().equals(expected.gen_tweets_by_time_dataframe()))
+        self.assertDictEqual(merged.sentiment_counts, expected.sentiment_counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import gzip
+import io
+import pandas as pd
+
+from app.tweet_export import export_file_name, export_mime_type, gen_export, write_export
+
+
+def _gen_dataframe(rows):
+    return pd.DataFrame({
+        'Created': pd.date_range('2021-03-14 20:00', periods=rows, freq='s', tz='utc'),
+        'User': pd.Series(['user_{}'.format(i % 7) for i in range(rows)], dtype='category'),
+        'Tweet': ['tweet, "number" {}'.format(i) for i in range(rows)],
+        'Sentiment Score': [i / rows for i in range(rows)],
+    })
+
+
+class _RecordingFile(io.BytesIO):
+    """Records the size of every write"""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(len(data))
+        return super().write(data)
+
+
+class TestTweetExport(unittest.TestCase):
+    """Tests exporting the analyzed tweets in chunks"""
+
+    def _assert_csv_equal(self, data, expected_df):
+        test_df = pd.read_csv(io.BytesIO(data), parse_dates=['Created'])
+        self.assertListEqual(test_df.columns.tolist(), expected_df.columns.tolist())
+        self.assertListEqual(test_df['Tweet'].tolist(), expected_df['Tweet'].tolist())
+        self.assertListEqual(test_df['User'].tolist(), expected_df['User'].astype('object').tolist())
+        self.assertTrue((test_df['Created'] == expected_df['Created']).all())
+
+    def test_gen_export_csv(self):
+        df = _gen_dataframe(25)
+
+        data = gen_export(df, 'csv', chunk_size=10)
+
+        self.assertEqual(data, df.to_csv(index=False).encode())
+        self._assert_csv_equal(data, df)
+
+    def test_gen_export_csv_gzip(self):
+        df = _gen_dataframe(25)
+
+        data = gen_export(df, 'csv', 'gzip', chunk_size=10)
+
+        self.assertEqual(gzip.decompress(data), df.to_csv(index=False).encode())
+
+    def test_gen_export_csv_zstd(self):
+        try:
+            import zstandard
+        except ImportError:
+            self.skipTest('zstandard is not installed')
+        df = _gen_dataframe(25)
+
+        data = gen_export(df, 'csv', 'zstd', chunk_size=10)
+
+        with zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data)) as reader:
+            self.assertEqual(reader.read(), df.to_csv(index=False).encode())
+
+    def test_gen_export_parquet(self):
+        try:
+            import pyarrow
+        except ImportError:
+            self.skipTest('pyarrow is not installed')
+        df = _gen_dataframe(25)
+
+        for compression in [None, 'gzip', 'zstd']:
+            data = gen_export(df, 'parquet', compression, chunk_size=10)
+
+            test_df = pd.read_parquet(io.BytesIO(data))
+            pd.testing.assert_frame_equal(test_df, df)
+
+    def test_gen_export_empty(self):
+        df = _gen_dataframe(0)
+
+        data = gen_export(df, 'csv')
+
+        self.assertEqual(data, df.to_csv(index=False).encode())
+
+    def test_write_export_writes_chunks(self):
+        df = _gen_dataframe(1000)
+        file = _RecordingFile()
+
+        write_export(df, file, 'csv', chunk_size=100)
+
+        self.assertEqual(file.getvalue(), df.to_csv(index=False).encode())
+        self.assertLess(max(file.writes), len(file.getvalue()) / 2)
+
+    def test_write_export_rejects_unknown_format(self):
+        with self.assertRaises(ValueError):
+            write_export(_gen_dataframe(1), io.BytesIO(), 'xlsx')
+        with self.assertRaises(ValueError):
+            write_export(_gen_dataframe(1), io.BytesIO(), 'csv', 'bz2')
+
+    def test_export_file_name(self):
+        self.assertEqual(export_file_name('tweets'), 'tweets.csv')
+        self.assertEqual(export_file_name('tweets', 'csv', 'gzip'), 'tweets.csv.gz')
+        self.assertEqual(export_file_name('tweets', 'csv', 'zstd'), 'tweets.csv.zst')
+        self.assertEqual(export_file_name('tweets', 'parquet', 'zstd'), 'tweets.parquet')
+        self.assertEqual(export_mime_type('csv', 'gzip'), 'application/gzip')
+        self.assertEqual(export_mime_type('parquet', 'gzip'), 'application/vnd.apache.parquet')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from app.transformer_pipeline import TransformerPipeline
+from app.tweet_history import TweetHistory
+from test.mock_data import load_mock_df
+
+
+class TestTweetHistory(unittest.TestCase):
+    """Tests keeping scored tweets and their rollups in the SQLite history"""
+
+    def test_upsert_and_load_query(self):
+        mock_df = load_mock_df()
+        history = TweetHistory()
+
+        added = history.upsert('#Avatar', mock_df)
+        test_df = history.load_query('#Avatar')
+
+        self.assertEqual(added, 10)
+        self.assertEqual(len(history), 10)
+        self.assertListEqual(list(test_df), list(mock_df))
+        pd.testing.assert_frame_equal(test_df.drop(columns=['entities.hashtags']),
+                                      mock_df.drop(columns=['entities.hashtags']), check_dtype=False)
+        self.assertTrue(test_df['created_at'].equals(mock_df['created_at']))
+        self.assertListEqual([[tag['text'] for tag in tags] for tags in test_df['entities.hashtags']],
+                             [[tag['text'] for tag in tags] for tags in mock_df['entities.hashtags']])
+        self.assertEqual(len(history.load_query('#Other')), 0)
+
+    def test_upsert_skips_stored_tweets(self):
+        mock_df = load_mock_df()
+        history = TweetHistory()
+        history.upsert('#Avatar', mock_df)
+        rescored_df = mock_df.assign(sentiment_score=np.float32(0.5), sentiment_text='Positive',
+                                     retweet_count=mock_df['retweet_count'] + 1)
+
+        added = history.upsert('#Avatar', rescored_df)
+        test_df = history.load_query('#Avatar')
+
+        self.assertEqual(added, 0)
+        # Scores are kept, counts are refreshed, and the rollups count each tweet once
+        np.testing.assert_allclose(test_df['sentiment_score'], mock_df['sentiment_score'], atol=1e-6)
+        self.assertListEqual(test_df['retweet_count'].tolist(), rescored_df['retweet_count'].tolist())
+        self.assertEqual(history.gen_rollup_dataframe('#Avatar')['Tweets'].sum(), 10)
+
+    def test_stored_scores(self):
+        mock_df = load_mock_df()
+        history = TweetHistory()
+        history.upsert('#Avatar', mock_df.head(6))
+
+        scores = history.stored_scores(mock_df['id'])
+
+        self.assertSetEqual(set(scores), set(mock_df['id'].head(6)))
+        np.testing.assert_allclose([scores[i] for i in mock_df['id'].head(6)], mock_df['sentiment_score'].head(6),
+                                   atol=1e-6)
+
+    def test_upsert_shared_tweets(self):
+        mock_df = load_mock_df()
+        history = TweetHistory()
+        history.upsert('#Avatar', mock_df.head(6))
+
+        added = history.upsert('#TRM', mock_df.tail(6))
+
+        self.assertEqual(added, 6)
+        self.assertEqual(len(history), 10)
+        self.assertListEqual(history.load_query('#TRM')['id'].tolist(), mock_df.tail(6)['id'].tolist())
+        self.assertListEqual(history.gen_queries_dataframe()['Query'].tolist(), ['#Avatar', '#TRM'])
+        self.assertListEqual(history.gen_queries_dataframe()['Tweets'].tolist(), [6, 6])
+
+    def test_load_time_range(self):
+        mock_df = load_mock_df()
+        history = TweetHistory()
+        history.upsert('#Avatar', mock_df)
+        start = pd.Timestamp('2021-03-26 14:24:41', tz='UTC')
+        end = pd.Timestamp('2021-03-26 14:33:05', tz='UTC')
+
+        test_df = history.load_query('#Avatar', start, end)
+
+        expected_df = mock_df[(mock_df['created_at'] >= start) & (mock_df['created_at'] < end)]
+        self.assertListEqual(test_df['id'].tolist(), expected_df['id'].tolist())
+
+    def test_load_hashtag(self):
+        mock_df = load_mock_df()
+        history = TweetHistory()
+        history.upsert('#Avatar', mock_df)
+
+        test_df = history.load_hashtag('#PSN')
+
+        self.assertListEqual(test_df['id'].tolist(), mock_df['id'].iloc[[1]].tolist())
+        self.assertEqual(len(history.load_hashtag('richracer')), 9)
+
+    def test_gen_rollup_dataframe(self):
+        mock_df = load_mock_df()
+        history = TweetHistory()
+        history.upsert('#Avatar', mock_df)
+        transformer = TransformerPipeline()
+
+        for resolution in ['minute', '5 minutes', 'hour', 'day']:
+            test_df = history.gen_rollup_dataframe('#Avatar', resolution)
+
+            expected_df = transformer.gen_sentiment_stats_by_time_dataframe(mock_df, resolution)
+            self.assertTrue(test_df['Created'].equals(expected_df['Created']))
+            self.assertListEqual(test_df['Tweets'].tolist(), expected_df['Tweets'].tolist())
+            np.testing.assert_allclose(test_df['Sentiment Score'], expected_df['Sentiment Score'], atol=1e-6)
+        hour_df = history.gen_rollup_dataframe('#Avatar', 'hour')
+        self.assertListEqual(hour_df[['Negative', 'Neutral', 'Positive']].values.tolist()[0], [5, 1, 4])
+        with self.assertRaises(ValueError):
+            history.gen_rollup_dataframe('#Avatar', 'second')
+
+    def test_gen_time_span(self):
+        # Tweets spread over 18 hours of one day
+        mock_df = load_mock_df()
+        mock_df['created_at'] = pd.Timestamp('2021-03-26 02:00', tz='UTC') + pd.to_timedelta(
+            [2 * i for i in range(10)], unit='h')
+        history = TweetHistory()
+        history.upsert('#Avatar', mock_df)
+
+        first, last = history.gen_time_span('#Avatar')
+
+        self.assertEqual(len(history.gen_rollup_dataframe('#Avatar', 'day')), 1)
+        self.assertEqual(first, pd.Timestamp('2021-03-26 02:00', tz='UTC'))
+        self.assertEqual(last - first, pd.Timedelta(hours=18))
+        self.assertEqual(TransformerPipeline().map_interaction_label(last - first, 10), 'Very Low')
+        self.assertEqual(history.gen_time_span('#Avatar', start=pd.Timestamp('2021-03-26 19:00', tz='UTC'))[0],
+                         pd.Timestamp('2021-03-26 20:00', tz='UTC'))
+        self.assertTrue(all(time is pd.NaT for time in history.gen_time_span('#Other')))
+
+    def test_persists_across_restarts(self):
+        mock_df = load_mock_df()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'history.db')
+            history = TweetHistory(path)
+            history.upsert('#Avatar', mock_df)
+            history.close()
+
+            reopened = TweetHistory(path)
+            known = reopened.known_ids(mock_df['id'].tolist() + [1])
+            num_tweets = len(reopened.load_query('#Avatar'))
+            reopened.close()
+
+        self.assertSetEqual(known, set(mock_df['id'].tolist()))
+        self.assertEqual(num_tweets, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
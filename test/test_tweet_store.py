@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+
+from app.transformer_pipeline import TransformerPipeline
+from app.tweet_store import HashtagColumn, TweetStore
+from test.mock_data import load_mock_df
+
+
+class TestTweetStore(unittest.TestCase):
+    """Tests the compact storage of scored tweets"""
+
+    transformer = TransformerPipeline()
+
+    def test_from_dataframe(self):
+        mock_df = load_mock_df()
+
+        store = TweetStore.from_dataframe(mock_df)
+
+        self.assertEqual(len(store), 10)
+        self.assertNotIn('entities.hashtags', store.frame)
+        self.assertEqual(store.frame['id'].dtype, np.int64)
+        self.assertEqual(store.frame['sentiment_score'].dtype, np.float32)
+        self.assertEqual(store.frame['user.screen_name'].dtype.name, 'category')
+        self.assertListEqual(list(store.frame['sentiment_text'].cat.categories), ['Negative', 'Neutral', 'Positive'])
+        self.assertListEqual(store.frame['sentiment_text'].to_list(), mock_df['sentiment_text'].to_list())
+        for i, hashtags in enumerate(mock_df['entities.hashtags']):
+            self.assertListEqual(store.hashtags[i], [hashtag['text'] for hashtag in hashtags])
+
+    def test_concat(self):
+        mock_df = load_mock_df()
+
+        store = TweetStore.concat([TweetStore.from_dataframe(mock_df.iloc[:4]),
+                                   TweetStore.from_dataframe(mock_df.iloc[4:])])
+        expected_store = TweetStore.from_dataframe(mock_df)
+
+        self.assertTrue(store.frame.equals(expected_store.frame))
+        self.assertListEqual([store.hashtags[i] for i in range(len(store))],
+                             [expected_store.hashtags[i] for i in range(len(expected_store))])
+
+    def test_gen_hashtag_counts_dataframe(self):
+        mock_df = load_mock_df()
+        expected_df = self.transformer.gen_hashtag_counts_dataframe(mock_df)
+
+        test_df = TweetStore.from_dataframe(mock_df).gen_hashtag_counts_dataframe()
+
+        self.assertListEqual(list(test_df), ['Hashtag', 'Count'])
+        self.assertDictEqual(dict(zip(test_df['Hashtag'], test_df['Count'])),
+                             dict(zip(expected_df['Hashtag'], expected_df['Count'])))
+        # Ties are ordered alphabetically
+        self.assertListEqual(test_df['Hashtag'].to_list()[:3], ['richracer', 'trm', 'psn'])
+        self.assertEqual(len(HashtagColumn.from_entities([[], []]).gen_counts_dataframe()), 0)
+
+    def test_gen_user_counts_series(self):
+        mock_df = load_mock_df()
+
+        test_counts = TweetStore.from_dataframe(mock_df).gen_user_counts_series()
+
+        self.assertDictEqual(test_counts.to_dict(), mock_df['user.screen_name'].value_counts().to_dict())
+        # Ties are ordered alphabetically
+        expected_users = sorted(test_counts.index, key=lambda user: (-test_counts[user], user))
+        self.assertListEqual(test_counts.index.to_list(), expected_users)
+
+
+if __name__ == '__main__':
+    unittest.main()
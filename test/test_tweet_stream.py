@@ -0,0 +1,103 @@
+import unittest
+import threading
+import numpy as np
+import pandas as pd
+
+from app.sentiment_scorer import SentimentScorer
+from app.transformer_pipeline import TransformerPipeline
+from app.tweet_history import TweetHistory
+from app.tweet_aggregates import TweetAggregates
+from app.tweet_stream import TweetStream
+from test.mock_data import load_mock_df, load_mock_json
+
+
+class _MockStatus:
+    def __init__(self, json_data):
+        self._json = json_data
+
+
+class _MockCursor:
+    """Replays the mock tweets as pages of tweepy models, recording the thread each page is fetched on"""
+
+    def __init__(self, json_data, page_size, error=None):
+        self.json_data = json_data
+        self.page_size = page_size
+        self.error = error
+        self.fetch_threads = []
+
+    def pages(self):
+        for i in range(0, len(self.json_data), self.page_size):
+            self.fetch_threads.append(threading.current_thread())
+            yield [_MockStatus(tweet) for tweet in self.json_data[i:i + self.page_size]]
+        if self.error:
+            raise self.error
+
+
+class TestTweetStream(unittest.TestCase):
+    """Tests the streaming of tweet pages through conversion, cleaning and scoring"""
+
+    transformer = TransformerPipeline()
+    scorer = SentimentScorer(workers=1)
+
+    def _gen_expected_dataframe(self, json_data):
+        df = self.transformer.convert_json_to_dataframe(json_data)
+        df['sentiment_score'] = self.scorer.score_tweets(self.transformer.clean_tweets(df['tweet']))['compound']
+        df['sentiment_text'] = df['sentiment_score'].map(self.transformer.map_sentiment_label)
+        return df
+
+    def test_process_pages(self):
+        mock_json = load_mock_json()
+        cursor = _MockCursor(mock_json, page_size=3)
+        aggregates = TweetAggregates()
+        stream = TweetStream(self.transformer, self.scorer, aggregates)
+        expected_df = self._gen_expected_dataframe(mock_json)
+
+        frames = list(stream.process_pages(cursor.pages()))
+        test_df = pd.concat(frames)
+
+        self.assertEqual(len(frames), 4)
+        self.assertTrue(test_df.equals(expected_df))
+        # Pages are fetched off the consuming thread
+        self.assertNotIn(threading.current_thread(), cursor.fetch_threads)
+        self.assertEqual(stream.tweets, 10)
+        self.assertEqual(aggregates.tweets, 10)
+        self.assertAlmostEqual(aggregates.mean_sentiment, expected_df['sentiment_score'].mean(), places=6)
+
+    def test_process_pages_limit(self):
+        mock_json = load_mock_json()
+        stream = TweetStream(self.transformer, self.scorer)
+
+        test_df = pd.concat(stream.process_pages(_MockCursor(mock_json, page_size=4).pages(), limit=6))
+
+        self.assertTrue(test_df.equals(self._gen_expected_dataframe(mock_json[:6])))
+
+    def test_process_pages_history(self):
+        mock_json = load_mock_json()
+        history = TweetHistory()
+        history.upsert('#Avatar', load_mock_df().head(4))
+        scored = []
+        scorer = SentimentScorer(workers=1)
+        score_tweets = scorer.score_tweets
+        scorer.score_tweets = lambda series: scored.extend(series) or score_tweets(series)
+        stream = TweetStream(self.transformer, scorer, history=history)
+        expected_df = self._gen_expected_dataframe(mock_json)
+
+        test_df = pd.concat(stream.process_pages(_MockCursor(mock_json, page_size=3).pages()))
+
+        # Stored tweets keep their stored scores and only the others are scored
+        self.assertEqual(len(scored), 6)
+        np.testing.assert_allclose(test_df['sentiment_score'][:4], load_mock_df()['sentiment_score'][:4], atol=1e-6)
+        self.assertTrue(test_df[4:].equals(expected_df[4:]))
+        self.assertEqual(test_df['sentiment_score'].dtype, 'float32')
+
+    def test_process_pages_error(self):
+        cursor = _MockCursor(load_mock_json(), page_size=5, error=RuntimeError('rate limited'))
+        stream = TweetStream(self.transformer, self.scorer)
+
+        with self.assertRaises(RuntimeError):
+            list(stream.process_pages(cursor.pages()))
+        self.assertEqual(stream.tweets, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import os
+import pickle
+import tempfile
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+from app.vader_lexicon import compile_lexicon, get_analyzer, load_lexicon
+
+
+class TestVaderLexicon(unittest.TestCase):
+    """Tests loading the VADER lexicon from its precompiled pickle"""
+
+    analyzer = SentimentIntensityAnalyzer()
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'vader_lexicon.pickle')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_load_lexicon_compiles_missing_pickle(self):
+        lexicon, emojis = load_lexicon(self.path)
+
+        self.assertTrue(os.path.exists(self.path))
+        self.assertDictEqual(lexicon, self.analyzer.lexicon)
+        self.assertDictEqual(emojis, self.analyzer.emojis)
+
+    def test_load_lexicon_reads_pickle(self):
+        compile_lexicon(self.path)
+        modified = os.stat(self.path).st_mtime_ns
+
+        lexicon, emojis = load_lexicon(self.path)
+
+        self.assertEqual(os.stat(self.path).st_mtime_ns, modified)
+        self.assertDictEqual(lexicon, self.analyzer.lexicon)
+
+    def test_load_lexicon_rebuilds_stale_pickle(self):
+        with open(self.path, 'wb') as file:
+            pickle.dump((((0, 0), (0, 0)), ({'good': -4.0}, {})), file)
+
+        lexicon, emojis = load_lexicon(self.path)
+
+        self.assertDictEqual(lexicon, self.analyzer.lexicon)
+
+    def test_load_lexicon_rebuilds_corrupt_pickle(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'not a pickle')
+
+        lexicon, emojis = load_lexicon(self.path)
+
+        self.assertDictEqual(lexicon, self.analyzer.lexicon)
+        self.assertDictEqual(load_lexicon(self.path)[1], self.analyzer.emojis)
+
+    def test_get_analyzer(self):
+        texts = ['I love this movie!', 'This is terrible :(', 'It is a movie 😀', '']
+
+        analyzer = get_analyzer()
+
+        self.assertIs(get_analyzer(), analyzer)
+        for text in texts:
+            self.assertDictEqual(analyzer.polarity_scores(text), self.analyzer.polarity_scores(text))
+
+
+if __name__ == '__main__':
+    unittest.main()